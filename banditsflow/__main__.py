@@ -1,7 +1,9 @@
 import os
+from typing import Tuple
 
 import click
 
+from . import pipeline as p
 from . import scaffold as s
 
 
@@ -18,7 +20,97 @@ def scaffold(name: str) -> None:
     )
 
 
+@click.command()
+@click.option("--scenario", required=True, help="Name of scenario")
+@click.option("--actor", required=True, multiple=True, help="Name of actor")
+@click.option("--reporter", required=True, help="Name of reporter")
+@click.option(
+    "--optimization_metric", required=True, help="Name of metric for optimization"
+)
+@click.option(
+    "--optimization_direction",
+    default="maximize",
+    help="Direction of optimization like maximize",
+)
+@click.option("--experiment_name", default="default", help="Name of experiment")
+@click.option("--experiment_revision", default="", help="Revision of experiment")
+@click.option("--n_trials", type=int, default=1, help="Number of optimization")
+@click.option(
+    "--timeout", type=float, default=-1.0, help="Timeout seconds of optimization"
+)
+@click.option("--n_ite", type=int, default=1, help="Number of simulation")
+@click.option("--seed", type=int, default=1, help="Seed of seed")
+@click.option(
+    "--n_jobs",
+    type=int,
+    default=1,
+    help="Number of processes running actors (-1 means all cores)",
+)
+@click.option(
+    "--vectorize",
+    is_flag=True,
+    help="Run iterations of evaluation in lockstep if the actor supports it",
+)
+@click.option(
+    "--cache_dir",
+    default="",
+    help="Name of directory for caching the result of each iteration",
+)
+@click.option("--study_storage", default="", help="URL of storage for keeping studies")
+@click.option(
+    "--metric_quantiles",
+    type=float,
+    multiple=True,
+    help="Quantile of metrics aggregated over iterations",
+)
+@click.option("--outdir", default="reports", help="Name of directory for reports")
+@click.option("--mlflow", "log_mlflow", is_flag=True, help="Log to MLflow Tracking")
+def run(
+    scenario: str,
+    actor: Tuple[str, ...],
+    reporter: str,
+    optimization_metric: str,
+    optimization_direction: str,
+    experiment_name: str,
+    experiment_revision: str,
+    n_trials: int,
+    timeout: float,
+    n_ite: int,
+    seed: int,
+    n_jobs: int,
+    vectorize: bool,
+    cache_dir: str,
+    study_storage: str,
+    metric_quantiles: Tuple[float, ...],
+    outdir: str,
+    log_mlflow: bool,
+) -> None:
+    """Run optimize, evaluate and report in this process without Metaflow."""
+    os.makedirs(outdir, exist_ok=True)
+    pipeline = p.Pipeline(
+        scenario,
+        actor,
+        reporter,
+        optimization_metric,
+        experiment_name=experiment_name,
+        experiment_revision=experiment_revision,
+        optimization_direction=optimization_direction,
+        n_trials=n_trials,
+        timeout=timeout,
+        n_ite=n_ite,
+        seed=seed,
+        n_jobs=n_jobs,
+        vectorize=vectorize,
+        cache_dir=cache_dir,
+        study_storage=study_storage,
+        metric_quantiles=metric_quantiles,
+    )
+    for path in pipeline.run(outdir, log_mlflow=log_mlflow):
+        click.echo(path)
+
+
 cli.add_command(scaffold)
+cli.add_command(run)
 
 if __name__ == "__main__":
     cli()
@@ -1,4 +1,6 @@
-from typing import Any, Dict, Protocol, TypedDict, Union
+from typing import Any, Dict, Optional, Protocol, Sequence, TypedDict, Union
+
+import numpy.typing as npt
 
 from . import scenario
 
@@ -10,6 +12,11 @@ class ActionType(TypedDict):
     result: Dict[str, Any]
 
 
+class ActionBlockType(TypedDict):
+    metric: Dict[str, Any]
+    result: Dict[str, Any]
+
+
 class Actor(Protocol):
     def __init__(
         self, synopsis: scenario.SynopsisType, params: ParamsType, seed: int
@@ -20,9 +27,40 @@ class Actor(Protocol):
         ...
 
 
+class BatchActor(Actor, Protocol):
+    def act_batch(self, lines: scenario.LinesType) -> ActionBlockType:
+        ...
+
+
+class SnapshotActor(Actor, Protocol):
+    def snapshot(self) -> Any:
+        ...
+
+    def restore(self, state: Any) -> None:
+        ...
+
+
+class VectorActor(Protocol):
+    def act_vector(
+        self, lines: Sequence[scenario.LineType], indices: npt.NDArray[Any]
+    ) -> ActionBlockType:
+        ...
+
+
 class ActorLoader(Protocol):
     @staticmethod
     def load(
         name: str, synopsis: scenario.SynopsisType, params: ParamsType, seed: int
     ) -> Actor:
         ...
+
+
+class VectorActorLoader(ActorLoader, Protocol):
+    @staticmethod
+    def load_vector(
+        name: str,
+        synopses: Sequence[scenario.SynopsisType],
+        params: ParamsType,
+        seeds: Sequence[int],
+    ) -> Optional[VectorActor]:
+        ...
@@ -0,0 +1,349 @@
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import numpy.typing as npt
+
+from . import actor as act
+from . import result as res
+from . import retention as ret
+from . import simulator as sim
+
+SummaryType = Dict[str, Dict[str, npt.NDArray[Any]]]
+
+
+class P2Quantile:
+    """Streaming quantile estimator of the P-square algorithm for each step.
+
+    Each step keeps five markers, so the memory does not depend on the
+    number of observations.
+    """
+
+    def __init__(self, p: float) -> None:
+        self.p = p
+        self._heights = np.zeros((0, 5))
+        self._positions = np.zeros((0, 5))
+        self._desired = np.zeros((0, 5))
+        self._increments = np.array([0.0, p / 2.0, p, (1.0 + p) / 2.0, 1.0])
+
+    def reserve(self, size: int) -> None:
+        if len(self._heights) >= size:
+            return
+
+        capacity = max(size, 2 * len(self._heights))
+        for name in ("_heights", "_positions", "_desired"):
+            array = getattr(self, name)
+            grown = np.zeros((capacity, 5))
+            grown[: len(array)] = array
+            setattr(self, name, grown)
+
+    def update(
+        self,
+        steps: npt.NDArray[Any],
+        values: npt.NDArray[Any],
+        counts: npt.NDArray[Any],
+    ) -> None:
+        filling = counts < 5
+        if np.any(filling):
+            self._fill(steps[filling], values[filling], counts[filling])
+
+        tracking = ~filling
+        if np.any(tracking):
+            self._track(steps[tracking], values[tracking])
+
+    def estimate(self, counts: npt.NDArray[Any]) -> npt.NDArray[Any]:
+        size = len(counts)
+        estimates = np.full(size, np.nan)
+        tracked = counts >= 5
+        estimates[tracked] = self._heights[:size][tracked, 2]
+        for count in range(1, 5):
+            rows = counts == count
+            if np.any(rows):
+                estimates[rows] = np.quantile(
+                    self._heights[:size][rows, :count], self.p, axis=1
+                )
+        return estimates
+
+    def merge(
+        self,
+        other: "P2Quantile",
+        counts: npt.NDArray[Any],
+        other_counts: npt.NDArray[Any],
+    ) -> None:
+        """Merge the markers of `other` given the counts of both sides.
+
+        Observations of a side with fewer than five of a step are kept as
+        they are, so they are added one by one. Otherwise the markers are
+        averaged by count, which only approximates the merged quantile.
+        """
+        size = len(other_counts)
+        self.reserve(size)
+        counts = counts[:size]
+
+        # Take over the markers of `other` where only it tracks, and add the
+        # kept observations of the side which does not track.
+        swap = np.flatnonzero((counts < 5) & (other_counts >= 5))
+        raw = np.where(
+            ((counts < 5) & (other_counts >= 5))[:, None],
+            self._heights[:size],
+            other._heights[:size],
+        )
+        n_raw = np.where(other_counts < 5, other_counts, 0)
+        n_raw[swap] = counts[swap]
+        current = counts.copy()
+        current[swap] = other_counts[swap]
+        for name in ("_heights", "_positions", "_desired"):
+            getattr(self, name)[swap] = getattr(other, name)[swap]
+        for j in range(4):
+            steps = np.flatnonzero(n_raw > j)
+            if len(steps) == 0:
+                break
+            self.update(steps, raw[steps, j], current[steps])
+            current[steps] += 1
+
+        steps = np.flatnonzero((counts >= 5) & (other_counts >= 5))
+        if len(steps) > 0:
+            n = (counts[steps] + other_counts[steps]).astype(np.float64)
+            weight = (counts[steps] / n)[:, None]
+            q = weight * self._heights[steps] + (1.0 - weight) * other._heights[steps]
+            q[:, 0] = np.minimum(self._heights[steps, 0], other._heights[steps, 0])
+            q[:, 4] = np.maximum(self._heights[steps, 4], other._heights[steps, 4])
+            desired = (n - 1.0)[:, None] * self._increments
+            positions = np.round(desired)
+            for i in range(1, 5):
+                positions[:, i] = np.maximum(positions[:, i], positions[:, i - 1] + 1)
+            self._heights[steps] = q
+            self._positions[steps] = positions
+            self._desired[steps] = desired
+
+    def _fill(
+        self,
+        steps: npt.NDArray[Any],
+        values: npt.NDArray[Any],
+        counts: npt.NDArray[Any],
+    ) -> None:
+        self._heights[steps, counts] = values
+
+        filled = steps[counts == 4]
+        if len(filled) > 0:
+            p = self.p
+            self._heights[filled] = np.sort(self._heights[filled], axis=1)
+            self._positions[filled] = np.arange(5.0)
+            self._desired[filled] = [0.0, 2.0 * p, 4.0 * p, 2.0 + 2.0 * p, 4.0]
+
+    def _track(self, steps: npt.NDArray[Any], values: npt.NDArray[Any]) -> None:
+        q = self._heights[steps]
+        n = self._positions[steps]
+        d = self._desired[steps] + self._increments
+
+        q[:, 0] = np.minimum(q[:, 0], values)
+        q[:, 4] = np.maximum(q[:, 4], values)
+        k = np.sum(q[:, 1:4] <= values[:, None], axis=1)
+        n += np.arange(5)[None, :] > k[:, None]
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            for i in (1, 2, 3):
+                delta = d[:, i] - n[:, i]
+                up = (delta >= 1.0) & (n[:, i + 1] - n[:, i] > 1.0)
+                down = (delta <= -1.0) & (n[:, i - 1] - n[:, i] < -1.0)
+                move = up | down
+                if not np.any(move):
+                    continue
+
+                s = np.where(up, 1.0, -1.0)
+                parabolic = q[:, i] + s / (n[:, i + 1] - n[:, i - 1]) * (
+                    (n[:, i] - n[:, i - 1] + s)
+                    * (q[:, i + 1] - q[:, i])
+                    / (n[:, i + 1] - n[:, i])
+                    + (n[:, i + 1] - n[:, i] - s)
+                    * (q[:, i] - q[:, i - 1])
+                    / (n[:, i] - n[:, i - 1])
+                )
+                q_next = np.where(up, q[:, i + 1], q[:, i - 1])
+                n_next = np.where(up, n[:, i + 1], n[:, i - 1])
+                linear = q[:, i] + s * (q_next - q[:, i]) / (n_next - n[:, i])
+                inside = (q[:, i - 1] < parabolic) & (parabolic < q[:, i + 1])
+
+                q[:, i] = np.where(move, np.where(inside, parabolic, linear), q[:, i])
+                n[:, i] += np.where(move, s, 0.0)
+
+        self._heights[steps] = q
+        self._positions[steps] = n
+        self._desired[steps] = d
+
+
+class StepStatistics:
+    """Per-step count, mean, variance, min and max updated by Welford's method."""
+
+    def __init__(self, quantiles: Sequence[float] = ()) -> None:
+        self._size = 0
+        self._count = np.zeros(0, dtype=np.int64)
+        self._mean = np.zeros(0)
+        self._m2 = np.zeros(0)
+        self._min = np.zeros(0)
+        self._max = np.zeros(0)
+        self._quantiles = [P2Quantile(p) for p in quantiles]
+
+    def update(self, steps: npt.NDArray[Any], values: npt.NDArray[Any]) -> None:
+        if len(steps) == 0:
+            return
+
+        self.reserve(int(steps.max()) + 1)
+        previous_counts = self._count[steps]
+        for quantile in self._quantiles:
+            quantile.update(steps, values, previous_counts)
+
+        counts = previous_counts + 1
+        delta = values - self._mean[steps]
+        mean = self._mean[steps] + delta / counts
+        self._m2[steps] += delta * (values - mean)
+        self._mean[steps] = mean
+        self._min[steps] = np.minimum(self._min[steps], values)
+        self._max[steps] = np.maximum(self._max[steps], values)
+        self._count[steps] = counts
+
+    def merge(self, other: "StepStatistics") -> None:
+        """Merge the statistics of other observations of the same steps."""
+        size = other._size
+        self.reserve(size)
+        count = self._count[:size].copy()
+        other_count = other._count[:size]
+        for quantile, other_quantile in zip(self._quantiles, other._quantiles):
+            quantile.merge(other_quantile, count, other_count)
+
+        # Chan's method for the mean and the sum of squared deviations.
+        total = count + other_count
+        delta = other._mean[:size] - self._mean[:size]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            weight = np.where(total > 0, other_count / total, 0.0)
+        self._m2[:size] += other._m2[:size] + delta**2 * count * weight
+        self._mean[:size] += delta * weight
+        self._min[:size] = np.minimum(self._min[:size], other._min[:size])
+        self._max[:size] = np.maximum(self._max[:size], other._max[:size])
+        self._count[:size] = total
+
+    def summary(self) -> Dict[str, npt.NDArray[Any]]:
+        size = self._size
+        count = self._count[:size].copy()
+        with np.errstate(divide="ignore", invalid="ignore"):
+            var = np.where(count > 1, self._m2[:size] / (count - 1), np.nan)
+        empty = count == 0
+
+        summary = {
+            "count": count,
+            "mean": np.where(empty, np.nan, self._mean[:size]),
+            "var": var,
+            "std": np.sqrt(var),
+            "min": np.where(empty, np.nan, self._min[:size]),
+            "max": np.where(empty, np.nan, self._max[:size]),
+        }
+        for quantile in self._quantiles:
+            summary[f"q{quantile.p:g}"] = quantile.estimate(count)
+
+        return summary
+
+    def reserve(self, size: int) -> None:
+        if size <= self._size:
+            return
+
+        if size > len(self._count):
+            capacity = max(size, 2 * len(self._count))
+            self._count = _grow(self._count, capacity, 0)
+            self._mean = _grow(self._mean, capacity, 0.0)
+            self._m2 = _grow(self._m2, capacity, 0.0)
+            self._min = _grow(self._min, capacity, np.inf)
+            self._max = _grow(self._max, capacity, -np.inf)
+            for quantile in self._quantiles:
+                quantile.reserve(capacity)
+        self._size = size
+
+
+def _grow(array: npt.NDArray[Any], capacity: int, fill: Any) -> npt.NDArray[Any]:
+    grown = np.full(capacity, fill, dtype=array.dtype)
+    grown[: len(array)] = array
+    return grown
+
+
+class MetricAggregator:
+    """Callback which aggregates each metric per step across iterations.
+
+    Actions are buffered for the current iteration and folded into the
+    statistics when the next iteration starts, so the memory is O(steps)
+    regardless of the number of iterations.
+    """
+
+    def __init__(self, quantiles: Sequence[float] = ()) -> None:
+        self.quantiles = list(quantiles)
+        self.n_ite = 0
+        self._statistics: Dict[str, StepStatistics] = {}
+        self._current_ite: Optional[int] = None
+        self._buffers: Dict[str, Tuple[List[int], List[float]]] = {}
+
+    def __call__(self, current_ite: int, step: int, action: act.ActionType) -> None:
+        if current_ite != self._current_ite:
+            self._flush()
+            self._current_ite = current_ite
+            self.n_ite += 1
+
+        for key, value in action["metric"].items():
+            buffer = self._buffers.get(key)
+            if buffer is None:
+                buffer = self._buffers[key] = ([], [])
+            buffer[0].append(step)
+            buffer[1].append(value)
+
+    def update(self, result: sim.IterationResultType) -> None:
+        self._flush()
+        self._current_ite = None
+        self.n_ite += 1
+
+        iteration = res.as_iteration_result(result)
+        # Iterations reduced by a retention policy keep the step of each action.
+        all_steps = (
+            iteration.column("result", ret.STEP_KEY).astype(np.int64)
+            if ret.STEP_KEY in iteration.keys("result")
+            else np.arange(len(iteration))
+        )
+        n_steps = int(all_steps.max()) + 1 if len(all_steps) > 0 else 0
+        for key in iteration.keys("metric"):
+            values = iteration.column("metric", key).astype(np.float64)
+            steps = all_steps
+            missing = iteration.missing("metric", key)
+            if missing is not None:
+                steps = steps[~missing]
+                values = values[~missing]
+
+            statistics = self._statistics_of(key)
+            statistics.reserve(n_steps)
+            statistics.update(steps, values)
+
+    def merge(self, other: "MetricAggregator") -> None:
+        """Merge an aggregator of other iterations such as another shard.
+
+        Count, mean, variance, min and max are the same as aggregating all
+        iterations at once, while quantiles are approximated.
+        """
+        self._flush()
+        self._current_ite = None
+        other._flush()
+        self.n_ite += other.n_ite
+        for key, statistics in other._statistics.items():
+            self._statistics_of(key).merge(statistics)
+
+    def summary(self) -> SummaryType:
+        self._flush()
+        return {
+            key: statistics.summary() for key, statistics in self._statistics.items()
+        }
+
+    def _flush(self) -> None:
+        for key, (steps, values) in self._buffers.items():
+            self._statistics_of(key).update(
+                np.array(steps, dtype=np.int64), np.array(values, dtype=np.float64)
+            )
+        self._buffers = {}
+
+    def _statistics_of(self, key: str) -> StepStatistics:
+        statistics = self._statistics.get(key)
+        if statistics is None:
+            statistics = self._statistics[key] = StepStatistics(self.quantiles)
+        return statistics
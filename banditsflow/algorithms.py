@@ -0,0 +1,399 @@
+import math
+from typing import Any, List, Protocol, Sequence, Type, cast
+
+import numpy as np
+import numpy.typing as npt
+
+from . import actor as act
+from . import scenario
+
+# The implementations draw random numbers in the same order and by the same
+# arithmetic as the straightforward list based ones, so the results do not
+# change when an actor switches to them. The vector variants instead draw the
+# random numbers of each iteration by a generator of its own seed in blocks, so
+# their results follow the same distribution as the scalar ones but are not the
+# same, and do not depend on the other iterations run in lockstep.
+
+
+class AlgorithmType(Protocol):
+    def __init__(
+        self, synopsis: scenario.SynopsisType, params: act.ParamsType, seed: int
+    ) -> None:
+        ...
+
+    def select(self) -> int:
+        ...
+
+    def update(self, idx_arm: int, reward: float) -> None:
+        ...
+
+
+class VectorAlgorithmType(Protocol):
+    def __init__(
+        self,
+        synopsis: scenario.SynopsisType,
+        params: act.ParamsType,
+        seeds: Sequence[int],
+    ) -> None:
+        ...
+
+    def select(self, indices: npt.NDArray[Any]) -> npt.NDArray[Any]:
+        ...
+
+    def update(
+        self,
+        indices: npt.NDArray[Any],
+        idx_arms: npt.NDArray[Any],
+        rewards: npt.NDArray[Any],
+    ) -> None:
+        ...
+
+
+class Arms:
+    """Bernoulli arms whose success probabilities are given by each line."""
+
+    def __init__(self, num_arms: int, seed: int) -> None:
+        self.random = np.random.RandomState(seed)
+        self.thetas: Sequence[float] = [0.0 for _ in range(num_arms)]
+
+    def play(self, idx_arm: int) -> float:
+        # Same threshold as RandomState.choice([0.0, 1.0], p=[1 - theta, theta])
+        # without building the probabilities on every pull.
+        theta = self.thetas[idx_arm]
+        threshold = (1.0 - theta) / ((1.0 - theta) + theta)
+        return 1.0 if self.random.random_sample() >= threshold else 0.0
+
+
+class Environment:
+    """Actor which plays the arms selected by a bandit algorithm."""
+
+    def __init__(
+        self,
+        synopsis: scenario.SynopsisType,
+        params: act.ParamsType,
+        algorithm_class: Type[AlgorithmType],
+        seed: int,
+    ) -> None:
+        self.num_arms = synopsis["num_arms"]
+        self.arms = Arms(synopsis["num_arms"], seed)
+        self.algorithm = algorithm_class(synopsis, params, seed)
+        self.cumulative_reward: float = 0.0
+
+    def act_batch(self, lines: scenario.LinesType) -> act.ActionBlockType:
+        n = len(lines["thetas"])
+        cumulative_rewards = np.empty(n)
+        idx_arms = np.empty(n, dtype=np.int64)
+        rewards = np.empty(n)
+        for i in range(n):
+            self.arms.thetas = lines["thetas"][i]
+            idx_arms[i] = idx_arm = self.algorithm.select()
+            rewards[i] = reward = self.arms.play(idx_arm)
+            self.cumulative_reward += reward
+            cumulative_rewards[i] = self.cumulative_reward
+            self.algorithm.update(idx_arm, reward)
+
+        return {
+            "metric": {"cumulative_reward": cumulative_rewards},
+            "result": {"idx_arm": idx_arms, "reward": rewards},
+        }
+
+    def act(self, line: scenario.LineType) -> act.ActionType:
+        self.arms.thetas = cast(List[float], line["thetas"])
+
+        idx_arm = self.algorithm.select()
+        reward = self.arms.play(idx_arm)
+        self.cumulative_reward += reward
+        self.algorithm.update(idx_arm, reward)
+
+        action: act.ActionType = {
+            "metric": {"cumulative_reward": self.cumulative_reward},
+            "result": {"idx_arm": idx_arm, "reward": reward},
+        }
+
+        return action
+
+
+class Counts:
+    """Pull counts and reward sums of each arm with their ratios."""
+
+    def __init__(self, num_arms: int, seed: int) -> None:
+        self.random = np.random.RandomState(seed)
+        self.num_arms = num_arms
+        self.counts = np.zeros(num_arms)
+        self.rewards = np.zeros(num_arms)
+        self.theta_hats = np.zeros(num_arms)
+
+    def update(self, idx_arm: int, reward: float) -> None:
+        self.counts[idx_arm] += 1
+        self.rewards[idx_arm] += reward
+        self.theta_hats[idx_arm] = self.rewards[idx_arm] / self.counts[idx_arm]
+
+
+class EpsilonGreedy(Counts):
+    def __init__(
+        self, synopsis: scenario.SynopsisType, params: act.ParamsType, seed: int
+    ) -> None:
+        super().__init__(synopsis["num_arms"], seed)
+        self.epsilon = cast(float, params["epsilon"])
+
+    def select(self) -> int:
+        if self.random.random_sample() > self.epsilon:
+            return int(np.argmax(self.theta_hats))
+        else:
+            return int(self.random.randint(self.num_arms))
+
+
+class UCB1(Counts):
+    def __init__(
+        self, synopsis: scenario.SynopsisType, params: act.ParamsType, seed: int
+    ) -> None:
+        super().__init__(synopsis["num_arms"], seed)
+        self.n = 0.0
+        self.n_unplayed = self.num_arms
+
+    def select(self) -> int:
+        if self.n_unplayed > 0:
+            return int(np.argmax(self.counts == 0.0))
+
+        bonuses = np.sqrt((2.0 * math.log(self.n)) / self.counts)
+        return int(np.argmax(self.theta_hats + bonuses))
+
+    def update(self, idx_arm: int, reward: float) -> None:
+        if self.counts[idx_arm] == 0.0:
+            self.n_unplayed -= 1
+        self.n += 1
+        super().update(idx_arm, reward)
+
+
+class ThompsonSampling(Counts):
+    def __init__(
+        self, synopsis: scenario.SynopsisType, params: act.ParamsType, seed: int
+    ) -> None:
+        super().__init__(synopsis["num_arms"], seed)
+
+    def select(self) -> int:
+        samples = self.random.beta(1.0 + self.rewards, 1.0 + self.counts - self.rewards)
+        return int(np.argmax(samples))
+
+
+class RowRandom:
+    """Generators of every iteration, each seeded by the seed of its row.
+
+    Uniform and normal numbers are drawn ahead in a block per row, and a step
+    takes the numbers of all rows at once from their blocks, so the numbers
+    of a row depend only on its seed. Rows of different `stream` draw
+    independent numbers.
+    """
+
+    def __init__(
+        self, seeds: Sequence[int], stream: int, block_size: int = 1024
+    ) -> None:
+        self.generators = [
+            np.random.default_rng(
+                np.random.SeedSequence(int(seed), spawn_key=(stream,))
+            )
+            for seed in seeds
+        ]
+        self.block_size = block_size
+        self.blocks = {
+            kind: np.empty((len(seeds), block_size))
+            for kind in ("random", "standard_normal")
+        }
+        self.positions = {kind: np.full(len(seeds), block_size) for kind in self.blocks}
+
+    def random(self, rows: npt.NDArray[Any]) -> npt.NDArray[Any]:
+        """Return a uniform number in [0, 1) for each of the distinct `rows`."""
+        return self._take("random", rows, 1)[:, 0]
+
+    def beta(
+        self, rows: npt.NDArray[Any], a: npt.NDArray[Any], b: npt.NDArray[Any]
+    ) -> npt.NDArray[Any]:
+        """Return beta samples of `a` and `b`, each at least one, in `rows`."""
+        x = self._standard_gamma(rows, a)
+        y = self._standard_gamma(rows, b)
+        return cast(npt.NDArray[Any], x / (x + y))
+
+    def _take(self, kind: str, rows: npt.NDArray[Any], n: int) -> npt.NDArray[Any]:
+        blocks = self.blocks[kind]
+        positions = self.positions[kind]
+        for i in rows[positions[rows] + n > self.block_size]:
+            blocks[i] = getattr(self.generators[i], kind)(self.block_size)
+            positions[i] = 0
+
+        starts = rows * self.block_size + positions[rows]
+        positions[rows] += n
+        return cast(
+            npt.NDArray[Any], blocks.reshape(-1)[starts[:, None] + np.arange(n)]
+        )
+
+    def _standard_gamma(
+        self, rows: npt.NDArray[Any], shapes: npt.NDArray[Any]
+    ) -> npt.NDArray[Any]:
+        # Marsaglia and Tsang's method, which needs shapes of at least one.
+        # Rows with rejected samples draw a whole row of numbers again.
+        n = np.shape(shapes)[1]
+        d = shapes - 1.0 / 3.0
+        c = 1.0 / np.sqrt(9.0 * d)
+        samples = np.empty(np.shape(shapes))
+        pending = np.ones(np.shape(shapes), dtype=bool)
+        active = np.arange(len(rows))
+        while len(active) > 0:
+            mask = pending[active]
+            x = self._take("standard_normal", rows[active], n)[mask]
+            u = self._take("random", rows[active], n)[mask]
+            dp = d[active][mask]
+            t = 1.0 + c[active][mask] * x
+            v = t * t * t
+            x2 = x * x
+            with np.errstate(divide="ignore", invalid="ignore"):
+                accepted = (v > 0.0) & (
+                    (u < 1.0 - 0.0331 * x2 * x2)
+                    | (np.log(u) < 0.5 * x2 + dp - dp * v + dp * np.log(v))
+                )
+            entries = tuple(index[accepted] for index in np.nonzero(mask))
+            targets = (active[entries[0]], entries[1])
+            samples[targets] = (dp * v)[accepted]
+            pending[targets] = False
+            active = active[np.any(pending[active], axis=1)]
+        return samples
+
+
+class VectorArms:
+    """Arms of every iteration which draw their rewards at once."""
+
+    def __init__(self, num_arms: int, seeds: Sequence[int]) -> None:
+        self.random = RowRandom(seeds, 0)
+        self.thetas = np.zeros((len(seeds), num_arms))
+
+    def play(
+        self, indices: npt.NDArray[Any], idx_arms: npt.NDArray[Any]
+    ) -> npt.NDArray[Any]:
+        thetas = self.thetas[indices, idx_arms]
+        thresholds = (1.0 - thetas) / ((1.0 - thetas) + thetas)
+        samples = self.random.random(indices)
+        return np.where(samples >= thresholds, 1.0, 0.0)
+
+
+class VectorEnvironment:
+    """Vector actor which plays the arms of every iteration in lockstep."""
+
+    def __init__(
+        self,
+        synopsis: scenario.SynopsisType,
+        params: act.ParamsType,
+        algorithm_class: Type[VectorAlgorithmType],
+        seeds: Sequence[int],
+    ) -> None:
+        self.arms = VectorArms(synopsis["num_arms"], seeds)
+        self.algorithm = algorithm_class(synopsis, params, seeds)
+        self.cumulative_rewards = np.zeros(len(seeds))
+
+    def act_vector(
+        self, lines: Sequence[scenario.LineType], indices: npt.NDArray[Any]
+    ) -> act.ActionBlockType:
+        self.arms.thetas[indices] = [line["thetas"] for line in lines]
+
+        idx_arms = self.algorithm.select(indices)
+        rewards = self.arms.play(indices, idx_arms)
+        self.cumulative_rewards[indices] += rewards
+        self.algorithm.update(indices, idx_arms, rewards)
+
+        return {
+            "metric": {"cumulative_reward": self.cumulative_rewards[indices]},
+            "result": {"idx_arm": idx_arms, "reward": rewards},
+        }
+
+
+class VectorCounts:
+    """Counts of every iteration stored as rows."""
+
+    def __init__(self, num_arms: int, seeds: Sequence[int]) -> None:
+        self.random = RowRandom(seeds, 1, block_size=max(1024, num_arms))
+        self.num_arms = num_arms
+        self.counts = np.zeros((len(seeds), num_arms))
+        self.rewards = np.zeros((len(seeds), num_arms))
+        self.theta_hats = np.zeros((len(seeds), num_arms))
+
+    def update(
+        self,
+        indices: npt.NDArray[Any],
+        idx_arms: npt.NDArray[Any],
+        rewards: npt.NDArray[Any],
+    ) -> None:
+        self.counts[indices, idx_arms] += 1
+        self.rewards[indices, idx_arms] += rewards
+        self.theta_hats[indices, idx_arms] = (
+            self.rewards[indices, idx_arms] / self.counts[indices, idx_arms]
+        )
+
+
+class VectorEpsilonGreedy(VectorCounts):
+    def __init__(
+        self,
+        synopsis: scenario.SynopsisType,
+        params: act.ParamsType,
+        seeds: Sequence[int],
+    ) -> None:
+        super().__init__(synopsis["num_arms"], seeds)
+        self.epsilon = cast(float, params["epsilon"])
+
+    def select(self, indices: npt.NDArray[Any]) -> npt.NDArray[Any]:
+        idx_arms = np.argmax(self.theta_hats[indices], axis=1)
+        explored = ~(self.random.random(indices) > self.epsilon)
+        samples = self.random.random(indices[explored])
+        idx_arms[explored] = np.minimum(
+            (samples * self.num_arms).astype(np.int64), self.num_arms - 1
+        )
+        return cast(npt.NDArray[Any], idx_arms)
+
+
+class VectorUCB1(VectorCounts):
+    def __init__(
+        self,
+        synopsis: scenario.SynopsisType,
+        params: act.ParamsType,
+        seeds: Sequence[int],
+    ) -> None:
+        super().__init__(synopsis["num_arms"], seeds)
+        self.n = np.zeros(len(seeds))
+
+    def select(self, indices: npt.NDArray[Any]) -> npt.NDArray[Any]:
+        counts = self.counts[indices]
+        unplayed = counts == 0.0
+        idx_arms = np.argmax(unplayed, axis=1)
+
+        played = ~np.any(unplayed, axis=1)
+        if np.any(played):
+            counts = counts[played]
+            logs = np.log(self.n[indices][played])
+            bonuses = np.sqrt((2.0 * logs[:, None]) / counts)
+            idx_arms[played] = np.argmax(
+                self.theta_hats[indices][played] + bonuses, axis=1
+            )
+        return cast(npt.NDArray[Any], idx_arms)
+
+    def update(
+        self,
+        indices: npt.NDArray[Any],
+        idx_arms: npt.NDArray[Any],
+        rewards: npt.NDArray[Any],
+    ) -> None:
+        self.n[indices] += 1
+        super().update(indices, idx_arms, rewards)
+
+
+class VectorThompsonSampling(VectorCounts):
+    def __init__(
+        self,
+        synopsis: scenario.SynopsisType,
+        params: act.ParamsType,
+        seeds: Sequence[int],
+    ) -> None:
+        super().__init__(synopsis["num_arms"], seeds)
+
+    def select(self, indices: npt.NDArray[Any]) -> npt.NDArray[Any]:
+        rewards = self.rewards[indices]
+        samples = self.random.beta(
+            indices, 1.0 + rewards, 1.0 + self.counts[indices] - rewards
+        )
+        return cast(npt.NDArray[Any], np.argmax(samples, axis=1))
@@ -0,0 +1,66 @@
+import hashlib
+import json
+import os
+from typing import Any, Dict, Optional
+
+from . import actor as act
+from . import checkpoint as ckpt
+from . import result as res
+from . import simulator as sim
+
+CACHE_DIR = os.path.join(".banditsflow", "cache")
+
+
+class ResultCache:
+    """Content-addressed cache of the result of each iteration.
+
+    Each result is stored in its own pickle file named by the hash of
+    everything which determines it, so changing any of them such as the
+    parameters or the revision of user code misses exactly the affected
+    iterations.
+    """
+
+    def __init__(self, directory: str = CACHE_DIR, revision: str = "") -> None:
+        self.directory = directory
+        self.revision = revision
+
+    def key(
+        self,
+        scenario_name: str,
+        actor_name: str,
+        params: act.ParamsType,
+        step: str,
+        seed: int,
+        float_dtype: str,
+        retention: str = "full",
+        vectorize: bool = False,
+    ) -> str:
+        content: Dict[str, Any] = {
+            "scenario": scenario_name,
+            "actor": actor_name,
+            "params": params,
+            "step": step,
+            "seed": seed,
+            "float_dtype": float_dtype,
+            "revision": self.revision,
+        }
+        # Keep the keys of full results as they were before retention.
+        if retention != "full":
+            content["retention"] = retention
+        # Vector actors draw other random numbers than the serial ones.
+        if vectorize:
+            content["vectorize"] = True
+        encoded = json.dumps(content, sort_keys=True).encode("utf-8")
+        return hashlib.sha256(encoded).hexdigest()
+
+    def get(self, key: str) -> Optional[sim.IterationResultType]:
+        result: Optional[sim.IterationResultType] = ckpt.read_pickle(self._path(key))
+        return result
+
+    def put(self, key: str, result: sim.IterationResultType) -> None:
+        # Slicing copies spilled columns into memory, so the entry does not
+        # depend on the spill directory.
+        ckpt.write_pickle(self._path(key), res.as_iteration_result(result)[:])
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key[:2], f"{key}.pkl")
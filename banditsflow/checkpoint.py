@@ -0,0 +1,133 @@
+import os
+import pickle
+import shutil
+import tempfile
+from typing import Any, Dict, Iterable, Optional, Sequence, TypedDict
+
+from . import actor as act
+from . import result as res
+from . import scenario as scen
+
+CHECKPOINT_DIR = os.path.join(".banditsflow", "checkpoints")
+
+
+class ProgressType(TypedDict):
+    scenario: Any
+    actor: Any
+    writer: Any
+
+
+class Checkpoint:
+    """Directory keeping the progress of an evaluation to resume it.
+
+    Each completed iteration is saved to its own file. If `steps` is
+    positive, the simulator also saves the state of an unfinished iteration
+    every `steps` steps when its scenario and actor implement `snapshot` and
+    `restore` (see `Snapshot`). The directory must be used by one
+    evaluation only, and it is removed by `clear` once the evaluation ends.
+    """
+
+    def __init__(self, directory: str, steps: int = 0) -> None:
+        self.directory = directory
+        self.steps = steps
+
+    def load(self, iterations: Iterable[int]) -> Dict[int, Sequence[act.ActionType]]:
+        results = {}
+        for ite in iterations:
+            result = read_pickle(self._path(ite))
+            if result is not None:
+                results[ite] = result
+        return results
+
+    def save(self, current_ite: int, result: Sequence[act.ActionType]) -> None:
+        # Slicing copies spilled columns into memory as the result cache does.
+        write_pickle(self._path(current_ite), res.as_iteration_result(result)[:])
+        try:
+            os.remove(self._progress_path(current_ite))
+        except FileNotFoundError:
+            pass
+
+    def load_progress(self, current_ite: int) -> Optional[ProgressType]:
+        progress: Optional[ProgressType] = read_pickle(self._progress_path(current_ite))
+        return progress
+
+    def save_progress(self, current_ite: int, progress: ProgressType) -> None:
+        write_pickle(self._progress_path(current_ite), progress)
+
+    def clear(self) -> None:
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def _path(self, current_ite: int) -> str:
+        return os.path.join(self.directory, f"{current_ite:06d}.pkl")
+
+    def _progress_path(self, current_ite: int) -> str:
+        return os.path.join(self.directory, "progress", f"{current_ite:06d}.pkl")
+
+
+class Snapshot:
+    """Saver of the progress of one iteration every `steps` steps.
+
+    The scenario and the actor hand out their state by `snapshot` and take
+    it back by `restore`, and the result writer is pickled as it is. So the
+    states must be picklable, and must not share objects which the
+    simulation modifies later.
+    """
+
+    def __init__(
+        self,
+        checkpoint: Checkpoint,
+        current_ite: int,
+        scenario: scen.SnapshotScenario,
+        actor: act.SnapshotActor,
+        writer: res.ResultWriter,
+    ) -> None:
+        self.checkpoint = checkpoint
+        self.current_ite = current_ite
+        self.scenario = scenario
+        self.actor = actor
+        self.writer = writer
+        self.next_step = len(writer) + checkpoint.steps
+
+    def __call__(self) -> None:
+        if len(self.writer) < self.next_step:
+            return
+
+        self.checkpoint.save_progress(
+            self.current_ite,
+            {
+                "scenario": self.scenario.snapshot(),
+                "actor": self.actor.snapshot(),
+                "writer": self.writer,
+            },
+        )
+        self.next_step = len(self.writer) + self.checkpoint.steps
+
+
+def can_snapshot(scenario: Any, actor: Any) -> bool:
+    return all(
+        hasattr(target, name)
+        for target in (scenario, actor)
+        for name in ("snapshot", "restore")
+    )
+
+
+def read_pickle(path: str) -> Any:
+    """Return the object pickled at `path`, or None if it is missing or broken."""
+    try:
+        with open(path, "rb") as f:
+            return pickle.load(f)
+    except (FileNotFoundError, EOFError, pickle.UnpicklingError):
+        return None
+
+
+def write_pickle(path: str, obj: Any) -> None:
+    """Pickle `obj` to `path` atomically, so a crash never leaves half a file."""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            pickle.dump(obj, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.remove(tmp_path)
+        raise
@@ -1,15 +1,108 @@
-from typing import Any, Dict, Optional, cast
+import json
+import os
+import tempfile
+from typing import Any, Dict, List, Optional, Tuple, cast
 
-from metaflow import Flow, Step
+from metaflow import Flow, Step, get_metadata
 from metaflow.client.core import Task
+from metaflow.exception import MetaflowException
 
+from . import result as res
 from . import simulator as sim
 
+INDEX_PATH = os.path.join(".banditsflow", "index.json")
+STUDY_STORAGE = f"sqlite:///{os.path.join('.banditsflow', 'studies.db')}"
+
+
+class RunIndex:
+    """Local index of the latest evaluate tasks of each experiment and scenario.
+
+    The index is a JSON file of pathspecs which is rewritten atomically.
+    Pathspecs are only valid for the datastore of the runs, so the entries
+    are kept under its Metaflow metadata root (`root`, the current one by
+    default). Each entry also remembers the latest indexed run, so that
+    `get` can stick to that run as scanning the runs does. Concurrent runs
+    may overwrite each other's entries, in which case the lookup falls back
+    to scanning the runs.
+    """
+
+    def __init__(self, path: str = INDEX_PATH, root: Optional[str] = None) -> None:
+        self.path = path
+        self.root = root
+
+    def get(
+        self,
+        experiment_name: str,
+        scenario_name: str,
+        actor_name: str,
+        latest_run_only: bool = True,
+    ) -> Optional[str]:
+        entry = self._read().get(self._root(), {}).get(experiment_name, {})
+        entry = entry.get(scenario_name, {})
+        pathspec = entry.get("actors", {}).get(actor_name)
+        if pathspec is None:
+            return None
+        if latest_run_only and _run_of(pathspec) != entry.get("run"):
+            return None
+
+        return cast(str, pathspec)
+
+    def update(
+        self, experiment_name: str, scenario_name: str, pathspecs: Dict[str, str]
+    ) -> None:
+        entries = self._read()
+        entry = (
+            entries.setdefault(self._root(), {})
+            .setdefault(experiment_name, {})
+            .setdefault(scenario_name, {})
+        )
+        entry.setdefault("actors", {}).update(pathspecs)
+        runs = {_run_of(pathspec) for pathspec in pathspecs.values()}
+        if len(runs) == 1:
+            (entry["run"],) = runs
+
+        directory = os.path.dirname(self.path) or "."
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w") as f:
+                json.dump(entries, f, indent=2)
+            os.replace(tmp_path, self.path)
+        except BaseException:
+            os.remove(tmp_path)
+            raise
+
+    def _root(self) -> str:
+        return self.root if self.root is not None else str(get_metadata())
+
+    def _read(self) -> Dict[str, Any]:
+        try:
+            with open(self.path, "r") as f:
+                return cast(Dict[str, Any], json.load(f))
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {}
+
 
 class BanditsFlowData:
-    def __init__(self, experiment_name: str) -> None:
+    """Artifacts of the latest evaluation of each actor in an experiment.
+
+    By default only the latest successful run of the experiment and scenario
+    is used, so an actor which that run did not evaluate has no artifacts.
+    With `latest_run_only=False`, such an actor falls back to the latest
+    run which evaluated it.
+    """
+
+    def __init__(
+        self,
+        experiment_name: str,
+        index: Optional[RunIndex] = None,
+        latest_run_only: bool = True,
+    ) -> None:
         self.flow_name = "BanditsFlow"
         self.experiment_name = experiment_name
+        self.index = index if index is not None else RunIndex()
+        self.latest_run_only = latest_run_only
+        self._tasks: Dict[Tuple[str, str, str], Optional[Task]] = {}
 
     def latest_best_params(
         self, scenario_name: str, actor_name: str
@@ -18,35 +111,94 @@ class BanditsFlowData:
         if task is None:
             return None
 
+        if _is_group_task(task):
+            return cast(Dict[str, Any], task.data.best_params[actor_name])
         return cast(Dict[str, Any], task.data.best_params)
 
     def latest_result(
-        self, scenario_name: str, actor_name: str
+        self, scenario_name: str, actor_name: str, retention: str = "full"
     ) -> Optional[sim.SimulationResultType]:
         task = self._latest_actor_task("evaluate", scenario_name, actor_name)
         if task is None:
             return None
+        # A result kept by another retention policy has other actions, and
+        # older runs kept every action.
+        if (task.data.retention if "retention" in task else "full") != retention:
+            return None
 
-        return cast(sim.SimulationResultType, task.data.result)
+        try:
+            result = cast(
+                sim.SimulationResultType,
+                (
+                    task.data.results[actor_name]
+                    if _is_group_task(task)
+                    else task.data.result
+                ),
+            )
+        except FileNotFoundError:
+            # Spilled results cannot be reopened once their files are removed.
+            return None
+
+        return [res.as_iteration_result(ite) for ite in result]
 
     def _latest_actor_task(
         self, step_name: str, scenario_name: str, actor_name: str
     ) -> Optional[Task]:
-        successful_runs = [
+        key = (step_name, scenario_name, actor_name)
+        if key not in self._tasks:
+            task = self._indexed_actor_task(step_name, scenario_name, actor_name)
+            if task is None:
+                task = self._scan_actor_task(step_name, scenario_name, actor_name)
+            self._tasks[key] = task
+
+        return self._tasks[key]
+
+    def _indexed_actor_task(
+        self, step_name: str, scenario_name: str, actor_name: str
+    ) -> Optional[Task]:
+        pathspec = self.index.get(
+            self.experiment_name, scenario_name, actor_name, self.latest_run_only
+        )
+        if pathspec is None or pathspec.split("/")[2:3] != [step_name]:
+            return None
+
+        try:
+            return Task(pathspec)
+        except MetaflowException:
+            # The run may have been removed from the datastore.
+            return None
+
+    def _scan_actor_task(
+        self, step_name: str, scenario_name: str, actor_name: str
+    ) -> Optional[Task]:
+        successful_runs = (
             run
             for run in Flow(self.flow_name).runs(
                 f"experiment_name:{self.experiment_name}", f"scenario:{scenario_name}"
             )
             if run.successful
-        ]
-        if len(successful_runs) == 0:
-            return None
+        )
+        for run in successful_runs:
+            step = Step(f"{self.flow_name}/{run.id}/{step_name}")
+            actor_tasks: List[Task] = [
+                task
+                for task in step.tasks()
+                if actor_name
+                in (task.data.actors if _is_group_task(task) else [task.data.actor])
+            ]
+            if len(actor_tasks) > 0:
+                return actor_tasks[0]
+            if self.latest_run_only:
+                break
 
-        latest_successful_run = successful_runs[0]
-        step = Step(f"{self.flow_name}/{latest_successful_run.id}/{step_name}")
+        return None
+
+
+def _is_group_task(task: Task) -> bool:
+    # Evaluate tasks hold the artifacts of each actor of their group by actor,
+    # while those of older runs hold the artifacts of their only actor.
+    return "actors" in task
 
-        actor_tasks = [task for task in step.tasks() if task.data.actor == actor_name]
-        if len(actor_tasks) == 0:
-            return None
 
-        return actor_tasks[0]
+def _run_of(pathspec: str) -> str:
+    return "/".join(pathspec.split("/")[:2])
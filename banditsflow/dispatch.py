@@ -0,0 +1,169 @@
+import collections
+import threading
+import time
+from typing import Any, Deque, List, Optional, Sequence, Tuple
+
+from . import actor as act
+from . import profiler as prof
+
+POLICIES = ("block", "drop", "coalesce")
+
+CallType = Tuple[int, int, act.ActionType]
+
+
+class Dispatch:
+    """Settings for calling the callbacks of a simulation asynchronously.
+
+    Actions are queued for a background thread which calls the callbacks,
+    so a slow callback does not stall the simulation. When the queue holds
+    `max_queue_size` actions, the simulation reacts by `backpressure`:
+
+    - block: wait for a free slot, so every action is delivered.
+    - drop: discard the new action.
+    - coalesce: replace the newest queued action of the same iteration with
+      the new one, or wait if it belongs to another iteration.
+
+    Callbacks whose class defines `call_batch(calls)` receive up to
+    `batch_size` queued `(current_ite, step, action)` at once instead of one
+    call each.
+    """
+
+    def __init__(
+        self,
+        max_queue_size: int = 10000,
+        backpressure: str = "block",
+        batch_size: int = 256,
+    ) -> None:
+        if backpressure not in POLICIES:
+            raise ValueError(f"Unknown backpressure: {backpressure}")
+        if max_queue_size < 1 or batch_size < 1:
+            raise ValueError(
+                f"Queue and batch size must be positive: {max_queue_size}, {batch_size}"
+            )
+
+        self.max_queue_size = max_queue_size
+        self.backpressure = backpressure
+        self.batch_size = batch_size
+
+    def start(
+        self, callbacks: Sequence[Any], profiler: Optional[prof.Profiler] = None
+    ) -> "Dispatcher":
+        return Dispatcher(self, callbacks, profiler)
+
+
+class Dispatcher:
+    """Callback which hands actions to the wrapped callbacks from a thread.
+
+    One thread calls the callbacks, so each of them sees the actions in the
+    order of the simulation, and actions must not be modified after they
+    are given. `close` waits until every queued action is delivered. The
+    first error of the callbacks stops the delivery and is raised once, by
+    the next call or by `close`.
+    """
+
+    def __init__(
+        self,
+        dispatch: Dispatch,
+        callbacks: Sequence[Any],
+        profiler: Optional[prof.Profiler] = None,
+    ) -> None:
+        self.max_queue_size = dispatch.max_queue_size
+        self.backpressure = dispatch.backpressure
+        self.batch_size = dispatch.batch_size
+        self.callbacks = list(callbacks)
+        self.profiler = profiler
+        self.names = [
+            f"callback.{i}.{prof.callback_name(callback)}"
+            for i, callback in enumerate(self.callbacks)
+        ]
+        # Looked up on the type, so that only callbacks defining the method
+        # are batched.
+        self.batched = [
+            hasattr(type(callback), "call_batch") for callback in self.callbacks
+        ]
+        self.dropped = 0
+        self.coalesced = 0
+
+        self._queue: Deque[CallType] = collections.deque()
+        self._condition = threading.Condition()
+        self._closed = False
+        self._error: Optional[BaseException] = None
+        self._raised = False
+        self._thread = threading.Thread(target=self._consume, daemon=True)
+        self._thread.start()
+
+    def __call__(self, current_ite: int, step: int, action: act.ActionType) -> None:
+        with self._condition:
+            if self._failed():
+                return  # Nothing is delivered after an error.
+            if len(self._queue) >= self.max_queue_size:
+                if self.backpressure == "drop":
+                    self.dropped += 1
+                    return
+                if (
+                    self.backpressure == "coalesce"
+                    and self._queue[-1][0] == current_ite
+                ):
+                    self._queue[-1] = (current_ite, step, action)
+                    self.coalesced += 1
+                    return
+
+                while len(self._queue) >= self.max_queue_size and self._error is None:
+                    self._condition.wait()
+                if self._failed():
+                    return
+
+            self._queue.append((current_ite, step, action))
+            self._condition.notify_all()
+
+    def close(self) -> None:
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+        self._thread.join()
+
+        with self._condition:
+            self._raise_error()
+
+    def _failed(self) -> bool:
+        # The error is checked after waiting too, which mypy would take as
+        # unreachable once narrowed to None.
+        self._raise_error()
+        return self._error is not None
+
+    def _raise_error(self) -> None:
+        if self._error is not None and not self._raised:
+            self._raised = True
+            raise self._error
+
+    def _consume(self) -> None:
+        while True:
+            with self._condition:
+                while len(self._queue) == 0 and not self._closed:
+                    self._condition.wait()
+                if len(self._queue) == 0:
+                    return
+
+                n = min(len(self._queue), self.batch_size)
+                calls = [self._queue.popleft() for _ in range(n)]
+                self._condition.notify_all()
+
+            try:
+                self._deliver(calls)
+            except BaseException as e:
+                with self._condition:
+                    self._error = e
+                    self._queue.clear()
+                    self._condition.notify_all()
+                return
+
+    def _deliver(self, calls: List[CallType]) -> None:
+        for name, callback, batched in zip(self.names, self.callbacks, self.batched):
+            started = time.perf_counter()
+            if batched:
+                callback.call_batch(calls)
+            else:
+                for current_ite, step, action in calls:
+                    callback(current_ite, step, action)
+            if self.profiler is not None:
+                self.profiler.add(name, time.perf_counter() - started, len(calls))
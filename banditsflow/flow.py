@@ -0,0 +1,626 @@
+import contextlib
+import os
+import tempfile
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Tuple, cast
+
+from metaflow import FlowSpec, Parameter, current, step
+from metaflow.datastore.inputs import Inputs
+
+from . import actor as act
+from . import aggregator as aggregate
+from . import cache, data
+from . import profiler as prof
+from . import retention as ret
+from . import runner as run
+from . import simulator as sim
+
+if TYPE_CHECKING:
+    from . import tracking
+
+# MLflow and Optuna are imported only by the steps which use them, since
+# every step runs in its own process.
+
+
+class BanditsFlow(FlowSpec):  # type: ignore
+    param_experiment_name = Parameter(
+        "experiment_name",
+        type=str,
+        required=True,
+        help="Name of experiment like a Git tag name.",
+    )
+    param_experiment_revision = Parameter(
+        "experiment_revision",
+        type=str,
+        required=True,
+        help="Revision of experiment like a hash of Git commit",
+    )
+    param_scenario = Parameter(
+        "scenario", type=str, required=True, help="Name of scenario"
+    )
+    param_actor = Parameter(
+        "actor", type=str, required=True, multiple=True, help="Name of actor"
+    )
+    param_reporter = Parameter(
+        "reporter", type=str, required=True, help="Name of reporter"
+    )
+    param_n_ite = Parameter("n_ite", type=int, default=1, help="Number of simulation")
+    param_seed = Parameter("seed", type=int, default=1, help="Seed of seed")
+    param_n_jobs = Parameter(
+        "n_jobs",
+        type=int,
+        default=1,
+        help="Number of processes for evaluation (-1 means all cores)",
+    )
+    param_result_dtype = Parameter(
+        "result_dtype",
+        type=str,
+        default="float64",
+        help="Name of float dtype for storing results like float32",
+    )
+    param_spill_dir = Parameter(
+        "spill_dir",
+        type=str,
+        default="",
+        help="Name of directory for spilling evaluation results to files",
+    )
+    param_cache_dir = Parameter(
+        "cache_dir",
+        type=str,
+        default="",
+        help=f"Name of directory for caching the result of each iteration such as {cache.CACHE_DIR} (empty disables it)",
+    )
+    param_checkpoint_dir = Parameter(
+        "checkpoint_dir",
+        type=str,
+        default="",
+        help="Name of directory for checkpointing evaluation to resume it on retry (empty disables it)",
+    )
+    param_checkpoint_interval = Parameter(
+        "checkpoint_interval",
+        type=int,
+        default=10,
+        help="Number of iterations between checkpoints",
+    )
+    param_checkpoint_steps = Parameter(
+        "checkpoint_steps",
+        type=int,
+        default=0,
+        help="Number of steps between snapshots of an unfinished iteration (0 disables them)",
+    )
+    param_vectorize = Parameter(
+        "vectorize",
+        type=bool,
+        default=False,
+        help="Run iterations of evaluation in lockstep if the actor supports it",
+    )
+    param_retention = Parameter(
+        "retention",
+        type=str,
+        default="full",
+        help="Actions kept in the result (full, last, every_k, metrics_only or summary)",
+    )
+    param_retention_k = Parameter(
+        "retention_k",
+        type=int,
+        default=100,
+        help="Interval of steps kept by the every_k retention",
+    )
+    param_callback_queue_size = Parameter(
+        "callback_queue_size",
+        type=int,
+        default=0,
+        help="Number of actions queued for callbacks in a background thread (0 calls them synchronously)",
+    )
+    param_callback_backpressure = Parameter(
+        "callback_backpressure",
+        type=str,
+        default="block",
+        help="What to do when the callback queue is full: block, drop or coalesce",
+    )
+    param_n_shards = Parameter(
+        "n_shards",
+        type=int,
+        default=1,
+        help="Number of foreach tasks which evaluate disjoint iterations of each actor",
+    )
+    param_shared_scenario = Parameter(
+        "shared_scenario",
+        type=bool,
+        default=False,
+        help="Evaluate all actors side by side on one scenario stream",
+    )
+    param_profile = Parameter(
+        "profile",
+        type=bool,
+        default=False,
+        help="Log the time spent in each phase of optimization and evaluation",
+    )
+    param_n_trials = Parameter(
+        "n_trials", type=int, default=1, help="Number of optimization"
+    )
+    param_timeout = Parameter(
+        "timeout",
+        type=float,
+        default=-1.0,
+        help="Number of timeout seconds for optimization",
+    )
+    param_optimization_direction = Parameter(
+        "optimization_direction",
+        type=str,
+        default="maximize",
+        help="Name of direction for optimization",
+    )
+    param_optimization_metric = Parameter(
+        "optimization_metric",
+        type=str,
+        required=True,
+        help="Name of simulation metric for optimization",
+    )
+    param_optimization_n_jobs = Parameter(
+        "optimization_n_jobs",
+        type=int,
+        default=1,
+        help="Number of processes for optimization (-1 means all cores)",
+    )
+    param_optimization_pruner = Parameter(
+        "optimization_pruner",
+        type=str,
+        default="nop",
+        help="Name of pruner for optimization: nop, median, percentile (25th), successive_halving or hyperband",
+    )
+    param_optimization_report_interval = Parameter(
+        "optimization_report_interval",
+        type=int,
+        default=100,
+        help="Number of steps between reports of the metric to the pruner (unused with the nop pruner)",
+    )
+    param_optimization_replay_scenario = Parameter(
+        "optimization_replay_scenario",
+        type=bool,
+        default=False,
+        help="Record the scenario in the first trial and replay it in later trials",
+    )
+    param_optimization_racing_seeds = Parameter(
+        "optimization_racing_seeds",
+        type=int,
+        default=1,
+        help="Maximum number of seeds evaluated per trial by racing (1 disables it)",
+    )
+    param_optimization_racing_confidence = Parameter(
+        "optimization_racing_confidence",
+        type=float,
+        default=0.95,
+        help="Confidence for eliminating a trial worse than the best one in racing",
+    )
+    param_study_storage = Parameter(
+        "study_storage",
+        type=str,
+        default=data.STUDY_STORAGE,
+        help="URL of storage for keeping optimization studies (empty disables it)",
+    )
+    param_revival_from_optimization_by = Parameter(
+        "revival_from_optimization_by",
+        type=str,
+        multiple=True,
+        help="Name of actor who acts optimization step again for current experiment",
+    )
+    param_revival_from_evaluation_by = Parameter(
+        "revival_from_evaluation_by",
+        type=str,
+        multiple=True,
+        help="Name of actor who acts evaluation step again for current experiment",
+    )
+    param_save_metrics = Parameter(
+        "save_metrics",
+        type=bool,
+        default=True,
+        help="Save metrics if only this option is true",
+    )
+    param_aggregate_metrics = Parameter(
+        "aggregate_metrics",
+        type=bool,
+        default=False,
+        help="Save metrics aggregated over iterations instead of each iteration",
+    )
+    param_metric_quantiles = Parameter(
+        "metric_quantiles",
+        type=float,
+        multiple=True,
+        help="Quantile of metrics aggregated over iterations",
+    )
+
+    @step
+    def start(self) -> None:
+        # The optimize tasks would race to create the tables of a new storage.
+        storage = self._study_storage()
+        if storage is not None:
+            from . import optimizer as optim
+
+            optim.create_storage(storage)
+
+        self.next(self.optimize, foreach="param_actor")
+
+    @step
+    def optimize(self) -> None:
+        from mlflow.tracking import MlflowClient
+
+        actor_name = self.input
+        self.actor = actor_name
+
+        flow_data = data.BanditsFlowData(self.param_experiment_name)
+        latest_best_params = flow_data.latest_best_params(
+            self.param_scenario, actor_name
+        )
+        revival = actor_name in self.param_revival_from_optimization_by
+
+        runner = run.Runner(
+            self.param_scenario, actor_name=actor_name, profile=self.param_profile
+        )
+        self.best_params = runner.optimize(
+            self.param_n_trials,
+            self.param_timeout,
+            self.param_optimization_direction,
+            self.param_optimization_metric,
+            self.param_seed,
+            revival=revival,
+            latest_best_params=latest_best_params,
+            n_jobs=self.param_optimization_n_jobs,
+            pruner=self.param_optimization_pruner,
+            report_interval=self.param_optimization_report_interval,
+            storage=self._study_storage(),
+            study_name=self._study_name(actor_name),
+            replay_scenario=self.param_optimization_replay_scenario,
+            racing_seeds=self.param_optimization_racing_seeds,
+            racing_confidence=self.param_optimization_racing_confidence,
+        )
+        self.during_revival = latest_best_params is None or revival
+        self.optimize_stats = runner.stats()
+
+        # The run is created before the evaluation, so that all of its shards
+        # log metrics of their iterations to it.
+        self.mlflow_run_id = self._create_evaluation_run(
+            MlflowClient(), actor_name, self.best_params
+        )
+
+        self.next(self.collect)
+
+    @step
+    def collect(self, inputs: Inputs) -> None:
+        self.actors = [input_.actor for input_ in inputs]
+        self.best_params = {input_.actor: input_.best_params for input_ in inputs}
+        self.revived_actors = [
+            input_.actor for input_ in inputs if input_.during_revival
+        ]
+        self.actor_optimize_stats = {
+            input_.actor: input_.optimize_stats for input_ in inputs
+        }
+        self.mlflow_run_ids = {input_.actor: input_.mlflow_run_id for input_ in inputs}
+
+        self.next(self.plan)
+
+    @step
+    def plan(self) -> None:
+        # Actors of a group are evaluated side by side on one scenario stream.
+        self.groups = (
+            [self.actors]
+            if self.param_shared_scenario
+            else [[actor_name] for actor_name in self.actors]
+        )
+
+        self.next(self.evaluate_group, foreach="groups")
+
+    @step
+    def evaluate_group(self) -> None:
+        self.actors = cast(List[str], self.input)
+
+        # Actors which are not revived reuse their latest result, so the
+        # shards simulate only the others.
+        flow_data = data.BanditsFlowData(self.param_experiment_name)
+        self.latest_results: Dict[str, sim.SimulationResultType] = {}
+        for actor_name in self.actors:
+            if (
+                actor_name in self.revived_actors
+                or actor_name in self.param_revival_from_evaluation_by
+            ):
+                continue
+            latest_result = flow_data.latest_result(
+                self.param_scenario, actor_name, retention=self._retention_name()
+            )
+            if latest_result is not None:
+                self.latest_results[actor_name] = latest_result
+
+        self.evaluated_actors = [
+            actor_name
+            for actor_name in self.actors
+            if actor_name not in self.latest_results
+        ]
+        self.shards = sim.shard_iterations(
+            self.param_n_ite,
+            self.param_n_shards if len(self.evaluated_actors) > 0 else 1,
+        )
+
+        self.next(self.evaluate_shard, foreach="shards")
+
+    @step
+    def evaluate_shard(self) -> None:
+        self.shard = cast(Tuple[int, int], self.input)
+        self.results: Dict[str, sim.SimulationResultType] = {}
+        self.metric_aggregators = {
+            actor_name: aggregate.MetricAggregator(self.param_metric_quantiles)
+            for actor_name in self.evaluated_actors
+        }
+        self.evaluate_profiler: Optional[prof.Profiler] = None
+        if len(self.evaluated_actors) > 0:
+            self._evaluate_actors()
+
+        self.next(self.evaluate)
+
+    @step
+    def evaluate(self, inputs: Inputs) -> None:
+        from mlflow.tracking import MlflowClient
+
+        from . import tracking
+
+        self.merge_artifacts(
+            inputs,
+            include=[
+                "actors",
+                "best_params",
+                "actor_optimize_stats",
+                "mlflow_run_ids",
+                "latest_results",
+            ],
+        )
+        self.evaluate_pathspec = current.pathspec
+        self.retention = self._retention_name()
+
+        # Shards hold contiguous iterations, so their results are joined in
+        # the order of iterations.
+        inputs_ = sorted(inputs, key=_shard_start)
+        shard_results = [input_.results for input_ in inputs_]
+        shard_aggregators = [input_.metric_aggregators for input_ in inputs_]
+        profiler = inputs_[0].evaluate_profiler
+        for input_ in inputs_[1:]:
+            if profiler is not None:
+                profiler.merge(input_.evaluate_profiler)
+        self.evaluate_stats = profiler.stats() if profiler is not None else {}
+
+        self.results = {}
+        self.metric_summaries = {}
+        client = MlflowClient()
+        for actor_name in self.actors:
+            aggregator = aggregate.MetricAggregator(self.param_metric_quantiles)
+            if actor_name in self.latest_results:
+                result = self.latest_results[actor_name]
+                for iteration_result in result:
+                    aggregator.update(iteration_result)
+            else:
+                result = [
+                    iteration_result
+                    for results in shard_results
+                    for iteration_result in results[actor_name]
+                ]
+                for aggregators in shard_aggregators:
+                    aggregator.merge(aggregators[actor_name])
+            self.results[actor_name] = result
+            self.metric_summaries[actor_name] = aggregator.summary()
+
+            run_id = self.mlflow_run_ids[actor_name]
+            try:
+                with tracking.BatchMetricLogger(run_id, client=client) as metric_logger:
+                    self._log_evaluation(
+                        metric_logger,
+                        self.metric_summaries[actor_name],
+                        self.actor_optimize_stats[actor_name],
+                        self.evaluate_stats,
+                    )
+            finally:
+                client.set_terminated(run_id)
+
+        self.next(self.report)
+
+    @step
+    def report(self, inputs: Inputs) -> None:
+        import mlflow
+
+        runner = run.Runner(self.param_scenario, reporter_name=self.param_reporter)
+
+        best_params = {}
+        results = {}
+        self.evaluate_pathspecs = {}
+        for input_ in inputs:
+            group_best_params = input_.best_params
+            group_results = input_.results
+            for actor_name in input_.actors:
+                best_params[actor_name] = group_best_params[actor_name]
+                results[actor_name] = group_results[actor_name]
+                self.evaluate_pathspecs[actor_name] = input_.evaluate_pathspec
+
+        with mlflow.start_run(
+            experiment_id=self._experiment_id(),
+            run_name=current.run_id,
+            tags=self._experiment_tags(),
+        ):
+            with tempfile.TemporaryDirectory() as dirname:
+                report_paths = runner.report(dirname, results, best_params)
+
+                for path in report_paths:
+                    mlflow.log_artifact(path)
+
+        self.next(self.end)
+
+    @step
+    def end(self) -> None:
+        data.RunIndex().update(
+            self.param_experiment_name, self.param_scenario, self.evaluate_pathspecs
+        )
+
+    def _evaluate_actors(self) -> None:
+        from mlflow.tracking import MlflowClient
+
+        from . import tracking
+
+        runner = run.Runner(
+            self.param_scenario,
+            actor_names=self.evaluated_actors,
+            profile=self.param_profile,
+        )
+        client = MlflowClient()
+        start, stop = self.shard
+        with contextlib.ExitStack() as stack:
+            callbacks = {}
+            for actor_name in self.evaluated_actors:
+                metric_logger = stack.enter_context(
+                    tracking.BatchMetricLogger(
+                        self.mlflow_run_ids[actor_name], client=client
+                    )
+                )
+                callbacks[actor_name] = self._metric_callbacks(
+                    self.metric_aggregators[actor_name], metric_logger
+                )
+
+            self.results = runner.evaluate_actors(
+                self.param_n_ite,
+                {
+                    actor_name: self.best_params[actor_name]
+                    for actor_name in self.evaluated_actors
+                },
+                callbacks,
+                self.param_seed + 1,
+                n_jobs=self.param_n_jobs,
+                float_dtype=self.param_result_dtype,
+                spill_dir=self._spill_dir(),
+                vectorize=self.param_vectorize,
+                caches={
+                    actor_name: self._result_cache(actor_name)
+                    for actor_name in self.evaluated_actors
+                },
+                retention=self.param_retention,
+                retention_k=self.param_retention_k,
+                callback_queue_size=self.param_callback_queue_size,
+                callback_backpressure=self.param_callback_backpressure,
+                checkpoint_dir=(
+                    self.param_checkpoint_dir
+                    if self.param_checkpoint_dir != ""
+                    else None
+                ),
+                checkpoint_interval=self.param_checkpoint_interval,
+                checkpoint_steps=self.param_checkpoint_steps,
+                # Only a retry of this run resumes from its checkpoints.
+                checkpoint_revision=(
+                    f"{self.param_experiment_revision}/{current.run_id}"
+                ),
+                iterations=(range(start, stop) if len(self.shards) > 1 else None),
+            )
+
+        for actor_name, result in self.results.items():
+            aggregator = self.metric_aggregators[actor_name]
+            if aggregator.n_ite == 0:
+                for iteration_result in result:
+                    aggregator.update(iteration_result)
+        self.evaluate_profiler = runner.profiler
+
+    def _create_evaluation_run(
+        self, client: Any, actor_name: str, best_params: act.ParamsType
+    ) -> str:
+        tags = self._experiment_tags()
+        tags.update({"mlflow.runName": current.run_id, "step": "evaluate"})
+        run_id = str(client.create_run(self._experiment_id(), tags=tags).info.run_id)
+
+        params_for_log = {"scenario": self.param_scenario, "actor": actor_name}
+        params_for_log.update(best_params)
+        for key, value in params_for_log.items():
+            client.log_param(run_id, key, value)
+        return run_id
+
+    def _metric_callbacks(
+        self,
+        aggregator: aggregate.MetricAggregator,
+        metric_logger: "tracking.BatchMetricLogger",
+    ) -> List[sim.ActionCallbackType]:
+        def callback(current_ite: int, step: int, action: act.ActionType) -> None:
+            for key, value in action["metric"].items():
+                metric_logger.log_metric(f"{key}_{current_ite}", value, step)
+
+        if not self.param_save_metrics:
+            return []
+        # Otherwise the metric summary is computed from the finished results,
+        # which keeps the workers, the vectorized run and the progress
+        # snapshots free of callbacks to replay.
+        if self.param_aggregate_metrics:
+            return [aggregator]
+        return [callback]
+
+    def _log_evaluation(
+        self,
+        metric_logger: "tracking.BatchMetricLogger",
+        metric_summary: aggregate.SummaryType,
+        optimize_stats: Dict[str, float],
+        evaluate_stats: Dict[str, float],
+    ) -> None:
+        if self.param_save_metrics and self.param_aggregate_metrics:
+            for key, statistics in metric_summary.items():
+                for name, values in statistics.items():
+                    if name != "count":
+                        metric_logger.log_series(f"{key}_{name}", values)
+
+        for phase, stats in (
+            ("optimize", optimize_stats),
+            ("evaluate", evaluate_stats),
+        ):
+            for key, value in stats.items():
+                metric_logger.log_metric(f"profile.{phase}.{key}", value, 0)
+
+    def _experiment_id(self) -> str:
+        from . import tracking
+
+        return tracking.experiment_id(self.param_experiment_name)
+
+    def _retention_name(self) -> str:
+        return ret.Retention(self.param_retention, self.param_retention_k).name
+
+    def _study_storage(self) -> Optional[str]:
+        if self.param_study_storage == "":
+            return None
+
+        return str(self.param_study_storage)
+
+    def _study_name(self, actor_name: str) -> str:
+        from . import optimizer as optim
+
+        return optim.study_name(
+            self.param_experiment_name,
+            self.param_scenario,
+            actor_name,
+            self.param_optimization_metric,
+            self.param_optimization_direction,
+        )
+
+    def _result_cache(self, actor_name: str) -> Optional[cache.ResultCache]:
+        if (
+            self.param_cache_dir == ""
+            or actor_name in self.param_revival_from_evaluation_by
+        ):
+            return None
+
+        return cache.ResultCache(
+            self.param_cache_dir, revision=self.param_experiment_revision
+        )
+
+    def _spill_dir(self, *names: str) -> Optional[str]:
+        if self.param_spill_dir == "":
+            return None
+
+        return os.path.join(self.param_spill_dir, current.run_id, *names)
+
+    def _experiment_tags(self) -> Dict[str, str]:
+        return {
+            "step": current.step_name,
+            "experiment_name": self.param_experiment_name,
+            "experiment_revision": self.param_experiment_revision,
+        }
+
+
+def _shard_start(input_: Any) -> int:
+    shard = cast(Tuple[int, int], input_.shard)
+    return shard[0]
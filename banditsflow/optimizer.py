@@ -1,12 +1,25 @@
-from typing import Type
+import math
+import os
+import statistics
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Type, cast
 
 import optuna
+import scipy.stats
 
 from . import actor as act
-from . import scenario
+from . import profiler as prof
+from . import replay, scenario
 from . import simulator as sim
 from . import suggestion as suggest
 
+# User attribute of a trial keeping its objective value of each seed.
+RACING_VALUES = "racing_values"
+# User attribute of a persistent study keeping the metric of its objective.
+STUDY_METRIC = "metric"
+
 
 class Optimizer:
     def __init__(
@@ -14,10 +27,16 @@ class Optimizer:
         scenario_loader: Type[scenario.ScenarioLoader],
         actor_loader: Type[act.ActorLoader],
         suggestion_loader: Type[suggest.SuggestionLoader],
+        profiler: Optional[prof.Profiler] = None,
+        replay_scenario: bool = False,
+        racing: Optional["Racing"] = None,
     ) -> None:
         self.scenario_loader = scenario_loader
         self.actor_loader = actor_loader
         self.suggestion_loader = suggestion_loader
+        self.profiler = profiler
+        self.replay_scenario = replay_scenario
+        self.racing = racing
 
     def optimize(
         self,
@@ -28,34 +47,367 @@ class Optimizer:
         direction: str,
         metric: str,
         seed: int,
+        n_jobs: int = 1,
+        pruner: str = "nop",
+        report_interval: int = 0,
+        storage: Optional[str] = None,
+        study_name: Optional[str] = None,
+        warm_start_params: Optional[Dict[str, Any]] = None,
     ) -> optuna.study.Study:
+        """Optimize the parameters of the actor in `n_trials` new trials.
+
+        If `storage` is given, the study named `study_name` is kept in it and
+        continued by the next call. A new study first evaluates
+        `warm_start_params`, usually the best parameters of the previous run.
+        Intermediate metrics are reported every `report_interval` steps only
+        if `pruner` is not "nop", since nothing else reads them.
+        """
+        if pruner == "nop":
+            report_interval = 0
+        n_workers = min(sim.resolve_n_jobs(n_jobs), n_trials)
+        if storage is not None:
+            return self._optimize_persistent(
+                n_trials,
+                timeout,
+                scenario_name,
+                actor_name,
+                direction,
+                metric,
+                seed,
+                n_workers,
+                pruner,
+                report_interval,
+                storage,
+                study_name,
+                warm_start_params,
+            )
+
+        if n_workers > 1:
+            return self._optimize_parallel(
+                n_trials,
+                timeout,
+                scenario_name,
+                actor_name,
+                direction,
+                metric,
+                seed,
+                n_workers,
+                pruner,
+                report_interval,
+            )
+
+        study = optuna.create_study(
+            direction=direction,
+            sampler=optuna.samplers.TPESampler(seed=seed),
+            pruner=create_pruner(pruner),
+        )
+        study.optimize(
+            self._objective(scenario_name, actor_name, metric, seed, report_interval),
+            n_trials=n_trials,
+            timeout=(timeout if timeout > 0.0 else None),
+        )
+
+        return study
+
+    def _optimize_persistent(
+        self,
+        n_trials: int,
+        timeout: float,
+        scenario_name: str,
+        actor_name: str,
+        direction: str,
+        metric: str,
+        seed: int,
+        n_workers: int,
+        pruner: str,
+        report_interval: int,
+        storage: str,
+        study_name: Optional[str],
+        warm_start_params: Optional[Dict[str, Any]],
+    ) -> optuna.study.Study:
+        try:
+            study = optuna.create_study(
+                storage=create_storage(storage),
+                study_name=study_name,
+                direction=direction,
+                load_if_exists=True,
+            )
+        except ValueError as e:
+            raise ValueError(
+                f"Study {study_name} in {storage} does not {direction} its objective. "
+                "Use another study name or storage."
+            ) from e
+        # The values of trials of another metric cannot be compared.
+        study_metric = study.user_attrs.get(STUDY_METRIC, metric)
+        if study_metric != metric:
+            raise ValueError(
+                f"Study {study_name} in {storage} optimizes {study_metric}, not {metric}. "
+                "Use another study name or storage."
+            )
+        study.set_user_attr(STUDY_METRIC, metric)
+        # Offset the seed by the existing trials so that a continued study
+        # does not repeat the random startup trials of TPE.
+        sampler_seed = seed + len(study.trials)
+        if len(study.trials) == 0 and warm_start_params is not None:
+            study.enqueue_trial(warm_start_params)
+
+        if n_workers > 1:
+            self._run_workers(
+                study.study_name,
+                storage,
+                n_trials,
+                timeout,
+                scenario_name,
+                actor_name,
+                metric,
+                seed,
+                sampler_seed,
+                n_workers,
+                pruner,
+                report_interval,
+            )
+            return optuna.load_study(
+                study_name=study.study_name, storage=create_storage(storage)
+            )
+
+        study.sampler = optuna.samplers.TPESampler(seed=sampler_seed)
+        study.pruner = create_pruner(pruner)
+        study.optimize(
+            self._objective(scenario_name, actor_name, metric, seed, report_interval),
+            n_trials=n_trials,
+            timeout=(timeout if timeout > 0.0 else None),
+        )
+
+        return study
+
+    def _optimize_parallel(
+        self,
+        n_trials: int,
+        timeout: float,
+        scenario_name: str,
+        actor_name: str,
+        direction: str,
+        metric: str,
+        seed: int,
+        n_workers: int,
+        pruner: str,
+        report_interval: int,
+    ) -> optuna.study.Study:
+        with tempfile.TemporaryDirectory() as dirname:
+            url = f"sqlite:///{os.path.join(dirname, 'study.db')}"
+            study = optuna.create_study(storage=url, direction=direction)
+            self._run_workers(
+                study.study_name,
+                url,
+                n_trials,
+                timeout,
+                scenario_name,
+                actor_name,
+                metric,
+                seed,
+                seed,
+                n_workers,
+                pruner,
+                report_interval,
+            )
+
+            storage = optuna.storages.InMemoryStorage()
+            optuna.copy_study(study.study_name, url, storage)
+
+        return optuna.load_study(study_name=study.study_name, storage=storage)
+
+    def _run_workers(
+        self,
+        study_name: str,
+        url: str,
+        n_trials: int,
+        timeout: float,
+        scenario_name: str,
+        actor_name: str,
+        metric: str,
+        seed: int,
+        sampler_seed: int,
+        n_workers: int,
+        pruner: str,
+        report_interval: int,
+    ) -> None:
+        with ProcessPoolExecutor(max_workers=n_workers) as executor:
+            futures = [
+                executor.submit(
+                    _optimize_worker,
+                    self,
+                    study_name,
+                    url,
+                    worker_n_trials,
+                    timeout,
+                    scenario_name,
+                    actor_name,
+                    metric,
+                    seed,
+                    sampler_seed + i,
+                    pruner,
+                    report_interval,
+                )
+                for i, worker_n_trials in enumerate(split_n_trials(n_trials, n_workers))
+            ]
+            for future in futures:
+                profiler = future.result()
+                if self.profiler is not None and profiler is not None:
+                    self.profiler.merge(profiler)
+
+    def _objective(
+        self,
+        scenario_name: str,
+        actor_name: str,
+        metric: str,
+        seed: int,
+        report_interval: int,
+    ) -> Callable[[optuna.trial.Trial], float]:
         suggestions = self.suggestion_loader.load(actor_name)
         suggester = suggest.Suggester(suggestions)
+        # Every trial reads the same scenario, so it is generated only once.
+        scenario_loader = (
+            cast(
+                Type[scenario.ScenarioLoader],
+                replay.ScenarioRecorder(self.scenario_loader),
+            )
+            if self.replay_scenario
+            else self.scenario_loader
+        )
 
-        def objective(trial: optuna.trial.Trial) -> float:
-            params = suggester.suggest(trial)
+        def simulate(
+            trial: optuna.trial.Trial, params: act.ParamsType, i: int
+        ) -> float:
+            callbacks: List[sim.ActionCallbackType] = []
+            # Only the first seed reports, so the steps reported to the pruner
+            # are the same with racing.
+            if report_interval > 0 and i == 0:
+                callbacks.append(PruningCallback(trial, metric, report_interval))
 
-            simulator = sim.Simulator(self.scenario_loader, self.actor_loader)
+            simulator = sim.Simulator(
+                scenario_loader, self.actor_loader, profiler=self.profiler
+            )
             results = simulator.run(
                 1,
                 scenario_name,
                 actor_name,
                 params,
-                [],
+                callbacks,
                 "optimize",
-                seed,
+                seed + i,
             )
-
             return to_objective(metric, results)
 
-        study = optuna.create_study(
-            direction=direction, sampler=optuna.samplers.TPESampler(seed=seed)
-        )
-        study.optimize(
-            objective, n_trials=n_trials, timeout=(timeout if timeout > 0.0 else None)
+        def objective(trial: optuna.trial.Trial) -> float:
+            params = suggester.suggest(trial)
+
+            started = time.perf_counter()
+            try:
+                if self.racing is None:
+                    return simulate(trial, params, 0)
+                return self.racing.race(trial, lambda i: simulate(trial, params, i))
+            finally:
+                if self.profiler is not None:
+                    self.profiler.add("trial", time.perf_counter() - started)
+
+        return objective
+
+
+class Racing:
+    """Evaluation of each trial on up to `n_seeds` seeds with early elimination.
+
+    The i-th seed of a trial is the seed of the optimization plus i, so
+    trials are compared on the same seeds. From the `min_seeds`-th seed on,
+    the trial is pruned once the one-sided `confidence` bound of its mean
+    difference to the incumbent best trial, by the Student-t quantile of so
+    few seeds, shows that it is worse. A
+    completed trial has been evaluated on every seed and its value is the
+    mean.
+    """
+
+    def __init__(
+        self, n_seeds: int, confidence: float = 0.95, min_seeds: int = 2
+    ) -> None:
+        if not 2 <= min_seeds <= n_seeds:
+            raise ValueError(
+                f"Racing needs 2 <= min_seeds <= n_seeds: {min_seeds}, {n_seeds}"
+            )
+        if not 0.5 <= confidence < 1.0:
+            raise ValueError(f"Confidence of racing must be in [0.5, 1): {confidence}")
+
+        self.n_seeds = n_seeds
+        self.confidence = confidence
+        self.min_seeds = min_seeds
+
+    def race(
+        self, trial: optuna.trial.Trial, evaluate: Callable[[int], float]
+    ) -> float:
+        incumbent = incumbent_values(trial.study)
+        sign = (
+            1.0
+            if trial.study.direction == optuna.study.StudyDirection.MAXIMIZE
+            else -1.0
         )
 
-        return study
+        values: List[float] = []
+        for i in range(self.n_seeds):
+            values.append(evaluate(i))
+            trial.set_user_attr(RACING_VALUES, values)
+            if len(values) < self.n_seeds and self.is_worse(
+                [sign * value for value in values],
+                [sign * value for value in incumbent],
+            ):
+                raise optuna.TrialPruned(f"Trial was eliminated after {i + 1} seeds.")
+
+        return statistics.fmean(values)
+
+    def is_worse(self, values: List[float], incumbent: List[float]) -> bool:
+        """Whether larger `values` are worse than `incumbent` on the same seeds."""
+        n = len(values)
+        if n < self.min_seeds or n > len(incumbent):
+            return False
+
+        differences = [value - best for value, best in zip(values, incumbent)]
+        quantile = float(scipy.stats.t.ppf(self.confidence, n - 1))
+        bound = statistics.fmean(differences) + quantile * statistics.stdev(
+            differences
+        ) / math.sqrt(n)
+        return bound < 0.0
+
+
+class PruningCallback:
+    def __init__(self, trial: optuna.trial.Trial, metric: str, interval: int) -> None:
+        self.trial = trial
+        self.metric = metric
+        self.interval = interval
+
+    def __call__(self, current_ite: int, step: int, action: act.ActionType) -> None:
+        if (step + 1) % self.interval != 0:
+            return
+
+        metrics = action["metric"]
+        if self.metric not in metrics:
+            return
+
+        self.trial.report(metrics[self.metric], step)
+        if self.trial.should_prune():
+            raise optuna.TrialPruned(f"Trial was pruned at step {step}.")
+
+
+def create_pruner(name: str) -> optuna.pruners.BasePruner:
+    """Return the pruner of `name`. "percentile" prunes below the 25th percentile."""
+    if name == "nop":
+        return optuna.pruners.NopPruner()
+    elif name == "median":
+        return optuna.pruners.MedianPruner()
+    elif name == "percentile":
+        return optuna.pruners.PercentilePruner(25.0)
+    elif name == "successive_halving":
+        return optuna.pruners.SuccessiveHalvingPruner()
+    elif name == "hyperband":
+        return optuna.pruners.HyperbandPruner()
+    else:
+        raise ValueError(f"Unknown pruner: {name}")
 
 
 def to_objective(metric: str, results: sim.SimulationResultType) -> float:
@@ -64,3 +416,77 @@ def to_objective(metric: str, results: sim.SimulationResultType) -> float:
         last_metric[metric] for last_metric in last_metrics if metric in last_metric
     ]
     return sum(objective_values) / len(objective_values)
+
+
+def incumbent_values(study: optuna.study.Study) -> List[float]:
+    """Objective value of each seed of the best trial evaluated by racing."""
+    try:
+        best_trial = study.best_trial
+    except ValueError:
+        return []
+    return list(best_trial.user_attrs.get(RACING_VALUES, []))
+
+
+def create_storage(url: str) -> optuna.storages.RDBStorage:
+    if url.startswith("sqlite:///"):
+        directory = os.path.dirname(url[len("sqlite:///") :])
+        if directory != "":
+            os.makedirs(directory, exist_ok=True)
+        # Wait for other processes writing to the same file.
+        return optuna.storages.RDBStorage(
+            url, engine_kwargs={"connect_args": {"timeout": 600}}
+        )
+
+    return optuna.storages.RDBStorage(url)
+
+
+def study_name(
+    experiment_name: str,
+    scenario_name: str,
+    actor_name: str,
+    metric: str,
+    direction: str,
+) -> str:
+    """Return the name of the persistent study of an actor and objective.
+
+    The objective is a part of the name, so that changing the metric or
+    the direction starts another study instead of mixing their values.
+    """
+    return f"{experiment_name}/{scenario_name}/{actor_name}/{direction}/{metric}"
+
+
+def split_n_trials(n_trials: int, n_workers: int) -> List[int]:
+    quotient, remainder = divmod(n_trials, n_workers)
+    return [quotient + (1 if i < remainder else 0) for i in range(n_workers)]
+
+
+def _optimize_worker(
+    optimizer: Optimizer,
+    study_name: str,
+    url: str,
+    n_trials: int,
+    timeout: float,
+    scenario_name: str,
+    actor_name: str,
+    metric: str,
+    seed: int,
+    sampler_seed: int,
+    pruner: str,
+    report_interval: int,
+) -> Optional[prof.Profiler]:
+    # The worker reports its own timings for the parent to merge.
+    if optimizer.profiler is not None:
+        optimizer.profiler = prof.Profiler()
+    study = optuna.load_study(
+        study_name=study_name,
+        storage=create_storage(url),
+        sampler=optuna.samplers.TPESampler(seed=sampler_seed),
+        pruner=create_pruner(pruner),
+    )
+    study.optimize(
+        optimizer._objective(scenario_name, actor_name, metric, seed, report_interval),
+        n_trials=n_trials,
+        timeout=(timeout if timeout > 0.0 else None),
+    )
+
+    return optimizer.profiler
@@ -0,0 +1,190 @@
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from . import actor as act
+from . import aggregator as aggregate
+from . import cache
+from . import runner as run
+from . import simulator as sim
+
+ActorOutputType = Tuple[act.ParamsType, sim.SimulationResultType, aggregate.SummaryType]
+
+
+class Pipeline:
+    """Optimize, evaluate and report like BanditsFlow without Metaflow.
+
+    The actors run in a process pool and their results are passed back in
+    memory, so nothing is stored except the reports and, if enabled, the
+    MLflow runs, the result cache and the studies.
+    """
+
+    def __init__(
+        self,
+        scenario_name: str,
+        actor_names: Sequence[str],
+        reporter_name: str,
+        optimization_metric: str,
+        *,
+        experiment_name: str = "default",
+        experiment_revision: str = "",
+        optimization_direction: str = "maximize",
+        n_trials: int = 1,
+        timeout: float = -1.0,
+        n_ite: int = 1,
+        seed: int = 1,
+        n_jobs: int = 1,
+        vectorize: bool = False,
+        cache_dir: str = "",
+        study_storage: str = "",
+        metric_quantiles: Sequence[float] = (),
+        mute: bool = False,
+    ) -> None:
+        self.scenario_name = scenario_name
+        self.actor_names = list(actor_names)
+        self.reporter_name = reporter_name
+        self.optimization_metric = optimization_metric
+        self.experiment_name = experiment_name
+        self.experiment_revision = experiment_revision
+        self.optimization_direction = optimization_direction
+        self.n_trials = n_trials
+        self.timeout = timeout
+        self.n_ite = n_ite
+        self.seed = seed
+        self.n_jobs = n_jobs
+        self.vectorize = vectorize
+        self.cache_dir = cache_dir
+        self.study_storage = study_storage
+        self.metric_quantiles = list(metric_quantiles)
+        self.mute = mute
+
+        self.best_params: Dict[str, act.ParamsType] = {}
+        self.results: Dict[str, sim.SimulationResultType] = {}
+        self.metric_summaries: Dict[str, aggregate.SummaryType] = {}
+
+    def run(self, outdir: str, log_mlflow: bool = False) -> List[str]:
+        n_workers = min(sim.resolve_n_jobs(self.n_jobs), len(self.actor_names))
+        if n_workers > 1:
+            if self.study_storage != "":
+                # The workers would race to create the tables of a new storage.
+                from . import optimizer as optim
+
+                optim.create_storage(self.study_storage)
+            with ProcessPoolExecutor(max_workers=n_workers) as executor:
+                outputs = list(
+                    executor.map(
+                        _run_actor, [self] * len(self.actor_names), self.actor_names
+                    )
+                )
+        else:
+            outputs = [self.run_actor(actor_name) for actor_name in self.actor_names]
+
+        for actor_name, (best_params, results, summary) in zip(
+            self.actor_names, outputs
+        ):
+            self.best_params[actor_name] = best_params
+            self.results[actor_name] = results
+            self.metric_summaries[actor_name] = summary
+
+        runner = run.Runner(
+            self.scenario_name, reporter_name=self.reporter_name, mute=self.mute
+        )
+        report_paths = runner.report(outdir, self.results, self.best_params)
+
+        if log_mlflow:
+            self._log_mlflow(report_paths)
+
+        return report_paths
+
+    def run_actor(self, actor_name: str) -> ActorOutputType:
+        # Optuna takes a while to import and only optimization needs it.
+        from . import optimizer as optim
+
+        runner = run.Runner(self.scenario_name, actor_name=actor_name, mute=self.mute)
+        best_params = runner.optimize(
+            self.n_trials,
+            self.timeout,
+            self.optimization_direction,
+            self.optimization_metric,
+            self.seed,
+            revival=True,
+            storage=(self.study_storage or None),
+            study_name=optim.study_name(
+                self.experiment_name,
+                self.scenario_name,
+                actor_name,
+                self.optimization_metric,
+                self.optimization_direction,
+            ),
+        )
+
+        results = runner.evaluate(
+            self.n_ite,
+            best_params,
+            [],
+            self.seed + 1,
+            revival=True,
+            vectorize=self.vectorize,
+            cache=self._result_cache(),
+        )
+
+        aggregator = aggregate.MetricAggregator(self.metric_quantiles)
+        for result in results:
+            aggregator.update(result)
+        return best_params, results, aggregator.summary()
+
+    def _result_cache(self) -> Optional[cache.ResultCache]:
+        if self.cache_dir == "":
+            return None
+
+        return cache.ResultCache(self.cache_dir, revision=self.experiment_revision)
+
+    def _log_mlflow(self, report_paths: List[str]) -> None:
+        from mlflow.tracking import MlflowClient
+
+        from . import tracking
+
+        client = MlflowClient()
+        experiment_id = tracking.experiment_id(self.experiment_name)
+        run_name = time.strftime("standalone-%Y%m%d%H%M%S")
+
+        for actor_name, results in self.results.items():
+            mlflow_run = client.create_run(
+                experiment_id, tags=self._tags(run_name, "evaluate")
+            )
+            run_id = mlflow_run.info.run_id
+            params: act.ParamsType = {
+                "scenario": self.scenario_name,
+                "actor": actor_name,
+            }
+            params.update(self.best_params[actor_name])
+            for key, param in params.items():
+                client.log_param(run_id, key, param)
+
+            with tracking.BatchMetricLogger(run_id, client=client) as metric_logger:
+                for current_ite, result in enumerate(results):
+                    for step, action in enumerate(result):
+                        for key, value in action["metric"].items():
+                            metric_logger.log_metric(
+                                f"{key}_{current_ite}", value, step
+                            )
+            client.set_terminated(run_id)
+
+        mlflow_run = client.create_run(
+            experiment_id, tags=self._tags(run_name, "report")
+        )
+        for path in report_paths:
+            client.log_artifact(mlflow_run.info.run_id, path)
+        client.set_terminated(mlflow_run.info.run_id)
+
+    def _tags(self, run_name: str, step: str) -> Dict[str, str]:
+        return {
+            "mlflow.runName": run_name,
+            "step": step,
+            "experiment_name": self.experiment_name,
+            "experiment_revision": self.experiment_revision,
+        }
+
+
+def _run_actor(pipeline: Pipeline, actor_name: str) -> ActorOutputType:
+    return pipeline.run_actor(actor_name)
@@ -0,0 +1,86 @@
+import time
+from typing import Any, Callable, Dict, TypeVar, cast
+
+from . import scenario
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+StatsType = Dict[str, float]
+
+
+class Profiler:
+    """Accumulator of seconds and counts spent in each phase of simulation.
+
+    It is opt-in: simulators and optimizers only wrap their scenarios,
+    actors and callbacks when they are given a profiler, so the plain loop
+    pays nothing.
+    """
+
+    def __init__(self) -> None:
+        self.seconds: Dict[str, float] = {}
+        self.counts: Dict[str, int] = {}
+
+    def add(self, phase: str, seconds: float, count: int = 1) -> None:
+        self.seconds[phase] = self.seconds.get(phase, 0.0) + seconds
+        self.count(phase, count)
+
+    def count(self, name: str, n: int) -> None:
+        self.counts[name] = self.counts.get(name, 0) + n
+
+    def merge(self, other: "Profiler") -> None:
+        for phase, seconds in other.seconds.items():
+            self.seconds[phase] = self.seconds.get(phase, 0.0) + seconds
+        for name, n in other.counts.items():
+            self.count(name, n)
+
+    def timed(self, phase: str, func: F) -> F:
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                self.add(phase, time.perf_counter() - start)
+
+        return cast(F, wrapper)
+
+    def stats(self) -> StatsType:
+        stats: StatsType = {}
+        for name in sorted(set(self.seconds) | set(self.counts)):
+            if name in self.seconds:
+                stats[f"{name}.seconds"] = self.seconds[name]
+            stats[f"{name}.count"] = float(self.counts.get(name, 0))
+
+        iteration = self.seconds.get("iteration", 0.0)
+        if iteration > 0.0:
+            stats["steps_per_second"] = self.counts.get("steps", 0) / iteration
+        optimize = self.seconds.get("optimize", 0.0)
+        if optimize > 0.0:
+            stats["trials_per_second"] = self.counts.get("trial", 0) / optimize
+
+        return stats
+
+
+class TimedScenario:
+    """Scenario which times scan, line and lines of the wrapped one."""
+
+    def __init__(self, target: scenario.Scenario, profiler: Profiler) -> None:
+        self.synopsis = target.synopsis
+        self.scan = profiler.timed("scan", target.scan)
+        self.line = profiler.timed("line", target.line)
+        lines = getattr(target, "lines", None)
+        if lines is not None:
+            self.lines = profiler.timed("lines", lines)
+
+
+class TimedActor:
+    """Actor which times act, act_batch and act_vector of the wrapped one."""
+
+    def __init__(self, target: Any, profiler: Profiler) -> None:
+        for name in ("act", "act_batch", "act_vector"):
+            method = getattr(target, name, None)
+            if method is not None:
+                setattr(self, name, profiler.timed(name, method))
+
+
+def callback_name(callback: Any) -> str:
+    return str(getattr(callback, "__name__", callback.__class__.__name__))
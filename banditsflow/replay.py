@@ -0,0 +1,234 @@
+import hashlib
+import os
+from typing import Any, Dict, List, Optional, Tuple, Type
+
+import numpy as np
+import numpy.typing as npt
+
+from . import scenario as scen
+
+KeyType = Tuple[str, str, int]
+
+# How a recorded column hands out the value of a line.
+_ARRAY = "array"  # NumPy rows or scalars as they were
+_LIST = "list"  # Python lists of numbers
+_ITEM = "item"  # Python numbers
+_OBJECT = "object"  # anything else, kept as recorded
+
+_NUMBER_TYPES = (bool, int, float)
+
+
+class Recording:
+    """Lines of one scenario stored as a column per key."""
+
+    def __init__(
+        self,
+        synopsis: scen.SynopsisType,
+        columns: Dict[str, Tuple[str, Any]],
+        n_lines: int,
+        batch: bool,
+    ) -> None:
+        self.synopsis = synopsis
+        self.columns = columns
+        self.n_lines = n_lines
+        self.batch = batch
+        # Lines are views of the columns, so an actor must not modify them.
+        for _, values in columns.values():
+            if isinstance(values, np.ndarray):
+                values.setflags(write=False)
+
+    def line(self, i: int) -> scen.LineType:
+        line: scen.LineType = {}
+        for key, (kind, values) in self.columns.items():
+            if kind == _LIST:
+                line[key] = values[i].tolist()
+            elif kind == _ITEM:
+                line[key] = values[i].item()
+            else:
+                line[key] = values[i]
+        return line
+
+    def lines(self, start: int, stop: int) -> scen.LinesType:
+        return {key: values[start:stop] for key, (_, values) in self.columns.items()}
+
+    def map(self, directory: str) -> None:
+        """Move the array columns to `.npy` files opened by memory mapping."""
+        os.makedirs(directory, exist_ok=True)
+        for key, (kind, values) in self.columns.items():
+            if isinstance(values, np.ndarray) and values.dtype.kind != "O":
+                path = os.path.join(directory, f"{_file_name(key)}.npy")
+                np.save(path, values)
+                mapped = np.load(path, mmap_mode="r")
+                self.columns[key] = (kind, mapped.view(np.ndarray))
+
+
+class ScenarioRecorder:
+    """Scenario loader which records the lines of each scenario once.
+
+    The first load of a (name, step, seed) records the lines while the
+    simulator reads them, and later loads replay the recording instead of
+    generating the lines again. So the scenario must depend only on them.
+    Values of lines are copied if they are lists or arrays, and handed out
+    with the same Python types as recorded. A recording is kept only if the
+    scenario is read to the end. If `directory` is given, array columns are
+    memory mapped from files under it.
+    """
+
+    def __init__(
+        self,
+        scenario_loader: Type[scen.ScenarioLoader],
+        directory: Optional[str] = None,
+    ) -> None:
+        self.scenario_loader = scenario_loader
+        self.directory = directory
+        self.recordings: Dict[KeyType, Recording] = {}
+
+    def load(self, name: str, step: str, seed: int) -> scen.Scenario:
+        key = (name, step, seed)
+        recording = self.recordings.get(key)
+        if recording is not None:
+            if recording.batch:
+                return BatchReplayScenario(recording)
+            return ReplayScenario(recording)
+
+        target = self.scenario_loader.load(name, step, seed)
+        return RecordingScenario(target, lambda r: self._store(key, r))
+
+    def _store(self, key: KeyType, recording: Recording) -> None:
+        if self.directory is not None:
+            digest = hashlib.sha256(repr(key).encode("utf-8")).hexdigest()
+            recording.map(os.path.join(self.directory, digest))
+        self.recordings[key] = recording
+
+
+class RecordingScenario:
+    """Scenario which records the lines read from the wrapped one."""
+
+    def __init__(self, target: scen.Scenario, store: Any) -> None:
+        self._target = target
+        self._store = store
+        self._synopsis: Optional[scen.SynopsisType] = None
+        self._lines: List[scen.LineType] = []
+        self._chunks: List[scen.LinesType] = []
+        if hasattr(target, "lines"):
+            self.lines = self._record_lines
+
+    def synopsis(self) -> scen.SynopsisType:
+        self._synopsis = self._target.synopsis()
+        return self._synopsis
+
+    def scan(self) -> bool:
+        if self._target.scan():
+            return True
+
+        self._finish()
+        return False
+
+    def line(self) -> scen.LineType:
+        line = self._target.line()
+        self._lines.append({key: _copy(value) for key, value in line.items()})
+        return line
+
+    def _record_lines(self, max_n: int) -> scen.LinesType:
+        lines = self._target.lines(max_n)  # type: ignore
+        if scen.count_lines(lines) == 0:
+            self._finish()
+        else:
+            self._chunks.append({key: np.array(value) for key, value in lines.items()})
+        return lines  # type: ignore
+
+    def _finish(self) -> None:
+        # Mixing both ways of reading is not worth recording.
+        if self._synopsis is None or (len(self._lines) > 0 and len(self._chunks) > 0):
+            return
+
+        batch = hasattr(self, "lines")
+        if len(self._chunks) > 0:
+            columns = {
+                key: (_ARRAY, np.concatenate([chunk[key] for chunk in self._chunks]))
+                for key in self._chunks[0]
+            }
+            n_lines = sum(scen.count_lines(chunk) for chunk in self._chunks)
+        else:
+            keys = list(self._lines[0]) if len(self._lines) > 0 else []
+            if any(list(line) != keys for line in self._lines):
+                return
+            columns = {
+                key: _encode([line[key] for line in self._lines]) for key in keys
+            }
+            n_lines = len(self._lines)
+
+        self._store(Recording(self._synopsis, columns, n_lines, batch))
+        self._lines = []
+        self._chunks = []
+
+
+class ReplayScenario:
+    def __init__(self, recording: Recording) -> None:
+        self._recording = recording
+        self._i = -1
+
+    def synopsis(self) -> scen.SynopsisType:
+        return dict(self._recording.synopsis)
+
+    def scan(self) -> bool:
+        self._i += 1
+        return self._i < self._recording.n_lines
+
+    def line(self) -> scen.LineType:
+        return self._recording.line(self._i)
+
+
+class BatchReplayScenario(ReplayScenario):
+    def lines(self, max_n: int) -> scen.LinesType:
+        start = self._i + 1
+        n = max(0, min(max_n, self._recording.n_lines - start))
+        self._i += n
+        return self._recording.lines(start, start + n)
+
+
+def _copy(value: Any) -> Any:
+    if isinstance(value, list):
+        return list(value)
+    if isinstance(value, np.ndarray):
+        return value.copy()
+    return value
+
+
+def _encode(values: List[Any]) -> Tuple[str, Any]:
+    if len(values) == 0:
+        return _OBJECT, values
+
+    first = values[0]
+    if isinstance(first, (np.ndarray, np.generic)):
+        kind = _ARRAY
+        same = all(
+            type(value) is type(first) and value.dtype == first.dtype
+            for value in values
+        )
+    elif type(first) in _NUMBER_TYPES:
+        kind = _ITEM
+        same = all(type(value) is type(first) for value in values)
+    elif type(first) is list and len(first) > 0 and type(first[0]) in _NUMBER_TYPES:
+        kind = _LIST
+        item_type = type(first[0])
+        same = all(
+            type(value) is list and all(type(x) is item_type for x in value)
+            for value in values
+        )
+    else:
+        return _OBJECT, values
+    if not same:
+        return _OBJECT, values
+
+    try:
+        array: npt.NDArray[Any] = np.array(values)
+    except ValueError:
+        return _OBJECT, values
+    if array.dtype.kind not in "biuf":
+        return _OBJECT, values
+    return kind, array
+
+
+def _file_name(key: str) -> str:
+    return hashlib.sha256(key.encode("utf-8")).hexdigest()[:16]
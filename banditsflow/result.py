@@ -0,0 +1,470 @@
+from typing import (
+    Any,
+    Dict,
+    Iterator,
+    List,
+    Mapping,
+    Optional,
+    Protocol,
+    Sequence,
+    Union,
+    cast,
+    overload,
+)
+
+import numpy as np
+import numpy.typing as npt
+
+from . import actor as act
+
+FIELDS = ("metric", "result")
+INITIAL_CAPACITY = 1024
+# Number of appended values buffered in a list before they are converted.
+APPEND_CHUNK_SIZE = 1024
+
+_KINDS = "bifO"
+
+
+class Column:
+    """Growable NumPy column of one metric or result key.
+
+    The dtype is inferred from the values and promoted in the order of
+    bool, int, float and object. Steps without the key are tracked by a mask
+    which is allocated only when such a step appears.
+
+    Appended values are buffered in a list and converted every
+    `APPEND_CHUNK_SIZE` values or when the column is read, so that the
+    simulation loop does not infer and check the dtype of every value.
+    """
+
+    __slots__ = ("_data", "_missing", "_size", "_float_dtype", "_pending")
+
+    def __init__(self, float_dtype: npt.DTypeLike = np.float64) -> None:
+        self._float_dtype = np.dtype(float_dtype)
+        self._data: Optional[npt.NDArray[Any]] = None
+        self._missing: Optional[npt.NDArray[Any]] = None
+        self._size = 0
+        # Values of the last steps, which are not in `_data` yet.
+        self._pending: List[Any] = []
+
+    @classmethod
+    def from_array(
+        cls,
+        data: npt.NDArray[Any],
+        missing: Optional[npt.NDArray[Any]] = None,
+        float_dtype: npt.DTypeLike = np.float64,
+    ) -> "Column":
+        column = cls(float_dtype)
+        column._data = data
+        column._missing = missing
+        column._size = len(data)
+        return column
+
+    def __len__(self) -> int:
+        return self._size
+
+    def __getitem__(self, index: int) -> Any:
+        self._flush()
+        if self._data is None:
+            return None
+        return _item(self._data[index])
+
+    def __getstate__(self) -> Dict[str, Any]:
+        self._flush()
+        return {
+            "float_dtype": self._float_dtype.str,
+            "data": None if self._data is None else self._data[: self._size].copy(),
+            "missing": self.missing(),
+            "size": self._size,
+        }
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        self._float_dtype = np.dtype(state["float_dtype"])
+        self._data = state["data"]
+        self._missing = state["missing"]
+        self._size = state["size"]
+        self._pending = []
+
+    def is_missing(self, index: int) -> bool:
+        self._flush()
+        if self._data is None:
+            return True
+        if self._missing is None or index >= len(self._missing):
+            return False
+        return bool(self._missing[index])
+
+    def values(self) -> npt.NDArray[Any]:
+        self._flush()
+        if self._data is None:
+            return np.full(self._size, np.nan, dtype=self._float_dtype)
+        return self._data[: self._size]
+
+    def missing(self) -> Optional[npt.NDArray[Any]]:
+        self._flush()
+        if self._data is None:
+            return np.ones(self._size, dtype=np.bool_)
+        if self._missing is None:
+            return None
+        missing = np.zeros(self._size, dtype=np.bool_)
+        n = min(self._size, len(self._missing))
+        missing[:n] = self._missing[:n]
+        return missing
+
+    def append(self, value: Any) -> None:
+        pending = self._pending
+        pending.append(value)
+        self._size += 1
+        if len(pending) >= APPEND_CHUNK_SIZE:
+            self._flush()
+
+    def extend(self, values: npt.NDArray[Any]) -> None:
+        n = len(values)
+        if n == 0:
+            return
+
+        self._flush()
+        if values.ndim > 1:
+            rows = np.empty(n, dtype=object)
+            rows[:] = list(values)
+            values = rows
+        self._size += n
+        self._write(self._size - n, values)
+
+    def append_missing(self, n: int = 1) -> None:
+        self._flush()
+        size = self._size + n
+        if self._missing is None:
+            self._missing = np.zeros(max(INITIAL_CAPACITY, size), dtype=np.bool_)
+        elif len(self._missing) < size:
+            self._missing = _grow(self._missing, size)
+        self._missing[self._size : size] = True
+        self._size = size
+
+    def take(self, index: slice) -> "Column":
+        self._flush()
+        missing = self.missing()
+        column = self.__class__(self._float_dtype)
+        column._data = None if self._data is None else self.values()[index].copy()
+        column._missing = None if missing is None else missing[index]
+        column._size = len(range(*index.indices(self._size)))
+        return column
+
+    def _flush(self) -> None:
+        pending = self._pending
+        if len(pending) == 0:
+            return
+
+        self._pending = []
+        self._write(self._size - len(pending), _to_array(pending))
+
+    def _write(self, start: int, values: npt.NDArray[Any]) -> None:
+        kind = values.dtype.kind
+        if kind == "u":
+            kind = "i"
+        elif kind not in _KINDS:
+            kind = "O"
+        stop = start + len(values)
+        self._reserve(stop, kind)
+        cast(npt.NDArray[Any], self._data)[start:stop] = values
+
+    def _reserve(self, size: int, kind: str) -> None:
+        if self._data is None:
+            self._data = self._empty(kind, max(INITIAL_CAPACITY, size))
+            return
+
+        if _KINDS.index(kind) > _KINDS.index(self._data.dtype.kind):
+            self._data = self._data.astype(kind_to_dtype(kind, self._float_dtype))
+        if len(self._data) < size:
+            self._data = _grow(self._data, size)
+
+    def _empty(self, kind: str, capacity: int) -> npt.NDArray[Any]:
+        dtype = kind_to_dtype(kind, self._float_dtype)
+        if kind == "O":
+            return np.empty(capacity, dtype=dtype)
+        return np.zeros(capacity, dtype=dtype)
+
+
+def _to_array(values: List[Any]) -> npt.NDArray[Any]:
+    """Convert values to an array of bool, int, float or else object."""
+    try:
+        array = np.asarray(values)
+    except ValueError:  # Sequences of different lengths
+        array = None
+    if array is None or array.ndim != 1 or array.dtype.kind not in "buif":
+        # Strings, sequences and other values are kept as they are.
+        array = np.empty(len(values), dtype=object)
+        for i, value in enumerate(values):
+            array[i] = value
+    return array
+
+
+def kind_to_dtype(kind: str, float_dtype: npt.DTypeLike) -> np.dtype[Any]:
+    if kind == "b":
+        return np.dtype(np.bool_)
+    elif kind == "i":
+        return np.dtype(np.int64)
+    elif kind == "f":
+        return np.dtype(float_dtype)
+    else:
+        return np.dtype(object)
+
+
+def promote_dtype(
+    dtypes: Sequence[np.dtype[Any]], float_dtype: npt.DTypeLike
+) -> np.dtype[Any]:
+    kind = max((dtype.kind for dtype in dtypes), key=_KINDS.index, default="f")
+    return kind_to_dtype(kind, float_dtype)
+
+
+def _grow(array: npt.NDArray[Any], size: int) -> npt.NDArray[Any]:
+    grown = np.zeros(max(size, 2 * len(array)), dtype=array.dtype)
+    grown[: len(array)] = array
+    return grown
+
+
+class FieldView(Mapping[str, Any]):
+    __slots__ = ("_columns", "_index")
+
+    def __init__(self, columns: Dict[str, Column], index: int) -> None:
+        self._columns = columns
+        self._index = index
+
+    def __getitem__(self, key: str) -> Any:
+        column = self._columns[key]
+        if column.is_missing(self._index):
+            raise KeyError(key)
+        return column[self._index]
+
+    def __iter__(self) -> Iterator[str]:
+        return (
+            key
+            for key, column in self._columns.items()
+            if not column.is_missing(self._index)
+        )
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self)
+
+    def __repr__(self) -> str:
+        return repr(dict(self))
+
+
+class ActionView(Mapping[str, FieldView]):
+    __slots__ = ("_columns", "_index")
+
+    def __init__(self, columns: Dict[str, Dict[str, Column]], index: int) -> None:
+        self._columns = columns
+        self._index = index
+
+    def __getitem__(self, field: str) -> FieldView:
+        return FieldView(self._columns[field], self._index)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(FIELDS)
+
+    def __len__(self) -> int:
+        return len(FIELDS)
+
+    def __repr__(self) -> str:
+        return repr({field: dict(self[field]) for field in FIELDS})
+
+
+class IterationResult(Sequence[act.ActionType]):
+    """Columnar actions of one simulation iteration.
+
+    Indexing and iteration return read-only views which behave like
+    `actor.ActionType`, so existing code reading `result[step]["metric"]`
+    keeps working while the values are stored in NumPy columns.
+    """
+
+    __slots__ = ("_columns", "_size", "_float_dtype")
+
+    def __init__(self, float_dtype: npt.DTypeLike = np.float64) -> None:
+        self._float_dtype = np.dtype(float_dtype)
+        self._columns: Dict[str, Dict[str, Column]] = {field: {} for field in FIELDS}
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    @overload
+    def __getitem__(self, index: int) -> act.ActionType:
+        ...
+
+    @overload
+    def __getitem__(self, index: slice) -> "IterationResult":
+        ...
+
+    def __getitem__(
+        self, index: Union[int, slice]
+    ) -> Union[act.ActionType, "IterationResult"]:
+        if isinstance(index, slice):
+            return self._take(index)
+
+        if index < 0:
+            index += self._size
+        if not 0 <= index < self._size:
+            raise IndexError("IterationResult index out of range")
+        return cast(act.ActionType, ActionView(self._columns, index))
+
+    def __iter__(self) -> Iterator[act.ActionType]:
+        for index in range(self._size):
+            yield cast(act.ActionType, ActionView(self._columns, index))
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, Sequence):
+            return NotImplemented
+        return len(self) == len(other) and all(a == b for a, b in zip(self, other))
+
+    __hash__ = None  # type: ignore
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}({self.to_actions()!r})"
+
+    def __getstate__(self) -> Dict[str, Any]:
+        return {
+            "float_dtype": self._float_dtype.str,
+            "columns": self._columns,
+            "size": self._size,
+        }
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        self._float_dtype = np.dtype(state["float_dtype"])
+        self._columns = state["columns"]
+        self._size = state["size"]
+
+    @property
+    def float_dtype(self) -> np.dtype[Any]:
+        return self._float_dtype
+
+    def append(self, action: act.ActionType) -> None:
+        for field, values in (
+            ("metric", action["metric"]),
+            ("result", action["result"]),
+        ):
+            columns = self._columns[field]
+            for key, value in values.items():
+                column = columns.get(key)
+                if column is None:
+                    column = columns[key] = self._new_column()
+                column.append(value)
+
+            if len(values) != len(columns):
+                for column in columns.values():
+                    if len(column) == self._size:
+                        column.append_missing()
+
+        self._size += 1
+
+    def extend(self, block: act.ActionBlockType) -> None:
+        n = count_actions(block)
+        for field, values in (("metric", block["metric"]), ("result", block["result"])):
+            columns = self._columns[field]
+            for key, value in values.items():
+                column = columns.get(key)
+                if column is None:
+                    column = columns[key] = self._new_column()
+                column.extend(np.asarray(value))
+
+            if len(values) != len(columns):
+                for column in columns.values():
+                    if len(column) == self._size:
+                        column.append_missing(n)
+
+        self._size += n
+
+    def close(self) -> "IterationResult":
+        return self
+
+    def keys(self, field: str) -> List[str]:
+        return list(self._columns[field].keys())
+
+    def column(self, field: str, key: str) -> npt.NDArray[Any]:
+        return self._columns[field][key].values()
+
+    def missing(self, field: str, key: str) -> Optional[npt.NDArray[Any]]:
+        return self._columns[field][key].missing()
+
+    def columns(self, field: str) -> Dict[str, npt.NDArray[Any]]:
+        return {key: column.values() for key, column in self._columns[field].items()}
+
+    def to_actions(self) -> List[act.ActionType]:
+        return [
+            {"metric": dict(action["metric"]), "result": dict(action["result"])}
+            for action in self
+        ]
+
+    def _new_column(self) -> Column:
+        column = Column(self._float_dtype)
+        if self._size > 0:
+            column.append_missing(self._size)
+        return column
+
+    def _take(self, index: slice) -> "IterationResult":
+        result = IterationResult(self._float_dtype)
+        result._columns = {
+            field: {key: column.take(index) for key, column in columns.items()}
+            for field, columns in self._columns.items()
+        }
+        result._size = len(range(*index.indices(self._size)))
+        return result
+
+
+def count_actions(block: act.ActionBlockType) -> int:
+    for values in (block["metric"], block["result"]):
+        for value in values.values():
+            return len(value)
+    return 0
+
+
+def iterate_actions(block: act.ActionBlockType) -> Iterator[act.ActionType]:
+    metric = {key: np.asarray(value) for key, value in block["metric"].items()}
+    result = {key: np.asarray(value) for key, value in block["result"].items()}
+    for i in range(count_actions(block)):
+        yield {
+            "metric": {key: _item(value[i]) for key, value in metric.items()},
+            "result": {key: _item(value[i]) for key, value in result.items()},
+        }
+
+
+def _item(value: Any) -> Any:
+    return value.item() if isinstance(value, np.generic) else value
+
+
+def as_iteration_result(
+    result: Sequence[act.ActionType], float_dtype: npt.DTypeLike = np.float64
+) -> IterationResult:
+    if isinstance(result, IterationResult):
+        return result
+
+    iteration_result = IterationResult(float_dtype)
+    for action in result:
+        iteration_result.append(action)
+    return iteration_result
+
+
+class ResultWriter(Protocol):
+    def __len__(self) -> int:
+        ...
+
+    def append(self, action: act.ActionType) -> None:
+        ...
+
+    def extend(self, block: act.ActionBlockType) -> None:
+        ...
+
+    def close(self) -> Sequence[act.ActionType]:
+        ...
+
+
+class ResultSink(Protocol):
+    def open(self, current_ite: int) -> ResultWriter:
+        ...
+
+
+class MemorySink:
+    def __init__(self, float_dtype: npt.DTypeLike = np.float64) -> None:
+        self.float_dtype = float_dtype
+
+    def open(self, current_ite: int) -> IterationResult:
+        return IterationResult(self.float_dtype)
@@ -0,0 +1,151 @@
+from typing import Any, Dict, Optional, Sequence
+
+import numpy as np
+import numpy.typing as npt
+
+from . import actor as act
+from . import result as res
+
+POLICIES = ("full", "last", "every_k", "metrics_only", "summary")
+# Result key reserved for the step of the actions kept by a policy.
+STEP_KEY = "_step"
+
+
+class Retention:
+    """Policy deciding which actions of an iteration are kept.
+
+    - full: every action.
+    - last: only the last action.
+    - every_k: every `k`-th action and the last one.
+    - metrics_only: the metrics of every action without the results.
+    - summary: only the metrics of the last action.
+
+    Except for full and metrics_only, the kept actions have the index of
+    their step in the `_step` result so that curves can still be plotted.
+    """
+
+    def __init__(self, policy: str, k: int = 100) -> None:
+        if policy not in POLICIES:
+            raise ValueError(f"Unknown retention policy: {policy}")
+        if policy == "every_k" and k < 1:
+            raise ValueError(f"k of every_k must be positive: {k}")
+
+        self.policy = policy
+        self.k = k
+
+    @property
+    def name(self) -> str:
+        return f"every_{self.k}" if self.policy == "every_k" else self.policy
+
+    def open(self, writer: res.ResultWriter) -> res.ResultWriter:
+        if self.policy == "full":
+            return writer
+        return RetainingWriter(self, writer)
+
+    def reduce(
+        self,
+        result: Sequence[act.ActionType],
+        float_dtype: npt.DTypeLike = np.float64,
+    ) -> Sequence[act.ActionType]:
+        """Apply the policy to the actions of an already finished iteration."""
+        if self.policy == "full":
+            return result
+
+        writer = self.open(res.IterationResult(float_dtype))
+        for action in result:
+            writer.append(action)
+        return writer.close()
+
+
+class RetainingWriter:
+    """Writer which passes only the retained actions to the wrapped writer.
+
+    Its length is the number of actions given so far, so the steps reported
+    to callbacks do not change.
+    """
+
+    def __init__(self, retention: Retention, writer: res.ResultWriter) -> None:
+        self.policy = retention.policy
+        self.k = retention.k
+        self.writer = writer
+        self.n_steps = 0
+        # The last action is kept until the next one arrives, either as an
+        # action or as a block of one action.
+        self.pending_action: Optional[act.ActionType] = None
+        self.pending_block: Optional[act.ActionBlockType] = None
+
+    def __len__(self) -> int:
+        return self.n_steps
+
+    def append(self, action: act.ActionType) -> None:
+        step = self.n_steps
+        self.n_steps += 1
+        self.pending_block = None
+
+        if self.policy == "metrics_only":
+            self.writer.append({"metric": action["metric"], "result": {}})
+            return
+
+        self.pending_action = self._with_step(action, step)
+        if self.policy == "every_k" and (step + 1) % self.k == 0:
+            self.writer.append(self.pending_action)
+            self.pending_action = None
+
+    def extend(self, block: act.ActionBlockType) -> None:
+        n = res.count_actions(block)
+        if n == 0:
+            return
+
+        steps = np.arange(self.n_steps, self.n_steps + n)
+        self.n_steps += n
+        self.pending_action = None
+
+        if self.policy == "metrics_only":
+            self.writer.extend({"metric": block["metric"], "result": {}})
+            return
+
+        self.pending_block = self._take(block, np.array([n - 1]), steps)
+        if self.policy == "every_k":
+            selected = np.flatnonzero((steps + 1) % self.k == 0)
+            if len(selected) > 0:
+                self.writer.extend(self._take(block, selected, steps))
+                if selected[-1] == n - 1:
+                    self.pending_block = None
+
+    def close(self) -> Sequence[act.ActionType]:
+        if self.pending_action is not None:
+            self.writer.append(self.pending_action)
+        elif self.pending_block is not None:
+            self.writer.extend(self.pending_block)
+        self.pending_action = None
+        self.pending_block = None
+
+        return self.writer.close()
+
+    def _with_step(self, action: act.ActionType, step: int) -> act.ActionType:
+        result = {} if self.policy == "summary" else dict(action["result"])
+        result[STEP_KEY] = step
+        return {"metric": dict(action["metric"]), "result": result}
+
+    def _take(
+        self,
+        block: act.ActionBlockType,
+        indices: npt.NDArray[Any],
+        steps: npt.NDArray[Any],
+    ) -> act.ActionBlockType:
+        result: Dict[str, Any] = (
+            {}
+            if self.policy == "summary"
+            else {
+                key: np.asarray(value)[indices]
+                for key, value in block["result"].items()
+            }
+        )
+        result[STEP_KEY] = steps[indices]
+        return {
+            "metric": {
+                key: np.asarray(value)[indices]
+                for key, value in block["metric"].items()
+            },
+            "result": result,
+        }
@@ -1,13 +1,21 @@
 import importlib
+import os
+import time
 import types
-from typing import Any, Dict, List, Optional, Type, cast
+from typing import Any, Dict, List, Mapping, Optional, Sequence, Tuple, Type, cast
 
 from . import actor as act
+from . import cache as result_cache
+from . import checkpoint as ckpt
+from . import dispatch as disp
 from . import logger
-from . import optimizer as optim
+from . import profiler as prof
 from . import reporter as report
+from . import result as res
+from . import retention as ret
 from . import scenario
 from . import simulator as sim
+from . import spill
 from . import suggestion as suggest
 
 
@@ -17,10 +25,13 @@ class Runner:
         scenario_name: str,
         *,
         actor_name: Optional[str] = None,
+        actor_names: Optional[Sequence[str]] = None,
         reporter_name: Optional[str] = None,
         mute: bool = False,
+        profile: bool = False,
     ) -> None:
         self.scenario_name = scenario_name
+        self.profiler = prof.Profiler() if profile else None
 
         scenario_loader_module = self.__class__.import_module("scenario.loader")
         self.scenario_loader = cast(
@@ -35,6 +46,9 @@ class Runner:
 
         if actor_name is not None:
             self.actor_name: str = actor_name
+        if actor_names is not None:
+            self.actor_names: List[str] = list(actor_names)
+        if actor_name is not None or actor_names is not None:
             actor_loader_module = self.__class__.import_module("actor.loader")
             self.actor_loader = cast(
                 Type[act.ActorLoader],
@@ -60,12 +74,35 @@ class Runner:
         seed: int,
         revival: bool = False,
         latest_best_params: Optional[Dict[str, Any]] = None,
+        n_jobs: int = 1,
+        pruner: str = "nop",
+        report_interval: int = 0,
+        storage: Optional[str] = None,
+        study_name: Optional[str] = None,
+        replay_scenario: bool = False,
+        racing_seeds: int = 1,
+        racing_confidence: float = 0.95,
     ) -> Dict[str, Any]:
         if latest_best_params is None or revival:
             self.logger.log(
                 f"Optimizing parameters for {self.actor_name} on {self.scenario_name} scenario..."
             )
-            return self._optimize(n_trials, timeout, direction, metric, seed)
+            return self._optimize(
+                n_trials,
+                timeout,
+                direction,
+                metric,
+                seed,
+                n_jobs,
+                pruner,
+                report_interval,
+                storage,
+                study_name,
+                latest_best_params,
+                replay_scenario,
+                racing_seeds,
+                racing_confidence,
+            )
         else:
             self.logger.log(
                 f"Use cached parameters for {self.actor_name} on {self.scenario_name} scenario."
@@ -79,10 +116,32 @@ class Runner:
         direction: str,
         metric: str,
         seed: int,
+        n_jobs: int = 1,
+        pruner: str = "nop",
+        report_interval: int = 0,
+        storage: Optional[str] = None,
+        study_name: Optional[str] = None,
+        warm_start_params: Optional[Dict[str, Any]] = None,
+        replay_scenario: bool = False,
+        racing_seeds: int = 1,
+        racing_confidence: float = 0.95,
     ) -> Dict[str, Any]:
+        # Optuna takes a while to import and only optimization needs it.
+        from . import optimizer as optim
+
         optimizer = optim.Optimizer(
-            self.scenario_loader, self.actor_loader, self.suggestion_loader
+            self.scenario_loader,
+            self.actor_loader,
+            self.suggestion_loader,
+            profiler=self.profiler,
+            replay_scenario=replay_scenario,
+            racing=(
+                optim.Racing(racing_seeds, confidence=racing_confidence)
+                if racing_seeds > 1
+                else None
+            ),
         )
+        started = time.perf_counter()
         study = optimizer.optimize(
             n_trials,
             timeout,
@@ -91,7 +150,15 @@ class Runner:
             direction,
             metric,
             seed,
+            n_jobs=n_jobs,
+            pruner=pruner,
+            report_interval=report_interval,
+            storage=storage,
+            study_name=study_name,
+            warm_start_params=warm_start_params,
         )
+        if self.profiler is not None:
+            self.profiler.add("optimize", time.perf_counter() - started)
 
         return study.best_params
 
@@ -103,16 +170,55 @@ class Runner:
         seed: int,
         revival: bool = False,
         latest_result: Optional[sim.SimulationResultType] = None,
+        n_jobs: int = 1,
+        float_dtype: str = "float64",
+        spill_dir: Optional[str] = None,
+        vectorize: bool = False,
+        cache: Optional[result_cache.ResultCache] = None,
+        retention: str = "full",
+        retention_k: int = 100,
+        callback_queue_size: int = 0,
+        callback_backpressure: str = "block",
+        checkpoint_dir: Optional[str] = None,
+        checkpoint_interval: int = 10,
+        checkpoint_steps: int = 0,
+        checkpoint_revision: str = "",
+        iterations: Optional[Sequence[int]] = None,
     ) -> sim.SimulationResultType:
+        """Evaluate `n_ite` iterations, or only `iterations` of them."""
         if latest_result is None or revival:
             self.logger.log(
                 f"Evaluating with {self.actor_name} on {self.scenario_name} scenario..."
             )
-            return self._evaluate(n_ite, params, callbacks, seed)
+            return self._evaluate(
+                n_ite,
+                params,
+                callbacks,
+                seed,
+                n_jobs,
+                float_dtype,
+                spill_dir,
+                vectorize,
+                cache,
+                retention,
+                retention_k,
+                callback_queue_size,
+                callback_backpressure,
+                checkpoint_dir,
+                checkpoint_interval,
+                checkpoint_steps,
+                checkpoint_revision,
+                iterations,
+            )
         else:
             self.logger.log(
                 f"Use cached result with {self.actor_name} on {self.scenario_name} scenario."
             )
+            if iterations is not None:
+                # Iterations which the latest run did not have are left out.
+                return [
+                    latest_result[ite] for ite in iterations if ite < len(latest_result)
+                ]
             return latest_result
 
     def _evaluate(
@@ -121,19 +227,343 @@ class Runner:
         params: act.ParamsType,
         callbacks: List[sim.ActionCallbackType],
         seed: int,
+        n_jobs: int = 1,
+        float_dtype: str = "float64",
+        spill_dir: Optional[str] = None,
+        vectorize: bool = False,
+        cache: Optional[result_cache.ResultCache] = None,
+        retention: str = "full",
+        retention_k: int = 100,
+        callback_queue_size: int = 0,
+        callback_backpressure: str = "block",
+        checkpoint_dir: Optional[str] = None,
+        checkpoint_interval: int = 10,
+        checkpoint_steps: int = 0,
+        checkpoint_revision: str = "",
+        iterations: Optional[Sequence[int]] = None,
     ) -> sim.SimulationResultType:
-        simulator = sim.Simulator(self.scenario_loader, self.actor_loader)
+        """Simulate `n_ite` iterations except the cached or checkpointed ones.
+
+        With `checkpoint_dir`, every `checkpoint_interval` simulated
+        iterations are saved to a directory under it named by what
+        determines them, including `checkpoint_revision` which identifies the
+        code and the run, so only a retried evaluation resumes from there. It
+        is removed once the evaluation ends.
+
+        If `iterations` is given, only those of the `n_ite` iterations are
+        simulated with the same seeds, as a shard of the evaluation, and
+        their checkpoints are kept apart from the other shards.
 
-        return simulator.run(
+        Callbacks are replayed on cached or checkpointed iterations, which
+        needs every action. With callbacks and a `retention` other than full,
+        those iterations are simulated again instead.
+        """
+        actor_name = self.actor_name
+        return self._evaluate_actors(
+            [actor_name],
+            n_ite,
+            {actor_name: params},
+            {actor_name: callbacks},
+            seed,
+            n_jobs,
+            float_dtype,
+            (
+                {actor_name: spill.SpillSink(spill_dir, float_dtype=float_dtype)}
+                if spill_dir is not None
+                else {}
+            ),
+            vectorize,
+            {actor_name: cache},
+            retention,
+            retention_k,
+            callback_queue_size,
+            callback_backpressure,
+            checkpoint_dir,
+            checkpoint_interval,
+            checkpoint_steps,
+            checkpoint_revision,
+            iterations,
+        )[actor_name]
+
+    def evaluate_actors(
+        self,
+        n_ite: int,
+        params: Dict[str, act.ParamsType],
+        callbacks: Dict[str, List[sim.ActionCallbackType]],
+        seed: int,
+        n_jobs: int = 1,
+        float_dtype: str = "float64",
+        spill_dir: Optional[str] = None,
+        vectorize: bool = False,
+        caches: Optional[Mapping[str, Optional[result_cache.ResultCache]]] = None,
+        retention: str = "full",
+        retention_k: int = 100,
+        callback_queue_size: int = 0,
+        callback_backpressure: str = "block",
+        checkpoint_dir: Optional[str] = None,
+        checkpoint_interval: int = 10,
+        checkpoint_steps: int = 0,
+        checkpoint_revision: str = "",
+        iterations: Optional[Sequence[int]] = None,
+    ) -> Dict[str, sim.SimulationResultType]:
+        """Evaluate `actor_names` side by side on one shared scenario stream.
+
+        The results are the same as evaluating each actor by `evaluate`, but
+        the scenario is loaded and read once per iteration for the actors
+        which miss the same iterations in `caches` and checkpoints. Results
+        of each actor are spilled under `{spill_dir}/{actor}`. Unfinished
+        iterations are saved by `checkpoint_steps` only while one actor is
+        simulated.
+        """
+        self.logger.log(
+            f"Evaluating with {', '.join(self.actor_names)} on {self.scenario_name} scenario..."
+        )
+        return self._evaluate_actors(
+            self.actor_names,
             n_ite,
-            self.scenario_name,
-            self.actor_name,
             params,
             callbacks,
-            "evaluate",
             seed,
+            n_jobs,
+            float_dtype,
+            {
+                actor_name: spill.SpillSink(
+                    os.path.join(spill_dir, actor_name), float_dtype=float_dtype
+                )
+                for actor_name in self.actor_names
+                if spill_dir is not None
+            },
+            vectorize,
+            caches if caches is not None else {},
+            retention,
+            retention_k,
+            callback_queue_size,
+            callback_backpressure,
+            checkpoint_dir,
+            checkpoint_interval,
+            checkpoint_steps,
+            checkpoint_revision,
+            iterations,
         )
 
+    def _evaluate_actors(
+        self,
+        actor_names: Sequence[str],
+        n_ite: int,
+        params: Dict[str, act.ParamsType],
+        callbacks: Dict[str, List[sim.ActionCallbackType]],
+        seed: int,
+        n_jobs: int,
+        float_dtype: str,
+        sinks: Dict[str, res.ResultSink],
+        vectorize: bool,
+        caches: Mapping[str, Optional[result_cache.ResultCache]],
+        retention: str,
+        retention_k: int,
+        callback_queue_size: int,
+        callback_backpressure: str,
+        checkpoint_dir: Optional[str],
+        checkpoint_interval: int,
+        checkpoint_steps: int,
+        checkpoint_revision: str,
+        iterations: Optional[Sequence[int]],
+    ) -> Dict[str, sim.SimulationResultType]:
+        targets = list(range(n_ite)) if iterations is None else list(iterations)
+        retention_policy = ret.Retention(retention, retention_k)
+        checkpoints = {
+            actor_name: (
+                ckpt.Checkpoint(
+                    os.path.join(
+                        checkpoint_dir,
+                        result_cache.ResultCache(revision=checkpoint_revision).key(
+                            self.scenario_name,
+                            actor_name,
+                            params[actor_name],
+                            "evaluate",
+                            seed,
+                            float_dtype,
+                            retention_policy.name,
+                            vectorize,
+                        ),
+                        *(
+                            [f"{targets[0]:06d}-{targets[-1] + 1:06d}"]
+                            if iterations is not None and len(targets) > 0
+                            else []
+                        ),
+                    ),
+                    steps=checkpoint_steps,
+                )
+                if checkpoint_dir is not None
+                else None
+            )
+            for actor_name in actor_names
+        }
+
+        results: Dict[str, Dict[int, Optional[sim.IterationResultType]]] = {}
+        keys: Dict[str, Dict[int, str]] = {}
+        for actor_name in actor_names:
+            results[actor_name] = {ite: None for ite in targets}
+            replayable = (
+                len(callbacks[actor_name]) == 0 or retention_policy.policy == "full"
+            )
+            cache = caches.get(actor_name)
+            if cache is not None:
+                keys[actor_name] = {
+                    ite: cache.key(
+                        self.scenario_name,
+                        actor_name,
+                        params[actor_name],
+                        "evaluate",
+                        seed + ite,
+                        float_dtype,
+                        retention_policy.name,
+                        vectorize,
+                    )
+                    for ite in targets
+                }
+                if replayable:
+                    results[actor_name] = {
+                        ite: cache.get(key) for ite, key in keys[actor_name].items()
+                    }
+                n_cached = sum(
+                    result is not None for result in results[actor_name].values()
+                )
+                if n_cached > 0:
+                    self.logger.log(
+                        f"Use {n_cached} cached iterations with {actor_name} on {self.scenario_name} scenario."
+                    )
+            checkpoint = checkpoints[actor_name]
+            if checkpoint is not None and replayable:
+                missing = [
+                    ite for ite, result in results[actor_name].items() if result is None
+                ]
+                checkpointed = checkpoint.load(missing)
+                if len(checkpointed) > 0:
+                    self.logger.log(
+                        f"Resume from {len(checkpointed)} checkpointed iterations with {actor_name} on {self.scenario_name} scenario."
+                    )
+                for ite, checkpointed_result in checkpointed.items():
+                    results[actor_name][ite] = checkpointed_result
+
+        # Actors missing the same iterations are simulated side by side.
+        missing_iterations = {
+            actor_name: [
+                ite for ite, result in results[actor_name].items() if result is None
+            ]
+            for actor_name in actor_names
+        }
+        groups: Dict[Tuple[int, ...], List[str]] = {}
+        for actor_name, missing in missing_iterations.items():
+            if len(missing) > 0:
+                groups.setdefault(tuple(missing), []).append(actor_name)
+
+        for missing_group, group in groups.items():
+            simulator = self._simulator(
+                vectorize,
+                float_dtype,
+                sinks.get(group[0]) if len(group) == 1 else None,
+                retention_policy,
+                callback_queue_size,
+                callback_backpressure,
+                checkpoints[group[0]] if len(group) == 1 else None,
+            )
+            # Without checkpoints, the missing iterations run at once so that
+            # parallel workers are started only once.
+            interval = max(
+                1,
+                checkpoint_interval
+                if checkpoint_dir is not None
+                else len(missing_group),
+            )
+            for start in range(0, len(missing_group), interval):
+                chunk = list(missing_group[start : start + interval])
+                if len(group) == 1:
+                    simulated = {
+                        group[0]: simulator.run_iterations(
+                            chunk,
+                            self.scenario_name,
+                            group[0],
+                            params[group[0]],
+                            callbacks[group[0]],
+                            "evaluate",
+                            seed,
+                            n_jobs=n_jobs,
+                        )
+                    }
+                else:
+                    simulated = simulator.run_actor_iterations(
+                        chunk,
+                        self.scenario_name,
+                        group,
+                        params,
+                        callbacks,
+                        "evaluate",
+                        seed,
+                        n_jobs=n_jobs,
+                        sinks=sinks,
+                    )
+                for actor_name in group:
+                    cache = caches.get(actor_name)
+                    checkpoint = checkpoints[actor_name]
+                    for ite, result in zip(chunk, simulated[actor_name]):
+                        if cache is not None:
+                            cache.put(keys[actor_name][ite], result)
+                        if checkpoint is not None:
+                            checkpoint.save(ite, result)
+                        results[actor_name][ite] = result
+
+        # Callbacks of cached iterations are replayed after the simulated ones.
+        for actor_name in actor_names:
+            simulated_iterations = set(missing_iterations[actor_name])
+            for ite, cached_result in results[actor_name].items():
+                if ite not in simulated_iterations:
+                    sim.replay_callbacks(
+                        callbacks[actor_name],
+                        ite,
+                        cast(sim.IterationResultType, cached_result),
+                    )
+            checkpoint = checkpoints[actor_name]
+            if checkpoint is not None:
+                checkpoint.clear()
+
+        return {
+            actor_name: cast(
+                sim.SimulationResultType,
+                [results[actor_name][ite] for ite in targets],
+            )
+            for actor_name in actor_names
+        }
+
+    def _simulator(
+        self,
+        vectorize: bool,
+        float_dtype: str,
+        sink: Optional[res.ResultSink],
+        retention_policy: ret.Retention,
+        callback_queue_size: int,
+        callback_backpressure: str,
+        checkpoint: Optional[ckpt.Checkpoint],
+    ) -> sim.Simulator:
+        simulator_class = sim.VectorizedSimulator if vectorize else sim.Simulator
+        return simulator_class(
+            self.scenario_loader,
+            self.actor_loader,
+            float_dtype=float_dtype,
+            sink=sink,
+            profiler=self.profiler,
+            retention=retention_policy,
+            dispatch=(
+                disp.Dispatch(callback_queue_size, callback_backpressure)
+                if callback_queue_size > 0
+                else None
+            ),
+            checkpoint=checkpoint,
+        )
+
+    def stats(self) -> prof.StatsType:
+        """Return the timings of the phases if the runner profiles."""
+        return self.profiler.stats() if self.profiler is not None else {}
+
     def report(
         self,
         outdir: str,
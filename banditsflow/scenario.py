@@ -1,6 +1,7 @@
 from typing import Any, Dict, Protocol
 
 LineType = Dict[str, Any]
+LinesType = Dict[str, Any]
 SynopsisType = Dict[str, Any]
 
 
@@ -15,7 +16,26 @@ class Scenario(Protocol):
         ...
 
 
+class BatchScenario(Scenario, Protocol):
+    def lines(self, max_n: int) -> LinesType:
+        ...
+
+
+class SnapshotScenario(Scenario, Protocol):
+    def snapshot(self) -> Any:
+        ...
+
+    def restore(self, state: Any) -> None:
+        ...
+
+
 class ScenarioLoader(Protocol):
     @staticmethod
     def load(name: str, step: str, seed: int) -> Scenario:
         ...
+
+
+def count_lines(lines: LinesType) -> int:
+    for column in lines.values():
+        return len(column)
+    return 0
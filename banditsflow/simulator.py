@@ -1,9 +1,33 @@
-from typing import List, Protocol, Type
+import contextlib
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import (
+    Any,
+    Dict,
+    Iterator,
+    List,
+    Optional,
+    Protocol,
+    Sequence,
+    Tuple,
+    Type,
+    cast,
+)
+
+import numpy as np
+import numpy.typing as npt
 
 from . import actor as act
-from . import scenario
+from . import checkpoint as ckpt
+from . import dispatch as disp
+from . import profiler as prof
+from . import result as res
+from . import retention as ret
+from . import scenario as scen
 
-SimulationResultType = List[List[act.ActionType]]
+IterationResultType = Sequence[act.ActionType]
+SimulationResultType = Sequence[IterationResultType]
 
 
 class ActionCallbackType(Protocol):
@@ -14,11 +38,26 @@ class ActionCallbackType(Protocol):
 class Simulator:
     def __init__(
         self,
-        scenario_loader: Type[scenario.ScenarioLoader],
+        scenario_loader: Type[scen.ScenarioLoader],
         actor_loader: Type[act.ActorLoader],
+        *,
+        float_dtype: npt.DTypeLike = "float64",
+        sink: Optional[res.ResultSink] = None,
+        batch_size: int = 1024,
+        profiler: Optional[prof.Profiler] = None,
+        retention: Optional[ret.Retention] = None,
+        dispatch: Optional[disp.Dispatch] = None,
+        checkpoint: Optional[ckpt.Checkpoint] = None,
     ) -> None:
         self.scenario_loader = scenario_loader
         self.actor_loader = actor_loader
+        self.float_dtype = float_dtype
+        self.sink = sink if sink is not None else res.MemorySink(float_dtype)
+        self.batch_size = batch_size
+        self.profiler = profiler
+        self.retention = retention
+        self.dispatch = dispatch
+        self.checkpoint = checkpoint
 
     def run(
         self,
@@ -29,16 +68,174 @@ class Simulator:
         callbacks: List[ActionCallbackType],
         step: str,
         seed: int,
+        n_jobs: int = 1,
     ) -> SimulationResultType:
-        results: SimulationResultType = []
-        for ite in range(n_ite):
-            result = self._run_scenario(
-                ite, scenario_name, actor_name, params, callbacks, step, seed + ite
-            )
-            results.append(result)
+        return self.run_iterations(
+            range(n_ite),
+            scenario_name,
+            actor_name,
+            params,
+            callbacks,
+            step,
+            seed,
+            n_jobs=n_jobs,
+        )
+
+    def run_iterations(
+        self,
+        iterations: Sequence[int],
+        scenario_name: str,
+        actor_name: str,
+        params: act.ParamsType,
+        callbacks: List[ActionCallbackType],
+        step: str,
+        seed: int,
+        n_jobs: int = 1,
+    ) -> SimulationResultType:
+        """Run only the given iterations with the same seeds as `run`."""
+        with self._dispatched(callbacks) as callbacks:
+            n_workers = min(resolve_n_jobs(n_jobs), len(iterations))
+            if n_workers > 1:
+                return self._run_parallel(
+                    iterations,
+                    scenario_name,
+                    actor_name,
+                    params,
+                    callbacks,
+                    step,
+                    seed,
+                    n_workers,
+                )
+
+            results: List[IterationResultType] = []
+            for ite in iterations:
+                result = self._run_scenario(
+                    ite, scenario_name, actor_name, params, callbacks, step, seed + ite
+                )
+                results.append(result)
+
+            return results
+
+    def _run_parallel(
+        self,
+        iterations: Sequence[int],
+        scenario_name: str,
+        actor_name: str,
+        params: act.ParamsType,
+        callbacks: List[ActionCallbackType],
+        step: str,
+        seed: int,
+        n_workers: int,
+    ) -> SimulationResultType:
+        # Callbacks often close over process local state such as an active
+        # MLflow run, so they are replayed here in iteration order instead of
+        # being shipped to the workers. Replaying needs every action, so the
+        # workers retain actions only if there is nothing to replay.
+        retain = len(callbacks) == 0
+        tasks = [
+            (ite, scenario_name, actor_name, params, step, seed + ite, retain)
+            for ite in iterations
+        ]
+
+        results: List[IterationResultType] = []
+        with ProcessPoolExecutor(
+            max_workers=n_workers, initializer=_init_worker, initargs=(self,)
+        ) as executor:
+            for ite, (result, profiler) in zip(
+                iterations, executor.map(_run_worker, tasks)
+            ):
+                if self.profiler is not None and profiler is not None:
+                    self.profiler.merge(profiler)
+                replay_callbacks(callbacks, ite, result)
+                results.append(result if retain else self._reduce(result))
 
         return results
 
+    def _open(
+        self,
+        current_ite: int,
+        retain: bool = True,
+        sink: Optional[res.ResultSink] = None,
+    ) -> res.ResultWriter:
+        writer = (sink if sink is not None else self.sink).open(current_ite)
+        if retain and self.retention is not None:
+            return self.retention.open(writer)
+        return writer
+
+    def _reduce(self, result: IterationResultType) -> IterationResultType:
+        if self.retention is None:
+            return result
+        return self.retention.reduce(result, self.float_dtype)
+
+    def _timed_callbacks(
+        self, callbacks: List[ActionCallbackType]
+    ) -> List[ActionCallbackType]:
+        if self.profiler is None:
+            return callbacks
+
+        return [
+            self.profiler.timed(
+                f"callback.{i}.{prof.callback_name(callback)}", callback
+            )
+            for i, callback in enumerate(callbacks)
+        ]
+
+    @contextlib.contextmanager
+    def _dispatched(
+        self, callbacks: List[ActionCallbackType]
+    ) -> Iterator[List[ActionCallbackType]]:
+        """Yield the callbacks to call during a run.
+
+        With `dispatch`, they are called by a dispatcher which is flushed
+        and closed when the run ends.
+        """
+        if self.dispatch is None or len(callbacks) == 0:
+            yield self._timed_callbacks(callbacks)
+            return
+
+        dispatcher = self.dispatch.start(callbacks, self.profiler)
+        try:
+            yield [dispatcher]
+        finally:
+            dispatcher.close()
+            if self.profiler is not None:
+                self.profiler.count("callback.dropped", dispatcher.dropped)
+                self.profiler.count("callback.coalesced", dispatcher.coalesced)
+
+    def _resume(
+        self,
+        current_ite: int,
+        scenario: scen.Scenario,
+        actor: act.Actor,
+        writer: res.ResultWriter,
+        callbacks: List[ActionCallbackType],
+    ) -> Optional[ckpt.Snapshot]:
+        """Restore the saved progress of the iteration and return its snapshot.
+
+        Callbacks are replayed on the restored actions, so with callbacks the
+        progress is saved only if the writer keeps every action in memory.
+        """
+        if (
+            self.checkpoint is None
+            or self.checkpoint.steps <= 0
+            or not ckpt.can_snapshot(scenario, actor)
+            or (len(callbacks) > 0 and not isinstance(writer, res.IterationResult))
+        ):
+            return None
+
+        snapshot_scenario = cast(scen.SnapshotScenario, scenario)
+        snapshot_actor = cast(act.SnapshotActor, actor)
+        progress = self.checkpoint.load_progress(current_ite)
+        if progress is not None:
+            snapshot_scenario.restore(progress["scenario"])
+            snapshot_actor.restore(progress["actor"])
+            writer = progress["writer"]
+            replay_callbacks(callbacks, current_ite, cast(IterationResultType, writer))
+
+        return ckpt.Snapshot(
+            self.checkpoint, current_ite, snapshot_scenario, snapshot_actor, writer
+        )
+
     def _run_scenario(
         self,
         current_ite: int,
@@ -48,13 +245,57 @@ class Simulator:
         callbacks: List[ActionCallbackType],
         step: str,
         seed: int,
-    ) -> List[act.ActionType]:
+        retain: bool = True,
+    ) -> IterationResultType:
+        started = time.perf_counter()
         scenario = self.scenario_loader.load(scenario_name, step, seed)
+        scenario_loaded = time.perf_counter()
         actor = self.actor_loader.load(
             actor_name, scenario.synopsis(), params, seed + 1
         )
+        actor_loaded = time.perf_counter()
+        writer = self._open(current_ite, retain)
+        snapshot = self._resume(current_ite, scenario, actor, writer, callbacks)
+        if snapshot is not None:
+            writer = snapshot.writer
+        if self.profiler is not None:
+            self.profiler.add("scenario_load", scenario_loaded - started)
+            self.profiler.add("actor_load", actor_loaded - scenario_loaded)
+            scenario = cast(scen.Scenario, prof.TimedScenario(scenario, self.profiler))
+            actor = cast(act.Actor, prof.TimedActor(actor, self.profiler))
+
+        if (
+            self.batch_size > 0
+            and hasattr(scenario, "lines")
+            and hasattr(actor, "act_batch")
+        ):
+            self._run_batches(
+                current_ite,
+                cast(scen.BatchScenario, scenario),
+                cast(act.BatchActor, actor),
+                callbacks,
+                writer,
+                snapshot,
+            )
+        else:
+            self._run_lines(current_ite, scenario, actor, callbacks, writer, snapshot)
+        result = writer.close()
+
+        if self.profiler is not None:
+            self.profiler.add("iteration", time.perf_counter() - started)
+            self.profiler.count("steps", len(writer))
 
-        result: List[act.ActionType] = []
+        return result
+
+    def _run_lines(
+        self,
+        current_ite: int,
+        scenario: scen.Scenario,
+        actor: act.Actor,
+        callbacks: List[ActionCallbackType],
+        result: res.ResultWriter,
+        snapshot: Optional[ckpt.Snapshot] = None,
+    ) -> None:
         while scenario.scan():
             line = scenario.line()
             action = actor.act(line)
@@ -63,5 +304,519 @@ class Simulator:
                 callback(current_ite, len(result), action)
 
             result.append(action)
+            if snapshot is not None:
+                snapshot()
 
-        return result
+    def _run_batches(
+        self,
+        current_ite: int,
+        scenario: scen.BatchScenario,
+        actor: act.BatchActor,
+        callbacks: List[ActionCallbackType],
+        result: res.ResultWriter,
+        snapshot: Optional[ckpt.Snapshot] = None,
+    ) -> None:
+        while True:
+            lines = scenario.lines(self.batch_size)
+            if scen.count_lines(lines) == 0:
+                break
+
+            block = actor.act_batch(lines)
+            start = len(result)
+            result.extend(block)
+
+            if len(callbacks) > 0:
+                for i, action in enumerate(res.iterate_actions(block)):
+                    for callback in callbacks:
+                        callback(current_ite, start + i, action)
+            if snapshot is not None:
+                snapshot()
+
+    def run_actors(
+        self,
+        n_ite: int,
+        scenario_name: str,
+        actor_names: Sequence[str],
+        params: Dict[str, act.ParamsType],
+        callbacks: Dict[str, List[ActionCallbackType]],
+        step: str,
+        seed: int,
+        n_jobs: int = 1,
+        sinks: Optional[Dict[str, res.ResultSink]] = None,
+    ) -> Dict[str, SimulationResultType]:
+        """Run the actors side by side on one scenario per iteration.
+
+        Each line is read once and given to every actor, so actors must not
+        modify it. The scenario and the actors are seeded as in `run`, so the
+        result of each actor is the same as running it alone. `sinks` gives
+        the sink of each actor, which defaults to the sink of the simulator.
+        """
+        return self.run_actor_iterations(
+            range(n_ite),
+            scenario_name,
+            actor_names,
+            params,
+            callbacks,
+            step,
+            seed,
+            n_jobs=n_jobs,
+            sinks=sinks,
+        )
+
+    def run_actor_iterations(
+        self,
+        iterations: Sequence[int],
+        scenario_name: str,
+        actor_names: Sequence[str],
+        params: Dict[str, act.ParamsType],
+        callbacks: Dict[str, List[ActionCallbackType]],
+        step: str,
+        seed: int,
+        n_jobs: int = 1,
+        sinks: Optional[Dict[str, res.ResultSink]] = None,
+    ) -> Dict[str, SimulationResultType]:
+        """Run only the given iterations with the same seeds as `run_actors`."""
+        sinks = sinks if sinks is not None else {}
+        with contextlib.ExitStack() as stack:
+            callbacks = {
+                actor_name: stack.enter_context(
+                    self._dispatched(callbacks.get(actor_name, []))
+                )
+                for actor_name in actor_names
+            }
+            tasks = [
+                (ite, scenario_name, actor_names, params, step, seed + ite)
+                for ite in iterations
+            ]
+
+            outputs: List[Dict[str, IterationResultType]] = []
+            n_workers = min(resolve_n_jobs(n_jobs), len(iterations))
+            # Callbacks are replayed from the results of workers as in
+            # `_run_parallel`, so the workers keep every action for them.
+            retain = all(len(c) == 0 for c in callbacks.values()) or n_workers == 1
+            if n_workers > 1:
+                with ProcessPoolExecutor(
+                    max_workers=n_workers, initializer=_init_worker, initargs=(self,)
+                ) as executor:
+                    for ite, (output, profiler) in zip(
+                        iterations,
+                        executor.map(
+                            _run_actors_worker,
+                            tasks,
+                            [sinks] * len(tasks),
+                            [retain] * len(tasks),
+                        ),
+                    ):
+                        if self.profiler is not None and profiler is not None:
+                            self.profiler.merge(profiler)
+                        for actor_name, result in output.items():
+                            replay_callbacks(callbacks[actor_name], ite, result)
+                        outputs.append(output)
+            else:
+                for task in tasks:
+                    outputs.append(self._run_actors_scenario(*task, callbacks, sinks))
+
+        return {
+            actor_name: [
+                output[actor_name] if retain else self._reduce(output[actor_name])
+                for output in outputs
+            ]
+            for actor_name in actor_names
+        }
+
+    def _run_actors_scenario(
+        self,
+        current_ite: int,
+        scenario_name: str,
+        actor_names: Sequence[str],
+        params: Dict[str, act.ParamsType],
+        step: str,
+        seed: int,
+        callbacks: Dict[str, List[ActionCallbackType]],
+        sinks: Dict[str, res.ResultSink],
+        retain: bool = True,
+    ) -> Dict[str, IterationResultType]:
+        started = time.perf_counter()
+        scenario = self.scenario_loader.load(scenario_name, step, seed)
+        scenario_loaded = time.perf_counter()
+        actors = [
+            self.actor_loader.load(
+                actor_name, scenario.synopsis(), params[actor_name], seed + 1
+            )
+            for actor_name in actor_names
+        ]
+        if self.profiler is not None:
+            actor_loaded = time.perf_counter()
+            self.profiler.add("scenario_load", scenario_loaded - started)
+            self.profiler.add(
+                "actor_load", actor_loaded - scenario_loaded, len(actor_names)
+            )
+            scenario = cast(scen.Scenario, prof.TimedScenario(scenario, self.profiler))
+            actors = [
+                cast(act.Actor, prof.TimedActor(actor, self.profiler))
+                for actor in actors
+            ]
+
+        writers = [
+            self._open(current_ite, retain, sinks.get(actor_name))
+            for actor_name in actor_names
+        ]
+        actor_callbacks = [callbacks.get(actor_name, []) for actor_name in actor_names]
+        if (
+            self.batch_size > 0
+            and hasattr(scenario, "lines")
+            and all(hasattr(actor, "act_batch") for actor in actors)
+        ):
+            batch_scenario = cast(scen.BatchScenario, scenario)
+            while True:
+                lines = batch_scenario.lines(self.batch_size)
+                if scen.count_lines(lines) == 0:
+                    break
+
+                for actor, writer, cbs in zip(actors, writers, actor_callbacks):
+                    block = cast(act.BatchActor, actor).act_batch(lines)
+                    start = len(writer)
+                    writer.extend(block)
+                    if len(cbs) > 0:
+                        for i, action in enumerate(res.iterate_actions(block)):
+                            for callback in cbs:
+                                callback(current_ite, start + i, action)
+        else:
+            while scenario.scan():
+                line = scenario.line()
+                for actor, writer, cbs in zip(actors, writers, actor_callbacks):
+                    action = actor.act(line)
+                    for callback in cbs:
+                        callback(current_ite, len(writer), action)
+                    writer.append(action)
+
+        results = {
+            actor_name: writer.close()
+            for actor_name, writer in zip(actor_names, writers)
+        }
+        if self.profiler is not None:
+            self.profiler.add("iteration", time.perf_counter() - started)
+            self.profiler.count("steps", sum(len(writer) for writer in writers))
+
+        return results
+
+
+class VectorizedSimulator(Simulator):
+    """Simulator which advances all iterations in lockstep.
+
+    The actor loader implements `load_vector` which returns an actor holding
+    the state of every iteration, and its `act_vector` acts on the current
+    lines of the running iterations in one call. The actions of each step
+    must have the same keys with a scalar value per iteration. If the loader
+    has no vector actor for the name, it falls back to `Simulator`.
+    """
+
+    def run_iterations(
+        self,
+        iterations: Sequence[int],
+        scenario_name: str,
+        actor_name: str,
+        params: act.ParamsType,
+        callbacks: List[ActionCallbackType],
+        step: str,
+        seed: int,
+        n_jobs: int = 1,
+    ) -> SimulationResultType:
+        loaded = self._load_vectors(
+            iterations, scenario_name, [actor_name], {actor_name: params}, step, seed
+        )
+        if loaded is None:
+            return super().run_iterations(
+                iterations,
+                scenario_name,
+                actor_name,
+                params,
+                callbacks,
+                step,
+                seed,
+                n_jobs=n_jobs,
+            )
+
+        return self._run_vectors(
+            iterations, [actor_name], *loaded, {actor_name: callbacks}, {}
+        )[actor_name]
+
+    def run_actor_iterations(
+        self,
+        iterations: Sequence[int],
+        scenario_name: str,
+        actor_names: Sequence[str],
+        params: Dict[str, act.ParamsType],
+        callbacks: Dict[str, List[ActionCallbackType]],
+        step: str,
+        seed: int,
+        n_jobs: int = 1,
+        sinks: Optional[Dict[str, res.ResultSink]] = None,
+    ) -> Dict[str, SimulationResultType]:
+        """Run the vector actors side by side, or fall back to `Simulator`.
+
+        The scenario of each iteration is read once and its lines are given
+        to every vector actor, so the loader needs a vector actor for each
+        of `actor_names`.
+        """
+        loaded = self._load_vectors(
+            iterations, scenario_name, actor_names, params, step, seed
+        )
+        if loaded is None:
+            return super().run_actor_iterations(
+                iterations,
+                scenario_name,
+                actor_names,
+                params,
+                callbacks,
+                step,
+                seed,
+                n_jobs=n_jobs,
+                sinks=sinks,
+            )
+
+        return self._run_vectors(
+            iterations,
+            actor_names,
+            *loaded,
+            callbacks,
+            sinks if sinks is not None else {},
+        )
+
+    def _load_vectors(
+        self,
+        iterations: Sequence[int],
+        scenario_name: str,
+        actor_names: Sequence[str],
+        params: Dict[str, act.ParamsType],
+        step: str,
+        seed: int,
+    ) -> Optional[Tuple[List[scen.Scenario], List[act.VectorActor], float]]:
+        load_vector = getattr(self.actor_loader, "load_vector", None)
+        if load_vector is None:
+            return None
+
+        started = time.perf_counter()
+        scenarios = [
+            self.scenario_loader.load(scenario_name, step, seed + ite)
+            for ite in iterations
+        ]
+        scenario_loaded = time.perf_counter()
+        synopses = [scenario.synopsis() for scenario in scenarios]
+        actors: List[act.VectorActor] = []
+        for actor_name in actor_names:
+            actor = load_vector(
+                actor_name,
+                synopses,
+                params[actor_name],
+                [seed + ite + 1 for ite in iterations],
+            )
+            if actor is None:
+                return None
+            actors.append(actor)
+
+        if self.profiler is not None:
+            actor_loaded = time.perf_counter()
+            self.profiler.add(
+                "scenario_load", scenario_loaded - started, len(iterations)
+            )
+            self.profiler.add(
+                "actor_load", actor_loaded - scenario_loaded, len(actor_names)
+            )
+            scenarios = [
+                cast(scen.Scenario, prof.TimedScenario(scenario, self.profiler))
+                for scenario in scenarios
+            ]
+            actors = [
+                cast(act.VectorActor, prof.TimedActor(actor, self.profiler))
+                for actor in actors
+            ]
+
+        return scenarios, actors, started
+
+    def _run_vectors(
+        self,
+        iterations: Sequence[int],
+        actor_names: Sequence[str],
+        scenarios: Sequence[scen.Scenario],
+        actors: Sequence[act.VectorActor],
+        started: float,
+        callbacks: Dict[str, List[ActionCallbackType]],
+        sinks: Dict[str, res.ResultSink],
+    ) -> Dict[str, SimulationResultType]:
+        retains = [
+            len(callbacks.get(actor_name, [])) == 0 for actor_name in actor_names
+        ]
+        writers = [
+            [self._open(ite, retain, sinks.get(actor_name)) for ite in iterations]
+            for actor_name, retain in zip(actor_names, retains)
+        ]
+        self._run_lockstep(scenarios, actors, writers)
+
+        outputs = {
+            actor_name: [writer.close() for writer in actor_writers]
+            for actor_name, actor_writers in zip(actor_names, writers)
+        }
+        if self.profiler is not None:
+            # Iterations run in lockstep, so their wall time is shared.
+            self.profiler.add(
+                "iteration", time.perf_counter() - started, len(iterations)
+            )
+            self.profiler.count(
+                "steps",
+                sum(
+                    len(writer) for actor_writers in writers for writer in actor_writers
+                ),
+            )
+
+        results: Dict[str, SimulationResultType] = {}
+        for actor_name, retain in zip(actor_names, retains):
+            if retain:
+                results[actor_name] = outputs[actor_name]
+                continue
+
+            with self._dispatched(callbacks[actor_name]) as actor_callbacks:
+                for ite, result in zip(iterations, outputs[actor_name]):
+                    replay_callbacks(actor_callbacks, ite, result)
+            results[actor_name] = [
+                self._reduce(result) for result in outputs[actor_name]
+            ]
+
+        return results
+
+    def _run_lockstep(
+        self,
+        scenarios: Sequence[scen.Scenario],
+        actors: Sequence[act.VectorActor],
+        writers: Sequence[Sequence[res.ResultWriter]],
+    ) -> None:
+        steps: List[List[Tuple[npt.NDArray[Any], act.ActionBlockType]]] = [
+            [] for _ in actors
+        ]
+        n_steps = 0
+        running = np.arange(len(scenarios))
+        while True:
+            running = running[[scenarios[ite].scan() for ite in running]]
+            if len(running) == 0:
+                break
+
+            lines = [scenarios[ite].line() for ite in running]
+            for actor, actor_steps in zip(actors, steps):
+                actor_steps.append((running, actor.act_vector(lines, running)))
+            n_steps += 1
+            if n_steps >= max(1, self.batch_size):
+                for actor_steps, actor_writers in zip(steps, writers):
+                    _write_steps(actor_steps, actor_writers)
+                steps = [[] for _ in actors]
+                n_steps = 0
+
+        for actor_steps, actor_writers in zip(steps, writers):
+            _write_steps(actor_steps, actor_writers)
+
+
+def _write_steps(
+    steps: Sequence[Tuple[npt.NDArray[Any], act.ActionBlockType]],
+    writers: Sequence[res.ResultWriter],
+) -> None:
+    # Finished iterations never run again, so each iteration occupies the
+    # leading rows of its column in the stacked steps.
+    n_ite = len(writers)
+    counts = np.zeros(n_ite, dtype=np.int64)
+    stacked: Dict[str, Dict[str, npt.NDArray[Any]]] = {
+        field: {} for field in res.FIELDS
+    }
+    for i, (running, block) in enumerate(steps):
+        counts[running] += 1
+        for field, values in (("metric", block["metric"]), ("result", block["result"])):
+            for key, value in values.items():
+                value = np.asarray(value)
+                column = stacked[field].get(key)
+                if column is None:
+                    column = stacked[field][key] = np.empty(
+                        (len(steps), n_ite), dtype=value.dtype
+                    )
+                column[i, running] = value
+
+    for ite, writer in enumerate(writers):
+        n = counts[ite]
+        if n == 0:
+            continue
+
+        writer.extend(
+            {
+                "metric": {key: c[:n, ite] for key, c in stacked["metric"].items()},
+                "result": {key: c[:n, ite] for key, c in stacked["result"].items()},
+            }
+        )
+
+
+def replay_callbacks(
+    callbacks: List[ActionCallbackType], current_ite: int, result: IterationResultType
+) -> None:
+    if len(callbacks) == 0:
+        return
+
+    for i, action in enumerate(result):
+        # Actions reduced by a retention policy keep their own step.
+        step = action["result"].get(ret.STEP_KEY, i)
+        for callback in callbacks:
+            callback(current_ite, step, action)
+
+
+def shard_iterations(n_ite: int, n_shards: int) -> List[Tuple[int, int]]:
+    """Split `n_ite` iterations into contiguous `(start, stop)` ranges.
+
+    The ranges differ in size by at most one, and there are no more of them
+    than iterations, so that no shard is empty unless `n_ite` is zero.
+    """
+    n_shards = max(1, min(n_shards, n_ite))
+    quotient, remainder = divmod(n_ite, n_shards)
+    shards = []
+    start = 0
+    for i in range(n_shards):
+        stop = start + quotient + (1 if i < remainder else 0)
+        shards.append((start, stop))
+        start = stop
+    return shards
+
+
+def resolve_n_jobs(n_jobs: int) -> int:
+    if n_jobs < 0:
+        return max(1, (os.cpu_count() or 1) + 1 + n_jobs)
+    return max(1, n_jobs)
+
+
+_worker_simulator: Optional[Simulator] = None
+
+
+def _init_worker(simulator: Simulator) -> None:
+    # Unpickling the simulator imports the scenario and actor loader modules,
+    # so each worker pays for it only once.
+    global _worker_simulator
+    _worker_simulator = simulator
+
+
+def _run_worker(
+    task: Tuple[int, str, str, act.ParamsType, str, int, bool]
+) -> Tuple[IterationResultType, Optional[prof.Profiler]]:
+    assert _worker_simulator is not None
+    current_ite, scenario_name, actor_name, params, step, seed, retain = task
+    # Each task returns its own timings for the parent to merge.
+    if _worker_simulator.profiler is not None:
+        _worker_simulator.profiler = prof.Profiler()
+    result = _worker_simulator._run_scenario(
+        current_ite, scenario_name, actor_name, params, [], step, seed, retain
+    )
+    return result, _worker_simulator.profiler
+
+
+def _run_actors_worker(
+    task: Tuple[int, str, Sequence[str], Dict[str, act.ParamsType], str, int],
+    sinks: Dict[str, res.ResultSink],
+    retain: bool,
+) -> Tuple[Dict[str, IterationResultType], Optional[prof.Profiler]]:
+    assert _worker_simulator is not None
+    if _worker_simulator.profiler is not None:
+        _worker_simulator.profiler = prof.Profiler()
+    output = _worker_simulator._run_actors_scenario(*task, {}, sinks, retain)
+    return output, _worker_simulator.profiler
@@ -0,0 +1,337 @@
+import bisect
+import json
+import os
+from typing import Any, Dict, List, Optional, Tuple, cast
+
+import numpy as np
+import numpy.typing as npt
+
+from . import actor as act
+from . import result as res
+
+META_FILENAME = "meta.json"
+
+
+class SpillSink:
+    """Result sink which streams each iteration to files under a directory.
+
+    Each iteration is written to its own sub directory in chunks of
+    `chunk_size` steps, so at most one chunk per process is kept in memory.
+    Columns of plain dtypes are consolidated into one memory-mapped file,
+    while object columns, which cannot be memory-mapped, are kept as their
+    chunks and read one chunk at a time.
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        chunk_size: int = 65536,
+        float_dtype: npt.DTypeLike = np.float64,
+    ) -> None:
+        self.directory = os.path.abspath(directory)
+        self.chunk_size = chunk_size
+        self.float_dtype = float_dtype
+
+    def open(self, current_ite: int) -> "SpillWriter":
+        return SpillWriter(
+            os.path.join(self.directory, f"{current_ite:06d}"),
+            self.chunk_size,
+            self.float_dtype,
+        )
+
+
+class SpillWriter:
+    def __init__(self, path: str, chunk_size: int, float_dtype: npt.DTypeLike) -> None:
+        os.makedirs(path, exist_ok=True)
+        self.path = path
+        self.chunk_size = chunk_size
+        self.float_dtype = np.dtype(float_dtype)
+
+        self._buffer = res.IterationResult(self.float_dtype)
+        self._chunk_sizes: List[int] = []
+        self._n_flushed = 0
+        self._keys: Dict[str, Dict[str, List[Optional[np.dtype[Any]]]]] = {
+            field: {} for field in res.FIELDS
+        }
+
+    def __len__(self) -> int:
+        return self._n_flushed + len(self._buffer)
+
+    def append(self, action: act.ActionType) -> None:
+        self._buffer.append(action)
+        if len(self._buffer) >= self.chunk_size:
+            self._flush()
+
+    def extend(self, block: act.ActionBlockType) -> None:
+        self._buffer.extend(block)
+        if len(self._buffer) >= self.chunk_size:
+            self._flush()
+
+    def close(self) -> "MappedIterationResult":
+        self._flush()
+
+        columns: Dict[str, List[Dict[str, Any]]] = {field: [] for field in res.FIELDS}
+        for field, keys in self._keys.items():
+            for i, (key, dtypes) in enumerate(keys.items()):
+                is_object, has_missing = self._consolidate(field, i, dtypes)
+                column: Dict[str, Any] = {
+                    "key": key,
+                    "object": is_object,
+                    "missing": has_missing,
+                }
+                if is_object:
+                    column["chunks"] = [
+                        chunk for chunk, dtype in enumerate(dtypes) if dtype is not None
+                    ]
+                columns[field].append(column)
+
+        meta = {
+            "size": self._n_flushed,
+            "float_dtype": self.float_dtype.str,
+            "chunk_sizes": self._chunk_sizes,
+            "columns": columns,
+        }
+        with open(os.path.join(self.path, META_FILENAME), "w") as f:
+            json.dump(meta, f)
+
+        return MappedIterationResult(self.path)
+
+    def _flush(self) -> None:
+        n = len(self._buffer)
+        if n == 0:
+            return
+
+        chunk = len(self._chunk_sizes)
+        for field, keys in self._keys.items():
+            buffered_columns = self._buffer._columns[field]
+            for key in buffered_columns:
+                if key not in keys:
+                    keys[key] = [None] * chunk
+
+            for i, (key, dtypes) in enumerate(keys.items()):
+                column = buffered_columns.get(key)
+                if column is None:
+                    dtypes.append(None)
+                    continue
+
+                values = column.values()
+                np.save(self._chunk_path(field, i, chunk), values, allow_pickle=True)
+                missing = column.missing()
+                if missing is not None:
+                    np.save(self._chunk_path(field, i, chunk, "missing"), missing)
+                dtypes.append(values.dtype)
+
+        self._chunk_sizes.append(n)
+        self._n_flushed += n
+        self._buffer = res.IterationResult(self.float_dtype)
+
+    def _consolidate(
+        self, field: str, i: int, dtypes: List[Optional[np.dtype[Any]]]
+    ) -> Tuple[bool, bool]:
+        dtype = res.promote_dtype(
+            [dtype for dtype in dtypes if dtype is not None], self.float_dtype
+        )
+        is_object = dtype.kind == "O"
+        has_missing = any(
+            chunk_dtype is None
+            or os.path.exists(self._chunk_path(field, i, chunk, "missing"))
+            for chunk, chunk_dtype in enumerate(dtypes)
+        )
+
+        data: Optional[npt.NDArray[Any]] = None
+        if not is_object:
+            data = np.lib.format.open_memmap(  # type: ignore
+                self._column_path(field, i),
+                mode="w+",
+                dtype=dtype,
+                shape=(self._n_flushed,),
+            )
+        missing: Optional[npt.NDArray[Any]] = None
+        if has_missing:
+            missing = np.lib.format.open_memmap(  # type: ignore
+                self._column_path(field, i, "missing"),
+                mode="w+",
+                dtype=np.bool_,
+                shape=(self._n_flushed,),
+            )
+
+        start = 0
+        for chunk, (n, chunk_dtype) in enumerate(zip(self._chunk_sizes, dtypes)):
+            stop = start + n
+            if chunk_dtype is None:
+                if missing is not None:
+                    missing[start:stop] = True
+            else:
+                if data is not None:
+                    path = self._chunk_path(field, i, chunk)
+                    data[start:stop] = _load(path, chunk_dtype.kind == "O")
+                    os.remove(path)
+
+                missing_path = self._chunk_path(field, i, chunk, "missing")
+                if os.path.exists(missing_path):
+                    if missing is not None:
+                        missing[start:stop] = np.load(missing_path)
+                    os.remove(missing_path)
+            start = stop
+
+        for array in (data, missing):
+            if isinstance(array, np.memmap):
+                array.flush()
+
+        return is_object, has_missing
+
+    def _column_path(self, field: str, i: int, suffix: str = "values") -> str:
+        return os.path.join(self.path, f"{field}_{i}.{suffix}.npy")
+
+    def _chunk_path(
+        self, field: str, i: int, chunk: int, suffix: str = "values"
+    ) -> str:
+        return os.path.join(self.path, f"{field}_{i}.{chunk:06d}.{suffix}.npy")
+
+
+class MappedIterationResult(res.IterationResult):
+    """Iteration result backed by memory-mapped files written by SpillWriter.
+
+    Only the path is pickled, so the handle is cheap to pass between
+    processes and steps as long as the directory is kept.
+    """
+
+    __slots__ = ("_path", "_chunk_sizes")
+
+    def __init__(self, path: str) -> None:
+        self._open(path)
+
+    def __getstate__(self) -> Dict[str, Any]:
+        return {"path": self._path}
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        self._open(state["path"])
+
+    @property
+    def path(self) -> str:
+        return self._path
+
+    def append(self, action: act.ActionType) -> None:
+        raise TypeError(f"{self.__class__.__name__} is read-only")
+
+    def extend(self, block: act.ActionBlockType) -> None:
+        raise TypeError(f"{self.__class__.__name__} is read-only")
+
+    def _open(self, path: str) -> None:
+        with open(os.path.join(path, META_FILENAME), "r") as f:
+            meta = json.load(f)
+
+        self._path = path
+        self._float_dtype = np.dtype(meta["float_dtype"])
+        self._size = meta["size"]
+        self._chunk_sizes = meta.get("chunk_sizes", [])
+        self._columns = {
+            field: {
+                column["key"]: self._load_column(field, i, column)
+                for i, column in enumerate(columns)
+            }
+            for field, columns in meta["columns"].items()
+        }
+
+    def _load_column(self, field: str, i: int, column: Dict[str, Any]) -> res.Column:
+        missing = (
+            _load(os.path.join(self._path, f"{field}_{i}.missing.npy"), False)
+            if column["missing"]
+            else None
+        )
+        if "chunks" in column:
+            return ChunkedObjectColumn(
+                self._path, field, i, column["chunks"], self._chunk_sizes, missing
+            )
+
+        data = _load(
+            os.path.join(self._path, f"{field}_{i}.values.npy"), column["object"]
+        )
+        return res.Column.from_array(data, missing, self._float_dtype)
+
+
+class ChunkedObjectColumn(res.Column):
+    """Object column read from the chunks spilled by SpillWriter.
+
+    Reading a step loads only the chunk of the step, and the last loaded
+    chunk is kept, so reading the steps in order keeps one chunk in memory.
+    Reading the whole column by `values` loads every chunk.
+    """
+
+    __slots__ = ("_paths", "_starts", "_stops", "_loaded", "_loaded_chunk")
+
+    def __init__(
+        self,
+        path: str,
+        field: str,
+        i: int,
+        chunks: List[int],
+        chunk_sizes: List[int],
+        missing: Optional[npt.NDArray[Any]],
+    ) -> None:
+        super().__init__()
+        offsets = np.concatenate([[0], np.cumsum(chunk_sizes)]).astype(int).tolist()
+        self._paths = [
+            os.path.join(path, f"{field}_{i}.{chunk:06d}.values.npy")
+            for chunk in chunks
+        ]
+        self._starts = [offsets[chunk] for chunk in chunks]
+        self._stops = [offsets[chunk + 1] for chunk in chunks]
+        self._loaded: Optional[npt.NDArray[Any]] = None
+        self._loaded_chunk = -1
+        self._missing = missing
+        self._size = offsets[-1]
+
+    def __getitem__(self, index: int) -> Any:
+        if index < 0:
+            index += self._size
+        chunk = bisect.bisect_right(self._starts, index) - 1
+        if chunk < 0 or index >= self._stops[chunk]:
+            return None
+        return self._load_chunk(chunk)[index - self._starts[chunk]]
+
+    def is_missing(self, index: int) -> bool:
+        if self._missing is None or index >= len(self._missing):
+            return False
+        return bool(self._missing[index])
+
+    def values(self) -> npt.NDArray[Any]:
+        data = np.empty(self._size, dtype=object)
+        for chunk, (start, stop) in enumerate(zip(self._starts, self._stops)):
+            data[start:stop] = self._load_chunk(chunk)
+        return data
+
+    def missing(self) -> Optional[npt.NDArray[Any]]:
+        if self._missing is None:
+            return None
+        return np.asarray(self._missing)
+
+    def take(self, index: slice) -> res.Column:
+        return res.Column.from_array(
+            self.values(), self.missing(), self._float_dtype
+        ).take(index)
+
+    def __reduce__(self) -> Tuple[Any, ...]:
+        return res.Column.from_array, (self.values(), self.missing(), self._float_dtype)
+
+    def _load_chunk(self, chunk: int) -> npt.NDArray[Any]:
+        if chunk != self._loaded_chunk:
+            # Chunks of plain dtypes hold NumPy scalars, which are turned
+            # into Python objects as in an object array.
+            self._loaded = _load(self._paths[chunk], True).astype(object)
+            self._loaded_chunk = chunk
+        return cast(npt.NDArray[Any], self._loaded)
+
+
+def _load(path: str, is_object: bool) -> npt.NDArray[Any]:
+    if is_object:
+        return np.load(path, allow_pickle=True)  # type: ignore
+    return np.load(path, mmap_mode="r")  # type: ignore
+
+
+def load(directory: str) -> List[MappedIterationResult]:
+    return [
+        MappedIterationResult(os.path.join(directory, name))
+        for name in sorted(os.listdir(directory))
+        if os.path.exists(os.path.join(directory, name, META_FILENAME))
+    ]
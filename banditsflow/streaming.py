@@ -0,0 +1,210 @@
+import glob
+import os
+import queue
+import threading
+from typing import Any, Dict, Iterator, Optional, Sequence
+
+import numpy as np
+import numpy.typing as npt
+
+from . import scenario
+
+ChunkType = Dict[str, npt.NDArray[Any]]
+
+DEFAULT_CHUNK_SIZE = 65536
+
+
+class ColumnarScenario:
+    """Scenario streaming lines from columnar files in chunks.
+
+    `path` is a directory of `{key}.npy` files with one row per line, a CSV
+    file (needs pandas) or a Parquet file (needs pyarrow). A background
+    thread reads up to `prefetch` chunks ahead, so at most `prefetch + 1`
+    chunks are in memory and reading overlaps with the actor. Lines are
+    views into the current chunk, so an actor must copy a value if it keeps
+    it beyond the chunk.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        synopsis: Optional[scenario.SynopsisType] = None,
+        *,
+        columns: Optional[Sequence[str]] = None,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+        prefetch: int = 2,
+    ) -> None:
+        self._synopsis = synopsis if synopsis is not None else {}
+        self._prefetcher = Prefetcher(
+            read_chunks(path, chunk_size, columns), max(1, prefetch)
+        )
+        self._chunk: ChunkType = {}
+        self._size = 0
+        self._i = -1
+
+    def synopsis(self) -> scenario.SynopsisType:
+        return self._synopsis
+
+    def scan(self) -> bool:
+        self._i += 1
+        if self._i < self._size:
+            return True
+
+        if not self._next_chunk():
+            return False
+        self._i = 0
+        return True
+
+    def line(self) -> scenario.LineType:
+        return {key: column[self._i] for key, column in self._chunk.items()}
+
+    def lines(self, max_n: int) -> scenario.LinesType:
+        # Lines never span two chunks, so they are always views.
+        start = self._i + 1
+        if start >= self._size:
+            if not self._next_chunk():
+                return {key: column[:0] for key, column in self._chunk.items()}
+            start = 0
+
+        n = max(0, min(max_n, self._size - start))
+        self._i = start + n - 1
+        return {key: column[start : start + n] for key, column in self._chunk.items()}
+
+    def close(self) -> None:
+        self._prefetcher.close()
+
+    def __del__(self) -> None:
+        # Stop the thread of a scenario which was not read to the end.
+        prefetcher = getattr(self, "_prefetcher", None)
+        if prefetcher is not None:
+            prefetcher.close()
+
+    def _next_chunk(self) -> bool:
+        chunk = self._prefetcher.get()
+        if chunk is None:
+            self._size = 0
+            return False
+
+        self._chunk = chunk
+        self._size = count_rows(chunk)
+        return True
+
+
+class Prefetcher:
+    """Iterator of chunks read by a background thread into a bounded queue."""
+
+    _END = object()
+
+    def __init__(self, chunks: Iterator[ChunkType], depth: int) -> None:
+        self._queue: "queue.Queue[Any]" = queue.Queue(maxsize=depth)
+        self._closed = threading.Event()
+        self._done = False
+        self._thread = threading.Thread(target=self._run, args=(chunks,), daemon=True)
+        self._thread.start()
+
+    def get(self) -> Optional[ChunkType]:
+        if self._done:
+            return None
+
+        item = self._queue.get()
+        if item is self._END:
+            self._done = True
+            return None
+        if isinstance(item, BaseException):
+            self._done = True
+            raise item
+        chunk: ChunkType = item
+        return chunk
+
+    def close(self) -> None:
+        self._closed.set()
+        self._done = True
+        # Unblock the thread waiting for a free slot.
+        while self._thread.is_alive():
+            try:
+                self._queue.get(timeout=0.01)
+            except queue.Empty:
+                pass
+        self._thread.join()
+
+    def _run(self, chunks: Iterator[ChunkType]) -> None:
+        try:
+            for chunk in chunks:
+                if not self._put(chunk):
+                    return
+            self._put(self._END)
+        except BaseException as e:
+            self._put(e)
+
+    def _put(self, item: Any) -> bool:
+        while not self._closed.is_set():
+            try:
+                self._queue.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                pass
+        return False
+
+
+def read_chunks(
+    path: str, chunk_size: int, columns: Optional[Sequence[str]] = None
+) -> Iterator[ChunkType]:
+    if os.path.isdir(path):
+        return read_npy_chunks(path, chunk_size, columns)
+
+    extension = os.path.splitext(path)[1].lower()
+    if extension == ".csv":
+        return read_csv_chunks(path, chunk_size, columns)
+    elif extension in (".parquet", ".pq"):
+        return read_parquet_chunks(path, chunk_size, columns)
+    else:
+        raise ValueError(f"Unknown columnar file: {path}")
+
+
+def read_npy_chunks(
+    directory: str, chunk_size: int, columns: Optional[Sequence[str]] = None
+) -> Iterator[ChunkType]:
+    if columns is None:
+        paths = sorted(glob.glob(os.path.join(directory, "*.npy")))
+        columns = [os.path.splitext(os.path.basename(path))[0] for path in paths]
+    arrays = {
+        key: np.load(os.path.join(directory, f"{key}.npy"), mmap_mode="r")
+        for key in columns
+    }
+    n = min((len(array) for array in arrays.values()), default=0)
+
+    for start in range(0, n, chunk_size):
+        # Copying the memory mapped rows is where the file is actually read.
+        yield {
+            key: np.array(array[start : start + chunk_size])
+            for key, array in arrays.items()
+        }
+
+
+def read_csv_chunks(
+    path: str, chunk_size: int, columns: Optional[Sequence[str]] = None
+) -> Iterator[ChunkType]:
+    import pandas as pd
+
+    with pd.read_csv(path, usecols=columns, chunksize=chunk_size) as reader:
+        for frame in reader:
+            yield {str(key): frame[key].to_numpy() for key in frame.columns}
+
+
+def read_parquet_chunks(
+    path: str, chunk_size: int, columns: Optional[Sequence[str]] = None
+) -> Iterator[ChunkType]:
+    import pyarrow.parquet as pq  # type: ignore
+
+    parquet_file = pq.ParquetFile(path)
+    for batch in parquet_file.iter_batches(batch_size=chunk_size, columns=columns):
+        yield {
+            name: batch.column(i).to_numpy(zero_copy_only=False)
+            for i, name in enumerate(batch.schema.names)
+        }
+
+
+def count_rows(chunk: ChunkType) -> int:
+    for column in chunk.values():
+        return len(column)
+    return 0
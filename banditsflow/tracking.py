@@ -0,0 +1,108 @@
+import functools
+import math
+import queue
+import threading
+import time
+from types import TracebackType
+from typing import Iterable, List, Optional, Type
+
+import mlflow
+from mlflow.entities import Metric
+from mlflow.tracking import MlflowClient
+
+MAX_METRICS_PER_BATCH = 1000
+
+
+class BatchMetricLogger:
+    """Metric logger which sends metrics to an MLflow run in batches.
+
+    Metrics are queued by `log_metric` and sent with `MlflowClient.log_batch`
+    from a background thread whenever `batch_size` metrics are collected or
+    `flush_interval` seconds pass. `close` drains the queue before returning.
+    """
+
+    def __init__(
+        self,
+        run_id: str,
+        client: Optional[MlflowClient] = None,
+        batch_size: int = MAX_METRICS_PER_BATCH,
+        flush_interval: float = 1.0,
+        max_queue_size: int = 100000,
+    ) -> None:
+        self.run_id = run_id
+        self.client = client if client is not None else MlflowClient()
+        self.batch_size = min(batch_size, MAX_METRICS_PER_BATCH)
+        self.flush_interval = flush_interval
+
+        self._queue: "queue.Queue[Optional[Metric]]" = queue.Queue(max_queue_size)
+        self._error: Optional[BaseException] = None
+        self._thread = threading.Thread(target=self._consume, daemon=True)
+        self._thread.start()
+
+    def __enter__(self) -> "BatchMetricLogger":
+        return self
+
+    def __exit__(
+        self,
+        exc_type: Optional[Type[BaseException]],
+        exc_value: Optional[BaseException],
+        traceback: Optional[TracebackType],
+    ) -> None:
+        self.close()
+
+    def log_metric(self, key: str, value: float, step: int) -> None:
+        timestamp = int(time.time() * 1000)
+        self._queue.put(Metric(key, float(value), timestamp, step))
+
+    def log_series(self, key: str, values: Iterable[float]) -> None:
+        for step, value in enumerate(values):
+            if not math.isnan(value):
+                self.log_metric(key, value, step)
+
+    def close(self) -> None:
+        if self._thread.is_alive():
+            self._queue.put(None)
+            self._thread.join()
+
+        if self._error is not None:
+            error, self._error = self._error, None
+            raise error
+
+    def _consume(self) -> None:
+        batch: List[Metric] = []
+        while True:
+            try:
+                metric = self._queue.get(timeout=self.flush_interval)
+            except queue.Empty:
+                self._flush(batch)
+                continue
+
+            if metric is None:
+                self._flush(batch)
+                return
+
+            batch.append(metric)
+            if len(batch) >= self.batch_size:
+                self._flush(batch)
+
+    def _flush(self, batch: List[Metric]) -> None:
+        if len(batch) == 0:
+            return
+
+        # Keep consuming after a failure so that producers never block on a
+        # full queue; the error is raised from close instead.
+        if self._error is None:
+            try:
+                self.client.log_batch(self.run_id, metrics=list(batch))
+            except Exception as e:
+                self._error = e
+        batch.clear()
+
+
+@functools.lru_cache(maxsize=None)
+def experiment_id(experiment_name: str) -> str:
+    experiment = mlflow.get_experiment_by_name(experiment_name)
+    if experiment is not None:
+        return str(experiment.experiment_id)
+
+    return str(mlflow.create_experiment(experiment_name))
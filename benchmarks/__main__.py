@@ -0,0 +1,40 @@
+import json
+from typing import Optional
+
+import click
+
+from . import suite
+
+
+@click.command()
+@click.option(
+    "--output", default="benchmarks.json", help="Name of JSON file for the results"
+)
+@click.option("--quick", is_flag=True, help="Run only a small parameter grid")
+@click.option("--repeat", type=int, default=3, help="Number of repeats of each case")
+@click.option(
+    "--baseline",
+    default=None,
+    help="Name of JSON file of a previous run to compare the results with",
+)
+def main(output: str, quick: bool, repeat: int, baseline: Optional[str]) -> None:
+    grid = suite.QUICK_GRID if quick else suite.DEFAULT_GRID
+    records = suite.run(grid, repeat=repeat)
+    report = {"environment": suite.environment(), "grid": grid, "results": records}
+
+    if baseline is not None:
+        with open(baseline, "r") as f:
+            report["comparisons"] = suite.compare(json.load(f)["results"], records)
+
+    with open(output, "w") as f:
+        json.dump(report, f, indent=2)
+
+    for record in records:
+        params = ", ".join(f"{k}={v}" for k, v in record["params"].items())
+        click.echo(
+            f"{record['name']} ({params}): {record['value']:.6g} {record['unit']}"
+        )
+
+
+if __name__ == "__main__":
+    main()
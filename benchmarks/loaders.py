@@ -0,0 +1,102 @@
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+from banditsflow import actor as act
+from banditsflow import algorithms, scenario
+from banditsflow import suggestion as suggest
+
+# Synthetic loaders modelled on the scaffold templates. The scenario name
+# encodes its size like "arms=10,horizon=1000" so that one loader covers the
+# whole parameter grid.
+
+
+def scenario_name(num_arms: int, horizon: int) -> str:
+    return f"arms={num_arms},horizon={horizon}"
+
+
+def parse_scenario_name(name: str) -> Dict[str, int]:
+    pairs = [item.split("=") for item in name.split(",")]
+    return {key: int(value) for key, value in pairs}
+
+
+class StationaryScenario:
+    def __init__(self, num_arms: int, horizon: int) -> None:
+        self.i = -1
+        self.n_ite = horizon
+        self.num_arms = num_arms
+        self.thetas = [1.0 / 1.5**i for i in range(1, 1 + self.num_arms)]
+
+    def synopsis(self) -> scenario.SynopsisType:
+        return {"num_arms": self.num_arms}
+
+    def scan(self) -> bool:
+        self.i += 1
+        return self.i < self.n_ite
+
+    def line(self) -> scenario.LineType:
+        return {"thetas": self.thetas}
+
+    def lines(self, max_n: int) -> scenario.LinesType:
+        n = max(0, min(max_n, self.n_ite - self.i - 1))
+        self.i += n
+        return {"thetas": np.broadcast_to(self.thetas, (n, self.num_arms))}
+
+
+class ScenarioLoader:
+    @staticmethod
+    def load(name: str, step: str, seed: int) -> scenario.Scenario:
+        size = parse_scenario_name(name)
+        return StationaryScenario(size["arms"], size["horizon"])
+
+
+class ActorLoader:
+    @staticmethod
+    def load(
+        name: str, synopsis: scenario.SynopsisType, params: act.ParamsType, seed: int
+    ) -> act.Actor:
+        if name == "epsilon_greedy":
+            return algorithms.Environment(
+                synopsis, params, algorithms.EpsilonGreedy, seed
+            )
+        elif name == "ucb1":
+            return algorithms.Environment(synopsis, params, algorithms.UCB1, seed)
+        else:
+            return algorithms.Environment(
+                synopsis, params, algorithms.ThompsonSampling, seed
+            )
+
+    @staticmethod
+    def load_vector(
+        name: str,
+        synopses: Sequence[scenario.SynopsisType],
+        params: act.ParamsType,
+        seeds: Sequence[int],
+    ) -> Optional[act.VectorActor]:
+        if name == "epsilon_greedy":
+            return algorithms.VectorEnvironment(
+                synopses[0], params, algorithms.VectorEpsilonGreedy, seeds
+            )
+        elif name == "ucb1":
+            return algorithms.VectorEnvironment(
+                synopses[0], params, algorithms.VectorUCB1, seeds
+            )
+        else:
+            return algorithms.VectorEnvironment(
+                synopses[0], params, algorithms.VectorThompsonSampling, seeds
+            )
+
+
+class SuggestionLoader:
+    @staticmethod
+    def load(name: str) -> List[suggest.SuggestionType]:
+        if name != "epsilon_greedy":
+            return []
+
+        suggestion: suggest.DiscreteUniformSuggestion = {
+            "name": "epsilon",
+            "type": "discrete_uniform",
+            "low": 0.1,
+            "high": 1.0,
+            "q": 0.1,
+        }
+        return [suggestion]
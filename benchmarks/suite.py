@@ -0,0 +1,275 @@
+import itertools
+import logging
+import platform
+import subprocess
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, List, Sequence, TypedDict
+
+import numpy as np
+import optuna
+from banditsflow import optimizer as optim
+from banditsflow import result as res
+from banditsflow import simulator as sim
+from banditsflow import suggestion as suggest
+
+from . import loaders
+
+
+class GridType(TypedDict):
+    actors: Sequence[str]
+    arms: Sequence[int]
+    horizon: Sequence[int]
+    n_ite: Sequence[int]
+    n_trials: Sequence[int]
+
+
+class RecordType(TypedDict):
+    name: str
+    params: Dict[str, Any]
+    value: float
+    unit: str
+
+
+DEFAULT_GRID: GridType = {
+    "actors": ["epsilon_greedy", "ucb1", "thompson_sampling"],
+    "arms": [2, 10, 100],
+    "horizon": [1000, 10000],
+    "n_ite": [1, 10, 100],
+    "n_trials": [10, 50],
+}
+
+QUICK_GRID: GridType = {
+    "actors": ["epsilon_greedy"],
+    "arms": [10],
+    "horizon": [1000],
+    "n_ite": [1, 10],
+    "n_trials": [10],
+}
+
+SIMULATORS = ["line", "batch", "vectorized"]
+
+EPSILON: Dict[str, Any] = {"epsilon": 0.1}
+
+
+def best_of(repeat: int, func: Callable[[], Any]) -> float:
+    """Return the shortest wall time of `repeat` calls to `func`."""
+    seconds = []
+    for _ in range(max(1, repeat)):
+        start = time.perf_counter()
+        func()
+        seconds.append(time.perf_counter() - start)
+    return min(seconds)
+
+
+def create_simulator(mode: str) -> sim.Simulator:
+    if mode == "line":
+        return sim.Simulator(loaders.ScenarioLoader, loaders.ActorLoader, batch_size=0)
+    elif mode == "batch":
+        return sim.Simulator(loaders.ScenarioLoader, loaders.ActorLoader)
+    elif mode == "vectorized":
+        return sim.VectorizedSimulator(loaders.ScenarioLoader, loaders.ActorLoader)
+    else:
+        raise ValueError(f"Unknown simulator: {mode}")
+
+
+def bench_simulator(
+    mode: str, actor: str, num_arms: int, horizon: int, n_ite: int, repeat: int
+) -> RecordType:
+    simulator = create_simulator(mode)
+    name = loaders.scenario_name(num_arms, horizon)
+    seconds = best_of(
+        repeat,
+        lambda: simulator.run(n_ite, name, actor, EPSILON, [], "evaluate", 1),
+    )
+    return {
+        "name": "simulator.steps_per_second",
+        "params": {
+            "simulator": mode,
+            "actor": actor,
+            "arms": num_arms,
+            "horizon": horizon,
+            "n_ite": n_ite,
+        },
+        "value": (horizon * n_ite) / seconds,
+        "unit": "steps/s",
+    }
+
+
+def bench_optimizer(
+    num_arms: int, horizon: int, n_trials: int, repeat: int
+) -> RecordType:
+    optimizer = optim.Optimizer(
+        loaders.ScenarioLoader, loaders.ActorLoader, loaders.SuggestionLoader
+    )
+    name = loaders.scenario_name(num_arms, horizon)
+    seconds = best_of(
+        repeat,
+        lambda: optimizer.optimize(
+            n_trials,
+            -1.0,
+            name,
+            "epsilon_greedy",
+            "maximize",
+            "cumulative_reward",
+            1,
+        ),
+    )
+    return {
+        "name": "optimizer.trials_per_second",
+        "params": {"arms": num_arms, "horizon": horizon, "n_trials": n_trials},
+        "value": n_trials / seconds,
+        "unit": "trials/s",
+    }
+
+
+def bench_suggester(n_trials: int, repeat: int) -> RecordType:
+    suggester = suggest.Suggester(loaders.SuggestionLoader.load("epsilon_greedy"))
+
+    def suggest_all() -> float:
+        # Only the suggestions are timed, not asking the sampler for a trial.
+        study = optuna.create_study(sampler=optuna.samplers.TPESampler(seed=1))
+        seconds = 0.0
+        for _ in range(n_trials):
+            trial = study.ask()
+            start = time.perf_counter()
+            suggester.suggest(trial)
+            seconds += time.perf_counter() - start
+            study.tell(trial, 0.0)
+        return seconds
+
+    seconds = min(suggest_all() for _ in range(max(1, repeat)))
+    return {
+        "name": "suggester.seconds_per_suggest",
+        "params": {"n_trials": n_trials},
+        "value": seconds / n_trials,
+        "unit": "s",
+    }
+
+
+def bench_result_memory(actor: str, num_arms: int, horizon: int) -> List[RecordType]:
+    name = loaders.scenario_name(num_arms, horizon)
+    tracemalloc.start()
+    try:
+        results = create_simulator("batch").run(
+            1, name, actor, EPSILON, [], "evaluate", 1
+        )
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    result = res.as_iteration_result(results[0])
+    stored = sum(
+        result.column(field, key).nbytes
+        for field in res.FIELDS
+        for key in result.keys(field)
+    )
+    params: Dict[str, Any] = {"actor": actor, "arms": num_arms, "horizon": horizon}
+    return [
+        {
+            "name": "result.bytes_per_step",
+            "params": params,
+            "value": stored / len(result),
+            "unit": "B",
+        },
+        {
+            "name": "result.peak_bytes_per_step",
+            "params": params,
+            "value": peak / len(result),
+            "unit": "B",
+        },
+    ]
+
+
+def bench_to_objective(horizon: int, n_ite: int, repeat: int) -> RecordType:
+    name = loaders.scenario_name(2, horizon)
+    results = create_simulator("batch").run(
+        n_ite, name, "epsilon_greedy", EPSILON, [], "evaluate", 1
+    )
+    n_calls = 100
+    seconds = best_of(
+        repeat,
+        lambda: [
+            optim.to_objective("cumulative_reward", results) for _ in range(n_calls)
+        ],
+    )
+    return {
+        "name": "optimizer.to_objective_seconds",
+        "params": {"horizon": horizon, "n_ite": n_ite},
+        "value": seconds / n_calls,
+        "unit": "s",
+    }
+
+
+def run(grid: GridType, repeat: int = 3) -> List[RecordType]:
+    optuna.logging.set_verbosity(logging.WARNING)
+
+    records: List[RecordType] = []
+    for mode, actor, num_arms, horizon, n_ite in itertools.product(
+        SIMULATORS, grid["actors"], grid["arms"], grid["horizon"], grid["n_ite"]
+    ):
+        records.append(bench_simulator(mode, actor, num_arms, horizon, n_ite, repeat))
+
+    for num_arms, horizon, n_trials in itertools.product(
+        grid["arms"], grid["horizon"], grid["n_trials"]
+    ):
+        records.append(bench_optimizer(num_arms, horizon, n_trials, repeat))
+
+    for n_trials in grid["n_trials"]:
+        records.append(bench_suggester(n_trials, repeat))
+
+    for actor, num_arms, horizon in itertools.product(
+        grid["actors"], grid["arms"], grid["horizon"]
+    ):
+        records.extend(bench_result_memory(actor, num_arms, horizon))
+
+    for horizon, n_ite in itertools.product(grid["horizon"], grid["n_ite"]):
+        records.append(bench_to_objective(horizon, n_ite, repeat))
+
+    return records
+
+
+def environment() -> Dict[str, str]:
+    try:
+        revision = subprocess.run(
+            ["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        revision = ""
+
+    return {
+        "revision": revision,
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "optuna": optuna.__version__,
+        "machine": platform.machine(),
+        "processor": platform.processor(),
+    }
+
+
+def compare(
+    baseline: Sequence[RecordType], records: Sequence[RecordType]
+) -> List[Dict[str, Any]]:
+    """Pair the records measured with the same name and parameters."""
+    baseline_values = {_record_key(record): record["value"] for record in baseline}
+    comparisons = []
+    for record in records:
+        base = baseline_values.get(_record_key(record))
+        if base is None or base == 0.0:
+            continue
+        comparisons.append(
+            {
+                "name": record["name"],
+                "params": record["params"],
+                "baseline": base,
+                "value": record["value"],
+                "ratio": record["value"] / base,
+            }
+        )
+    return comparisons
+
+
+def _record_key(record: RecordType) -> str:
+    params = ",".join(f"{k}={v}" for k, v in sorted(record["params"].items()))
+    return f"{record['name']}[{params}]"
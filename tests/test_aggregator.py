@@ -0,0 +1,119 @@
+import numpy as np
+from banditsflow import aggregator as aggregate
+from banditsflow import result as res
+
+
+def test_aggregator_computes_statistics_of_each_step() -> None:
+    values = np.array([[1.0, 2.0], [3.0, 6.0], [5.0, 7.0]])
+    aggregator = aggregate.MetricAggregator()
+    for ite, row in enumerate(values):
+        for step, value in enumerate(row):
+            aggregator(ite, step, {"metric": {"m": value}, "result": {}})
+
+    summary = aggregator.summary()["m"]
+
+    np.testing.assert_array_equal(summary["count"], [3, 3])
+    np.testing.assert_allclose(summary["mean"], values.mean(axis=0))
+    np.testing.assert_allclose(summary["var"], values.var(axis=0, ddof=1))
+    np.testing.assert_allclose(summary["min"], values.min(axis=0))
+    np.testing.assert_allclose(summary["max"], values.max(axis=0))
+
+
+def test_aggregator_updates_with_iteration_results() -> None:
+    rng = np.random.default_rng(0)
+    values = rng.normal(size=(200, 3))
+    callback_aggregator = aggregate.MetricAggregator([0.5])
+    result_aggregator = aggregate.MetricAggregator([0.5])
+    for ite, row in enumerate(values):
+        result = res.IterationResult()
+        for step, value in enumerate(row):
+            action = {"metric": {"m": value}, "result": {}}
+            callback_aggregator(ite, step, action)  # type: ignore
+            result.append(action)  # type: ignore
+        result_aggregator.update(result)
+
+    callback_summary = callback_aggregator.summary()["m"]
+    result_summary = result_aggregator.summary()["m"]
+
+    for name, statistic in callback_summary.items():
+        np.testing.assert_allclose(statistic, result_summary[name])
+    np.testing.assert_allclose(
+        result_summary["q0.5"], np.median(values, axis=0), atol=0.2
+    )
+
+
+def test_aggregator_updates_with_steps_of_reduced_results() -> None:
+    aggregator = aggregate.MetricAggregator()
+    for ite in range(2):
+        result = res.IterationResult()
+        for step in (1, 3):
+            result.append(
+                {"metric": {"m": float(ite + step)}, "result": {"_step": step}}
+            )
+        aggregator.update(result)
+
+    summary = aggregator.summary()["m"]
+
+    np.testing.assert_array_equal(summary["count"], [0, 2, 0, 2])
+    np.testing.assert_allclose(summary["mean"][[1, 3]], [1.5, 3.5])
+
+
+def test_aggregator_skips_missing_metrics() -> None:
+    result = res.IterationResult()
+    result.append({"metric": {"m": 1.0}, "result": {}})
+    result.append({"metric": {}, "result": {}})
+    aggregator = aggregate.MetricAggregator()
+    aggregator.update(result)
+
+    np.testing.assert_array_equal(aggregator.summary()["m"]["count"], [1, 0])
+
+
+def test_aggregator_merges_aggregators_of_other_iterations() -> None:
+    rng = np.random.default_rng(0)
+    values = rng.normal(size=(300, 4))
+    expected = aggregate.MetricAggregator([0.5])
+    shards = [aggregate.MetricAggregator([0.5]) for _ in range(3)]
+    for ite, row in enumerate(values):
+        # The last shard sees fewer steps, and the first fewer than five
+        # iterations.
+        shard = shards[0] if ite < 3 else shards[1] if ite < 150 else shards[2]
+        for step, value in enumerate(row[:2] if shard is shards[2] else row):
+            action = {"metric": {"m": value}, "result": {}}
+            shard(ite, step, action)  # type: ignore
+            expected(ite, step, action)  # type: ignore
+
+    merged = shards[0]
+    for shard in shards[1:]:
+        merged.merge(shard)
+    summary = merged.summary()["m"]
+    expected_summary = expected.summary()["m"]
+
+    assert merged.n_ite == expected.n_ite
+    for name in ("count", "mean", "var", "min", "max"):
+        np.testing.assert_allclose(summary[name], expected_summary[name])
+    np.testing.assert_allclose(summary["q0.5"], expected_summary["q0.5"], atol=0.2)
+
+
+def test_aggregator_merges_exactly_with_few_observations() -> None:
+    values = [3.0, 1.0, 4.0, 1.0, 5.0]
+    expected = aggregate.MetricAggregator([0.5])
+    merged = aggregate.MetricAggregator([0.5])
+    other = aggregate.MetricAggregator([0.5])
+    for ite, value in enumerate(values):
+        action = {"metric": {"m": value}, "result": {}}
+        (merged if ite < 3 else other)(ite, 0, action)  # type: ignore
+        expected(ite, 0, action)  # type: ignore
+    merged.merge(other)
+
+    for name, statistic in expected.summary()["m"].items():
+        np.testing.assert_allclose(merged.summary()["m"][name], statistic)
+
+
+def test_aggregator_ignores_step_result_of_actor() -> None:
+    aggregator = aggregate.MetricAggregator()
+    result = res.IterationResult()
+    for step in range(2):
+        result.append({"metric": {"m": float(step)}, "result": {"step": "own"}})
+    aggregator.update(result)
+
+    np.testing.assert_array_equal(aggregator.summary()["m"]["mean"], [0.0, 1.0])
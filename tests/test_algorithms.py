@@ -0,0 +1,127 @@
+from typing import Type
+
+import numpy as np
+import pytest
+from banditsflow import actor as act
+from banditsflow import algorithms
+
+
+def test_arms_play_draws_same_rewards_as_choice() -> None:
+    arms = algorithms.Arms(3, 1)
+    arms.thetas = [0.1, 0.5, 0.9]
+    random = np.random.RandomState(1)
+
+    for i in range(300):
+        theta = arms.thetas[i % 3]
+        expected = random.choice([0.0, 1.0], p=[1.0 - theta, theta])
+        assert arms.play(i % 3) == expected
+
+
+def test_counts_update_theta_hats_incrementally() -> None:
+    counts = algorithms.Counts(2, 1)
+    counts.update(1, 1.0)
+    counts.update(1, 0.0)
+
+    assert list(counts.counts) == [0.0, 2.0]
+    assert list(counts.theta_hats) == [0.0, 0.5]
+
+
+def test_ucb1_plays_each_arm_once_first() -> None:
+    ucb1 = algorithms.UCB1({"num_arms": 3}, {}, 1)
+    selected = []
+    for _ in range(3):
+        idx_arm = ucb1.select()
+        ucb1.update(idx_arm, 0.0)
+        selected.append(idx_arm)
+
+    assert selected == [0, 1, 2]
+
+
+@pytest.mark.parametrize(
+    "algorithm_class,vector_algorithm_class",
+    [
+        (algorithms.EpsilonGreedy, algorithms.VectorEpsilonGreedy),
+        (algorithms.UCB1, algorithms.VectorUCB1),
+        (algorithms.ThompsonSampling, algorithms.VectorThompsonSampling),
+    ],
+)
+def test_vector_environment_matches_environment_in_distribution(
+    algorithm_class: Type[algorithms.AlgorithmType],
+    vector_algorithm_class: Type[algorithms.VectorAlgorithmType],
+) -> None:
+    synopsis = {"num_arms": 3}
+    params: act.ParamsType = {"epsilon": 0.2}
+    line = {"thetas": [0.2, 0.5, 0.4]}
+    seeds = list(range(300))
+
+    environments = [
+        algorithms.Environment(synopsis, params, algorithm_class, seed)
+        for seed in seeds
+    ]
+    # The scalar arms share the seed of the algorithm, which correlates their
+    # draws, while the vector ones draw from an independent stream.
+    for seed, environment in zip(seeds, environments):
+        environment.arms.random = np.random.RandomState(len(seeds) + seed)
+    vector_environment = algorithms.VectorEnvironment(
+        synopsis, params, vector_algorithm_class, seeds
+    )
+    indices = np.arange(len(seeds))
+    best = np.zeros(len(seeds))
+    vector_best = np.zeros(len(seeds))
+    for _ in range(100):
+        block = vector_environment.act_vector([line for _ in seeds], indices)
+        vector_best += block["result"]["idx_arm"] == 1
+        for i, environment in enumerate(environments):
+            best[i] += environment.act(line)["result"]["idx_arm"] == 1
+
+    rewards = np.array([environment.cumulative_reward for environment in environments])
+    vector_rewards = block["metric"]["cumulative_reward"]
+    assert abs(vector_rewards.mean() - rewards.mean()) < 2.0
+    assert abs(vector_best.mean() - best.mean()) < 5.0
+
+
+def test_vector_environment_is_reproducible() -> None:
+    synopsis = {"num_arms": 3}
+    line = {"thetas": [0.2, 0.5, 0.4]}
+    indices = np.arange(3)
+
+    blocks = []
+    for _ in range(2):
+        environment = algorithms.VectorEnvironment(
+            synopsis, {}, algorithms.VectorThompsonSampling, [1, 2, 3]
+        )
+        for _ in range(20):
+            block = environment.act_vector([line] * 3, indices)
+        blocks.append(block)
+
+    np.testing.assert_array_equal(
+        blocks[0]["metric"]["cumulative_reward"],
+        blocks[1]["metric"]["cumulative_reward"],
+    )
+
+
+@pytest.mark.parametrize(
+    "vector_algorithm_class",
+    [
+        algorithms.VectorEpsilonGreedy,
+        algorithms.VectorUCB1,
+        algorithms.VectorThompsonSampling,
+    ],
+)
+def test_vector_environment_iteration_depends_only_on_its_seed(
+    vector_algorithm_class: Type[algorithms.VectorAlgorithmType],
+) -> None:
+    synopsis = {"num_arms": 3}
+    line = {"thetas": [0.2, 0.5, 0.4]}
+
+    rewards = []
+    for seeds in [[1, 2, 3], [2], [5, 2]]:
+        environment = algorithms.VectorEnvironment(
+            synopsis, {"epsilon": 0.3}, vector_algorithm_class, seeds
+        )
+        indices = np.arange(len(seeds))
+        for _ in range(300):
+            block = environment.act_vector([line] * len(seeds), indices)
+        rewards.append(block["metric"]["cumulative_reward"][seeds.index(2)])
+
+    assert rewards[0] == rewards[1] == rewards[2]
@@ -0,0 +1,50 @@
+from benchmarks import suite
+
+
+def test_suite_measures_every_benchmark_of_grid() -> None:
+    grid: suite.GridType = {
+        "actors": ["ucb1"],
+        "arms": [2],
+        "horizon": [20],
+        "n_ite": [2],
+        "n_trials": [2],
+    }
+    records = suite.run(grid, repeat=1)
+
+    names = {record["name"] for record in records}
+    assert names == {
+        "simulator.steps_per_second",
+        "optimizer.trials_per_second",
+        "suggester.seconds_per_suggest",
+        "result.bytes_per_step",
+        "result.peak_bytes_per_step",
+        "optimizer.to_objective_seconds",
+    }
+    assert len(records) == len(suite.SIMULATORS) + 5
+    assert all(record["value"] > 0.0 for record in records)
+
+
+def test_compare_pairs_records_with_same_parameters() -> None:
+    baseline: suite.RecordType = {
+        "name": "a",
+        "params": {"x": 1},
+        "value": 2.0,
+        "unit": "s",
+    }
+    other: suite.RecordType = {
+        "name": "a",
+        "params": {"x": 2},
+        "value": 1.0,
+        "unit": "s",
+    }
+    current: suite.RecordType = {
+        "name": "a",
+        "params": {"x": 1},
+        "value": 1.0,
+        "unit": "s",
+    }
+
+    comparisons = suite.compare([baseline, other], [current])
+
+    assert len(comparisons) == 1
+    assert comparisons[0]["ratio"] == 0.5
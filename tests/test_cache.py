@@ -0,0 +1,175 @@
+import tempfile
+from typing import Any, Dict
+from unittest.mock import Mock, patch
+
+from banditsflow import actor as act
+from banditsflow import cache, runner, scenario
+from banditsflow import simulator as sim
+
+
+class DummyScenarioLoader:
+    @staticmethod
+    def load(name: str, step: str, seed: int) -> scenario.Scenario:
+        return DummyScenario(seed)
+
+
+class DummyScenario:
+    def __init__(self, seed: int) -> None:
+        self.seed = seed
+        self.i = -1
+
+    def synopsis(self) -> scenario.SynopsisType:
+        return {}
+
+    def scan(self) -> bool:
+        self.i += 1
+        return self.i < 2
+
+    def line(self) -> scenario.LineType:
+        return {"seed": self.seed, "i": self.i}
+
+
+class DummyActorLoader:
+    @staticmethod
+    def load(
+        name: str, synopsis: scenario.SynopsisType, params: act.ParamsType, seed: int
+    ) -> act.Actor:
+        return DummyActor()
+
+
+class DummyActor:
+    def act(self, line: scenario.LineType) -> act.ActionType:
+        return {"metric": {"value": float(line["seed"])}, "result": line}
+
+
+def create_runner() -> runner.Runner:
+    class MockLoaderModule:
+        Loader: Dict[Any, Any] = {}
+
+    with patch.object(runner.Runner, "import_module", return_value=MockLoaderModule):
+        r = runner.Runner("scenario", actor_name="actor", mute=True)
+    r.scenario_loader = DummyScenarioLoader
+    r.actor_loader = DummyActorLoader
+    return r
+
+
+def test_key_depends_on_each_component() -> None:
+    result_cache = cache.ResultCache("", revision="v1")
+    key = result_cache.key("s", "a", {"epsilon": 0.1}, "evaluate", 1, "float64")
+
+    assert key == result_cache.key("s", "a", {"epsilon": 0.1}, "evaluate", 1, "float64")
+    assert key != result_cache.key("s", "a", {"epsilon": 0.2}, "evaluate", 1, "float64")
+    assert key != result_cache.key("s", "a", {"epsilon": 0.1}, "evaluate", 2, "float64")
+    assert key != cache.ResultCache("", revision="v2").key(
+        "s", "a", {"epsilon": 0.1}, "evaluate", 1, "float64"
+    )
+    assert key != result_cache.key(
+        "s", "a", {"epsilon": 0.1}, "evaluate", 1, "float64", vectorize=True
+    )
+
+
+def test_put_and_get_result() -> None:
+    with tempfile.TemporaryDirectory() as dirname:
+        result_cache = cache.ResultCache(dirname)
+        action: act.ActionType = {"metric": {"m": 1.0}, "result": {"r": 2}}
+
+        assert result_cache.get("ab") is None
+        result_cache.put("ab", [action])
+        assert result_cache.get("ab") == [action]
+
+
+def test_evaluate_simulates_only_missing_iterations() -> None:
+    with tempfile.TemporaryDirectory() as dirname:
+        r = create_runner()
+        result_cache = cache.ResultCache(dirname)
+        expected = r._evaluate(5, {}, [], 10)
+        r._evaluate(3, {}, [], 10, cache=result_cache)
+
+        callback = Mock()
+        with patch.object(
+            sim.Simulator,
+            "run_iterations",
+            wraps=sim.Simulator(DummyScenarioLoader, DummyActorLoader).run_iterations,
+        ) as mock_run_iterations:
+            results = r._evaluate(5, {}, [callback], 10, cache=result_cache)
+
+        assert mock_run_iterations.call_args[0][0] == [3, 4]
+        assert list(results) == list(expected)
+        assert sorted(c[0][0] for c in callback.call_args_list) == [
+            0,
+            0,
+            1,
+            1,
+            2,
+            2,
+            3,
+            3,
+            4,
+            4,
+        ]
+
+
+def test_evaluate_simulates_reduced_iterations_again_for_callbacks() -> None:
+    with tempfile.TemporaryDirectory() as dirname:
+        r = create_runner()
+        result_cache = cache.ResultCache(dirname)
+        fresh = Mock()
+        expected = r._evaluate(2, {}, [fresh], 10, cache=result_cache, retention="last")
+
+        rerun = Mock()
+        results = r._evaluate(2, {}, [rerun], 10, cache=result_cache, retention="last")
+
+        assert list(results) == list(expected)
+        assert [c[0][:2] for c in rerun.call_args_list] == [
+            c[0][:2] for c in fresh.call_args_list
+        ]
+        assert len(rerun.call_args_list) == 4
+
+
+def test_evaluate_actors_shares_cache_with_evaluate() -> None:
+    class NamedActorLoader:
+        @staticmethod
+        def load(
+            name: str,
+            synopsis: scenario.SynopsisType,
+            params: act.ParamsType,
+            seed: int,
+        ) -> act.Actor:
+            return NamedActor(name)
+
+    class NamedActor:
+        def __init__(self, name: str) -> None:
+            self.name = name
+
+        def act(self, line: scenario.LineType) -> act.ActionType:
+            return {
+                "metric": {"value": float(line["seed"])},
+                "result": {"n": self.name},
+            }
+
+    with tempfile.TemporaryDirectory() as dirname:
+        r = create_runner()
+        r.actor_names = ["a", "b"]
+        r.actor_loader = NamedActorLoader
+        caches = {name: cache.ResultCache(f"{dirname}/{name}") for name in "ab"}
+        results = r.evaluate_actors(3, {"a": {}, "b": {}}, {"a": [], "b": []}, 10)
+
+        r.actor_name = "b"
+        expected = r._evaluate(3, {}, [], 10, cache=caches["b"])
+        assert list(results["b"]) == list(expected)
+        assert list(results["a"]) != list(expected)
+
+        # Only the actor missing from the cache is simulated.
+        with patch.object(
+            sim.Simulator,
+            "run_iterations",
+            wraps=sim.Simulator(DummyScenarioLoader, NamedActorLoader).run_iterations,
+        ) as mock_run_iterations:
+            cached = r.evaluate_actors(
+                3, {"a": {}, "b": {}}, {"a": [], "b": []}, 10, caches=caches
+            )
+
+        assert mock_run_iterations.call_count == 1
+        assert mock_run_iterations.call_args[0][0] == [0, 1, 2]
+        assert list(cached["a"]) == list(results["a"])
+        assert list(cached["b"]) == list(expected)
@@ -0,0 +1,257 @@
+import os
+import tempfile
+import types
+from typing import Any, Dict, List
+from unittest.mock import Mock, patch
+
+import pytest
+from banditsflow import actor as act
+from banditsflow import checkpoint as ckpt
+from banditsflow import runner, scenario
+from banditsflow import simulator as sim
+
+
+class Preempted(Exception):
+    pass
+
+
+class DummySnapshotScenarioLoader:
+    @staticmethod
+    def load(name: str, step: str, seed: int) -> scenario.Scenario:
+        return DummySnapshotScenario()
+
+
+class DummySnapshotScenario:
+    def __init__(self) -> None:
+        self.i = -1
+        self.n_lines = 10
+
+    def synopsis(self) -> scenario.SynopsisType:
+        return {}
+
+    def scan(self) -> bool:
+        self.i += 1
+        return self.i < self.n_lines
+
+    def line(self) -> scenario.LineType:
+        return {"i": self.i}
+
+    def snapshot(self) -> Any:
+        return self.i
+
+    def restore(self, state: Any) -> None:
+        self.i = state
+
+
+class DummySnapshotActorLoader:
+    # Iteration whose actor is preempted at `preempt_at` steps.
+    preempted_seed = -1
+    preempt_at = 0
+
+    @classmethod
+    def load(
+        cls,
+        name: str,
+        synopsis: scenario.SynopsisType,
+        params: act.ParamsType,
+        seed: int,
+    ) -> act.Actor:
+        preempt_at = cls.preempt_at if seed == cls.preempted_seed else -1
+        return DummySnapshotActor(seed, preempt_at)
+
+
+class DummySnapshotActor:
+    def __init__(self, seed: int, preempt_at: int) -> None:
+        self.total = float(seed)
+        self.n_steps = 0
+        self.preempt_at = preempt_at
+
+    def act(self, line: scenario.LineType) -> act.ActionType:
+        if self.n_steps == self.preempt_at:
+            raise Preempted()
+        self.n_steps += 1
+        self.total += line["i"]
+        return {"metric": {"total": self.total}, "result": {"i": line["i"]}}
+
+    def snapshot(self) -> Any:
+        return self.total, self.n_steps
+
+    def restore(self, state: Any) -> None:
+        self.total, self.n_steps = state
+
+
+@pytest.fixture
+def preempt() -> Any:
+    def set_preempt(seed: int, at: int) -> None:
+        DummySnapshotActorLoader.preempted_seed = seed
+        DummySnapshotActorLoader.preempt_at = at
+
+    yield set_preempt
+    set_preempt(-1, 0)
+
+
+def test_iteration_resumes_from_snapshot(preempt: Any) -> None:
+    expected_callback = Mock()
+    expected = sim.Simulator(DummySnapshotScenarioLoader, DummySnapshotActorLoader).run(
+        1, "", "", {}, [expected_callback], "", 0
+    )
+
+    with tempfile.TemporaryDirectory() as dirname:
+        checkpoint = ckpt.Checkpoint(dirname, steps=4)
+        simulator = sim.Simulator(
+            DummySnapshotScenarioLoader, DummySnapshotActorLoader, checkpoint=checkpoint
+        )
+        preempt(1, 6)
+        with pytest.raises(Preempted):
+            simulator.run(1, "", "", {}, [Mock()], "", 0)
+        progress = checkpoint.load_progress(0)
+        assert progress is not None
+        assert len(progress["writer"]) == 4
+
+        preempt(-1, 0)
+        callback = Mock()
+        with patch.object(
+            DummySnapshotActor, "act", side_effect=DummySnapshotActor.act, autospec=True
+        ) as mock_act:
+            results = simulator.run(1, "", "", {}, [callback], "", 0)
+
+    assert results == expected
+    assert mock_act.call_count == 6  # Only the steps after the snapshot
+    assert callback.call_args_list == expected_callback.call_args_list
+
+
+def test_evaluate_resumes_from_checkpointed_iterations(preempt: Any) -> None:
+    loaders: Dict[str, Any] = {
+        "scenario.loader": types.SimpleNamespace(Loader=DummySnapshotScenarioLoader),
+        "suggestion.loader": types.SimpleNamespace(Loader=None),
+        "actor.loader": types.SimpleNamespace(Loader=DummySnapshotActorLoader),
+    }
+    with patch.object(runner.Runner, "import_module", side_effect=loaders.get):
+        r = runner.Runner("scenario", actor_name="actor", mute=True)
+
+    n_ite = 5
+    expected = r._evaluate(n_ite, {}, [], 0)
+    calls: List[int] = []
+
+    def callback(current_ite: int, step: int, action: act.ActionType) -> None:
+        calls.append(current_ite)
+
+    with tempfile.TemporaryDirectory() as dirname:
+        # Iteration 3 (seed 3 + 1 of its actor) is preempted after the
+        # checkpoint of iterations 0 and 1.
+        preempt(4, 5)
+        with pytest.raises(Preempted):
+            r._evaluate(
+                n_ite, {}, [callback], 0, checkpoint_dir=dirname, checkpoint_interval=2
+            )
+        assert len(os.listdir(dirname)) == 1
+
+        preempt(-1, 0)
+        calls.clear()
+        with patch.object(
+            DummySnapshotScenarioLoader,
+            "load",
+            side_effect=DummySnapshotScenarioLoader.load,
+        ) as mock_load:
+            results = r._evaluate(
+                n_ite, {}, [callback], 0, checkpoint_dir=dirname, checkpoint_interval=2
+            )
+
+        assert mock_load.call_count == 3  # Iterations after the last checkpoint
+        assert os.listdir(dirname) == []
+
+    assert results == expected
+    assert sorted(calls) == sorted([ite for ite in range(n_ite) for _ in range(10)])
+
+
+def test_evaluate_does_not_resume_checkpoints_of_another_revision(
+    preempt: Any,
+) -> None:
+    loaders: Dict[str, Any] = {
+        "scenario.loader": types.SimpleNamespace(Loader=DummySnapshotScenarioLoader),
+        "suggestion.loader": types.SimpleNamespace(Loader=None),
+        "actor.loader": types.SimpleNamespace(Loader=DummySnapshotActorLoader),
+    }
+    with patch.object(runner.Runner, "import_module", side_effect=loaders.get):
+        r = runner.Runner("scenario", actor_name="actor", mute=True)
+
+    with tempfile.TemporaryDirectory() as dirname:
+        preempt(4, 5)
+        with pytest.raises(Preempted):
+            r._evaluate(
+                5,
+                {},
+                [],
+                0,
+                checkpoint_dir=dirname,
+                checkpoint_interval=2,
+                checkpoint_revision="v1/1",
+            )
+
+        preempt(-1, 0)
+        with patch.object(
+            DummySnapshotScenarioLoader,
+            "load",
+            side_effect=DummySnapshotScenarioLoader.load,
+        ) as mock_load:
+            r._evaluate(
+                5,
+                {},
+                [],
+                0,
+                checkpoint_dir=dirname,
+                checkpoint_interval=2,
+                checkpoint_revision="v2/2",
+            )
+
+        assert mock_load.call_count == 5
+        # The checkpoints of the other revision are left to their run.
+        assert len(os.listdir(dirname)) == 1
+
+
+def test_sharded_evaluate_matches_whole_evaluation(preempt: Any) -> None:
+    loaders: Dict[str, Any] = {
+        "scenario.loader": types.SimpleNamespace(Loader=DummySnapshotScenarioLoader),
+        "suggestion.loader": types.SimpleNamespace(Loader=None),
+        "actor.loader": types.SimpleNamespace(Loader=DummySnapshotActorLoader),
+    }
+    with patch.object(runner.Runner, "import_module", side_effect=loaders.get):
+        r = runner.Runner("scenario", actor_name="actor", mute=True)
+
+    n_ite = 5
+    expected = r.evaluate(n_ite, {}, [], 0)
+    shards = sim.shard_iterations(n_ite, 2)
+
+    with tempfile.TemporaryDirectory() as dirname:
+        # The first shard is preempted at iteration 1 and keeps its
+        # checkpoints while the second one finishes.
+        preempt(2, 5)
+        with pytest.raises(Preempted):
+            r.evaluate(
+                n_ite,
+                {},
+                [],
+                0,
+                checkpoint_dir=dirname,
+                checkpoint_interval=1,
+                iterations=range(*shards[0]),
+            )
+        preempt(-1, 0)
+        (key,) = os.listdir(dirname)
+
+        results: List[Any] = []
+        for start, stop in reversed(shards):
+            results[:0] = r.evaluate(
+                n_ite,
+                {},
+                [],
+                0,
+                checkpoint_dir=dirname,
+                checkpoint_interval=1,
+                iterations=range(start, stop),
+            )
+            assert os.listdir(os.path.join(dirname, key)) == (
+                ["000000-000003"] if start > 0 else []
+            )
+
+    assert results == expected
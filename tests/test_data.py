@@ -0,0 +1,98 @@
+import os
+import tempfile
+from unittest.mock import Mock, patch
+
+from banditsflow import data
+from metaflow.exception import MetaflowNotFound
+
+
+def test_run_index_returns_updated_pathspec() -> None:
+    with tempfile.TemporaryDirectory() as dirname:
+        path = os.path.join(dirname, "index", "index.json")
+        index = data.RunIndex(path, root="local@/a")
+        assert index.get("exp", "scenario", "actor") is None
+
+        index.update(
+            "exp",
+            "scenario",
+            {"a": "BanditsFlow/1/evaluate/2", "b": "BanditsFlow/1/evaluate/3"},
+        )
+        index.update("exp", "scenario", {"a": "BanditsFlow/4/evaluate/5"})
+
+        assert index.get("exp", "scenario", "a") == "BanditsFlow/4/evaluate/5"
+        assert index.get("exp", "other", "a") is None
+        # The actor was not evaluated by the latest run.
+        assert index.get("exp", "scenario", "b") is None
+        assert (
+            index.get("exp", "scenario", "b", latest_run_only=False)
+            == "BanditsFlow/1/evaluate/3"
+        )
+        # Pathspecs of another datastore are not used.
+        assert data.RunIndex(path, root="local@/b").get("exp", "scenario", "a") is None
+
+
+def test_latest_actor_task_uses_index_without_scanning() -> None:
+    index = Mock()
+    index.get.return_value = "BanditsFlow/1/evaluate/2"
+    flow_data = data.BanditsFlowData("exp", index=index)
+
+    with patch.object(data, "Task") as mock_task, patch.object(
+        flow_data, "_scan_actor_task"
+    ) as mock_scan:
+        task = flow_data._latest_actor_task("evaluate", "scenario", "actor")
+        flow_data._latest_actor_task("evaluate", "scenario", "actor")
+
+        assert task is mock_task.return_value
+        mock_task.assert_called_once_with("BanditsFlow/1/evaluate/2")
+        mock_scan.assert_not_called()
+
+
+def test_latest_actor_task_falls_back_to_scan() -> None:
+    index = Mock()
+    index.get.return_value = "BanditsFlow/1/evaluate/2"
+    flow_data = data.BanditsFlowData("exp", index=index)
+
+    with patch.object(data, "Task", side_effect=MetaflowNotFound), patch.object(
+        flow_data, "_scan_actor_task"
+    ) as mock_scan:
+        task = flow_data._latest_actor_task("evaluate", "scenario", "actor")
+
+        assert task is mock_scan.return_value
+        mock_scan.assert_called_once_with("evaluate", "scenario", "actor")
+
+
+def test_latest_actor_task_passes_latest_run_only_to_index() -> None:
+    index = Mock()
+    index.get.return_value = None
+    flow_data = data.BanditsFlowData("exp", index=index, latest_run_only=False)
+
+    with patch.object(flow_data, "_scan_actor_task"):
+        flow_data._latest_actor_task("evaluate", "scenario", "actor")
+
+    index.get.assert_called_once_with("exp", "scenario", "actor", False)
+
+
+def test_latest_result_reads_actor_of_group_task() -> None:
+    flow_data = data.BanditsFlowData("exp", index=Mock())
+    task = Mock()
+    task.__contains__ = Mock(return_value=True)
+    task.data.retention = "full"
+    task.data.results = {"a": [[]], "b": [[], []]}
+
+    with patch.object(flow_data, "_latest_actor_task", return_value=task):
+        result = flow_data.latest_result("scenario", "b")
+
+    assert result is not None
+    assert len(result) == 2
+
+
+def test_latest_result_skips_result_of_another_retention() -> None:
+    flow_data = data.BanditsFlowData("exp", index=Mock())
+    task = Mock()
+    task.__contains__ = Mock(return_value=True)
+    task.data.retention = "last"
+    task.data.results = {"a": [[]]}
+
+    with patch.object(flow_data, "_latest_actor_task", return_value=task):
+        assert flow_data.latest_result("scenario", "a") is None
+        assert flow_data.latest_result("scenario", "a", retention="last") == [[]]
@@ -0,0 +1,122 @@
+import threading
+from typing import List, Sequence, Tuple
+
+import pytest
+from banditsflow import actor as act
+from banditsflow import dispatch as disp
+from banditsflow import profiler as prof
+
+
+def action(i: int) -> act.ActionType:
+    return {"metric": {"m": float(i)}, "result": {}}
+
+
+class GatedCallback:
+    """Callback which blocks on its first call until it is released."""
+
+    def __init__(self) -> None:
+        self.started = threading.Event()
+        self.released = threading.Event()
+        self.calls: List[Tuple[int, int, act.ActionType]] = []
+
+    def __call__(self, current_ite: int, step: int, action: act.ActionType) -> None:
+        self.started.set()
+        self.released.wait()
+        self.calls.append((current_ite, step, action))
+
+
+def fill(dispatcher: disp.Dispatcher, callback: GatedCallback) -> None:
+    # The consumer holds step 0 and the queue holds steps 1 and 2.
+    dispatcher(0, 0, action(0))
+    callback.started.wait()
+    dispatcher(0, 1, action(1))
+    dispatcher(0, 2, action(2))
+
+
+def test_block_delivers_every_action_in_order() -> None:
+    calls: List[Tuple[int, int, act.ActionType]] = []
+    dispatcher = disp.Dispatch(max_queue_size=2, batch_size=3).start(
+        [lambda *args: calls.append(args)]
+    )
+    for i in range(100):
+        dispatcher(i // 10, i % 10, action(i))
+    dispatcher.close()
+
+    assert calls == [(i // 10, i % 10, action(i)) for i in range(100)]
+
+
+def test_drop_discards_new_actions_when_queue_is_full() -> None:
+    callback = GatedCallback()
+    dispatcher = disp.Dispatch(max_queue_size=2, backpressure="drop").start([callback])
+    fill(dispatcher, callback)
+    dispatcher(0, 3, action(3))
+    callback.released.set()
+    dispatcher.close()
+
+    assert [step for _, step, _ in callback.calls] == [0, 1, 2]
+    assert dispatcher.dropped == 1
+
+
+def test_coalesce_replaces_newest_action_of_same_iteration() -> None:
+    callback = GatedCallback()
+    dispatcher = disp.Dispatch(max_queue_size=2, backpressure="coalesce").start(
+        [callback]
+    )
+    fill(dispatcher, callback)
+    dispatcher(0, 3, action(3))
+    dispatcher(0, 4, action(4))
+    callback.released.set()
+    dispatcher(1, 0, action(5))  # Another iteration waits for a free slot.
+    dispatcher.close()
+
+    assert [(ite, step) for ite, step, _ in callback.calls] == [
+        (0, 0),
+        (0, 1),
+        (0, 4),
+        (1, 0),
+    ]
+    assert dispatcher.coalesced == 2
+
+
+def test_batch_callback_receives_queued_actions_at_once() -> None:
+    class BatchCallback:
+        def __init__(self) -> None:
+            self.batches: List[int] = []
+
+        def __call__(self, current_ite: int, step: int, action: act.ActionType) -> None:
+            raise AssertionError
+
+        def call_batch(self, calls: Sequence[Tuple[int, int, act.ActionType]]) -> None:
+            self.batches.append(len(calls))
+
+    callback = GatedCallback()
+    batch_callback = BatchCallback()
+    profiler = prof.Profiler()
+    dispatcher = disp.Dispatch(batch_size=4).start([callback, batch_callback], profiler)
+    dispatcher(0, 0, action(0))
+    callback.started.wait()
+    for i in range(1, 10):
+        dispatcher(0, i, action(i))
+    callback.released.set()
+    dispatcher.close()
+
+    assert batch_callback.batches == [1, 4, 4, 1]
+    assert profiler.counts["callback.1.BatchCallback"] == 10
+
+
+def test_error_of_callback_is_raised_once() -> None:
+    def callback(current_ite: int, step: int, action: act.ActionType) -> None:
+        raise RuntimeError("callback failed")
+
+    dispatcher = disp.Dispatch().start([callback])
+    dispatcher(0, 0, action(0))
+    with pytest.raises(RuntimeError, match="callback failed"):
+        dispatcher.close()
+
+    dispatcher(0, 1, action(1))  # Ignored after the error.
+    dispatcher.close()
+
+
+def test_unknown_backpressure_raises() -> None:
+    with pytest.raises(ValueError):
+        disp.Dispatch(backpressure="unknown")
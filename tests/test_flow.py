@@ -0,0 +1,113 @@
+import os
+import subprocess
+import sys
+import tempfile
+import textwrap
+
+import optuna
+
+PROJECT = {
+    "scenario/loader.py": """
+        class Scenario:
+            def __init__(self) -> None:
+                self.i = -1
+
+            def synopsis(self):
+                return {}
+
+            def scan(self):
+                self.i += 1
+                return self.i < 3
+
+            def line(self):
+                return {"rewards": [0.0, 1.0]}
+
+
+        class Loader:
+            @staticmethod
+            def load(name, step, seed):
+                return Scenario()
+    """,
+    "suggestion/loader.py": """
+        class Loader:
+            @staticmethod
+            def load(name):
+                return [{"name": "arm", "type": "categorical", "choices": [0, 1]}]
+    """,
+    "actor/loader.py": """
+        class Actor:
+            def __init__(self, arm):
+                self.arm = arm
+                self.total = 0.0
+
+            def act(self, line):
+                self.total += line["rewards"][self.arm]
+                return {"metric": {"total": self.total}, "result": {}}
+
+
+        class Loader:
+            @staticmethod
+            def load(name, synopsis, params, seed):
+                return Actor(params["arm"])
+    """,
+    "reporter/loader.py": """
+        class Reporter:
+            def __init__(self, outdir):
+                self.outdir = outdir
+
+            def report(self, results, best_params):
+                return []
+
+
+        class Loader:
+            @staticmethod
+            def load(name, outdir):
+                return Reporter(outdir)
+    """,
+    "tiny.py": """
+        import banditsflow
+
+        if __name__ == "__main__":
+            banditsflow.BanditsFlow()
+    """,
+}
+
+
+def test_flow_optimizes_actors_in_parallel_on_fresh_study_storage() -> None:
+    with tempfile.TemporaryDirectory() as dirname:
+        for path, source in PROJECT.items():
+            os.makedirs(os.path.join(dirname, os.path.dirname(path)), exist_ok=True)
+            with open(os.path.join(dirname, path), "w") as f:
+                f.write(textwrap.dedent(source))
+        storage = f"sqlite:///{os.path.join(dirname, 'studies.db')}"
+        env = dict(
+            os.environ,
+            PYTHONPATH=os.pathsep.join(
+                [dirname, os.path.dirname(os.path.dirname(__file__))]
+            ),
+            USERNAME="test",
+            METAFLOW_DEFAULT_METADATA="local",
+            METAFLOW_DEFAULT_DATASTORE="local",
+            MLFLOW_TRACKING_URI=f"file://{os.path.join(dirname, 'mlruns')}",
+        )
+
+        completed = subprocess.run(
+            [sys.executable, "tiny.py", "--quiet", "run"]
+            + ["--tag", "experiment_name:e", "--tag", "scenario:tiny"]
+            + ["--experiment_name", "e", "--experiment_revision", "r"]
+            + ["--scenario", "tiny", "--reporter", "tiny"]
+            + ["--actor", "a", "--actor", "b", "--study_storage", storage]
+            + ["--optimization_direction", "maximize"]
+            + ["--optimization_metric", "total", "--n_trials", "2", "--n_ite", "1"],
+            cwd=dirname,
+            env=env,
+            capture_output=True,
+            text=True,
+        )
+
+        assert completed.returncode == 0, completed.stdout + completed.stderr
+        studies = optuna.get_all_study_summaries(storage)
+        assert sorted(study.study_name.split("/")[2] for study in studies) == [
+            "a",
+            "b",
+        ]
@@ -0,0 +1,54 @@
+import json
+import subprocess
+import sys
+from typing import Any, Dict, cast
+
+import pytest
+
+HEAVY_MODULES = ("mlflow", "metaflow", "optuna")
+
+SCRIPT = """
+import json
+import sys
+import time
+
+start = time.perf_counter()
+import banditsflow
+import banditsflow.runner
+import banditsflow.simulator
+elapsed = time.perf_counter() - start
+
+print(json.dumps({
+    "elapsed": elapsed,
+    "modules": [name for name in %r if name in sys.modules],
+}))
+"""
+
+
+@pytest.fixture(scope="module")
+def import_stats() -> Dict[str, Any]:
+    output = subprocess.run(
+        [sys.executable, "-c", SCRIPT % (HEAVY_MODULES,)],
+        check=True,
+        capture_output=True,
+        text=True,
+    ).stdout
+    return cast(Dict[str, Any], json.loads(output))
+
+
+def test_runner_and_simulator_do_not_import_heavy_modules(
+    import_stats: Dict[str, Any]
+) -> None:
+    assert import_stats["modules"] == []
+
+
+def test_runner_and_simulator_import_in_under_a_second(
+    import_stats: Dict[str, Any]
+) -> None:
+    assert import_stats["elapsed"] < 1.0
+
+
+def test_flow_is_imported_on_access() -> None:
+    import banditsflow
+
+    assert banditsflow.BanditsFlow.__name__ == "BanditsFlow"
@@ -1,8 +1,69 @@
+import os
+import tempfile
 from typing import List
+from unittest.mock import Mock, call, patch
 
+import numpy as np
+import optuna
+import pytest
 from banditsflow import actor as act
-from banditsflow import optimizer
+from banditsflow import optimizer, scenario
 from banditsflow import simulator as sim
+from banditsflow import suggestion as suggest
+
+
+class DummyScenarioLoader:
+    @staticmethod
+    def load(name: str, step: str, seed: int) -> scenario.Scenario:
+        return DummyScenario()
+
+
+class DummyScenario:
+    def __init__(self) -> None:
+        self.i = -1
+        self.n_ite = 3
+
+    def synopsis(self) -> scenario.SynopsisType:
+        return {}
+
+    def scan(self) -> bool:
+        self.i += 1
+        return self.i < self.n_ite
+
+    def line(self) -> scenario.LineType:
+        return {"i": self.i}
+
+
+class DummyActorLoader:
+    @staticmethod
+    def load(
+        name: str, synopsis: scenario.SynopsisType, params: act.ParamsType, seed: int
+    ) -> act.Actor:
+        return DummyActor(synopsis, params, seed)
+
+
+class DummyActor:
+    def __init__(
+        self, synopsis: scenario.SynopsisType, params: act.ParamsType, seed: int
+    ) -> None:
+        self.x = float(params["x"])  # type: ignore
+        self.total = 0.0
+
+    def act(self, line: scenario.LineType) -> act.ActionType:
+        self.total += self.x
+        return {"metric": {"total": self.total}, "result": {}}
+
+
+class DummySuggestionLoader:
+    @staticmethod
+    def load(name: str) -> List[suggest.SuggestionType]:
+        suggestion: suggest.UniformSuggestion = {
+            "name": "x",
+            "type": "uniform",
+            "low": 0.0,
+            "high": 1.0,
+        }
+        return [suggestion]
 
 
 def test_to_objective() -> None:
@@ -21,3 +82,229 @@ def test_to_objective() -> None:
     objective_value = optimizer.to_objective("cum_reward", results)
 
     assert objective_value == (2.0 + 3.0) / 2
+
+
+@pytest.mark.parametrize(
+    ("n_trials", "n_workers", "expected"),
+    [(4, 2, [2, 2]), (5, 2, [3, 2]), (2, 3, [1, 1, 0])],
+)
+def test_split_n_trials(n_trials: int, n_workers: int, expected: List[int]) -> None:
+    assert optimizer.split_n_trials(n_trials, n_workers) == expected
+
+
+def test_optimize_runs_n_trials_over_workers() -> None:
+    o = optimizer.Optimizer(
+        DummyScenarioLoader, DummyActorLoader, DummySuggestionLoader
+    )
+    study = o.optimize(5, -1.0, "", "", "maximize", "total", 1, n_jobs=2)
+
+    assert len(study.trials) == 5
+    assert study.best_value == 3.0 * study.best_params["x"]
+
+
+def test_pruning_callback_reports_metric_every_interval() -> None:
+    trial = Mock()
+    trial.should_prune.return_value = False
+    callback = optimizer.PruningCallback(trial, "total", 2)
+
+    for step in range(5):
+        callback(0, step, {"metric": {"total": float(step)}, "result": {}})
+
+    assert trial.report.call_args_list == [call(1.0, 1), call(3.0, 3)]
+
+
+def test_pruning_callback_stops_simulation_when_trial_is_pruned() -> None:
+    trial = Mock()
+    trial.should_prune.return_value = True
+    callback = optimizer.PruningCallback(trial, "total", 1)
+    simulator = sim.Simulator(DummyScenarioLoader, DummyActorLoader)
+
+    with pytest.raises(optuna.TrialPruned):
+        simulator.run(1, "", "", {"x": 1.0}, [callback], "", 0)
+
+    trial.report.assert_called_once_with(1.0, 0)
+
+
+def test_metric_is_reported_only_with_pruner() -> None:
+    o = optimizer.Optimizer(
+        DummyScenarioLoader, DummyActorLoader, DummySuggestionLoader
+    )
+    for pruner, n_reports in [("nop", 0), ("median", 3)]:
+        with patch.object(optuna.trial.Trial, "report", autospec=True) as mock_report:
+            o.optimize(
+                1,
+                -1.0,
+                "",
+                "",
+                "maximize",
+                "total",
+                1,
+                pruner=pruner,
+                report_interval=1,
+            )
+        assert mock_report.call_count == n_reports
+
+
+def test_persistent_study_is_continued_by_next_optimize() -> None:
+    o = optimizer.Optimizer(
+        DummyScenarioLoader, DummyActorLoader, DummySuggestionLoader
+    )
+    with tempfile.TemporaryDirectory() as dirname:
+        storage = f"sqlite:///{os.path.join(dirname, 'studies', 'studies.db')}"
+        first = o.optimize(
+            3,
+            -1.0,
+            "",
+            "",
+            "maximize",
+            "total",
+            1,
+            storage=storage,
+            study_name="exp/scenario/actor",
+            warm_start_params={"x": 0.5},
+        )
+        first_params = [trial.params for trial in first.trials]
+        second = o.optimize(
+            2,
+            -1.0,
+            "",
+            "",
+            "maximize",
+            "total",
+            1,
+            storage=storage,
+            study_name="exp/scenario/actor",
+            warm_start_params={"x": 0.1},
+        )
+
+        assert first_params[0] == {"x": 0.5}
+        assert len(second.trials) == 5
+        assert [trial.params for trial in second.trials[:3]] == first_params
+        assert second.trials[3].params not in first_params
+
+
+def test_persistent_study_rejects_another_objective() -> None:
+    o = optimizer.Optimizer(
+        DummyScenarioLoader, DummyActorLoader, DummySuggestionLoader
+    )
+    with tempfile.TemporaryDirectory() as dirname:
+        storage = f"sqlite:///{os.path.join(dirname, 'studies.db')}"
+        o.optimize(
+            1, -1.0, "", "", "maximize", "total", 1, storage=storage, study_name="s"
+        )
+        for direction, metric in [("minimize", "total"), ("maximize", "other")]:
+            with pytest.raises(ValueError, match="another study name"):
+                o.optimize(
+                    1,
+                    -1.0,
+                    "",
+                    "",
+                    direction,
+                    metric,
+                    1,
+                    storage=storage,
+                    study_name="s",
+                )
+
+
+def test_study_name_depends_on_objective() -> None:
+    names = {
+        optimizer.study_name("exp", "scenario", "actor", metric, direction)
+        for metric in ["total", "other"]
+        for direction in ["maximize", "minimize"]
+    }
+
+    assert len(names) == 4
+
+
+def test_replay_scenario_loads_scenario_once() -> None:
+    expected = optimizer.Optimizer(
+        DummyScenarioLoader, DummyActorLoader, DummySuggestionLoader
+    ).optimize(4, -1.0, "", "", "maximize", "total", 1)
+
+    o = optimizer.Optimizer(
+        DummyScenarioLoader,
+        DummyActorLoader,
+        DummySuggestionLoader,
+        replay_scenario=True,
+    )
+    with patch.object(
+        DummyScenarioLoader, "load", side_effect=DummyScenarioLoader.load
+    ) as mock_load:
+        study = o.optimize(4, -1.0, "", "", "maximize", "total", 1)
+
+    mock_load.assert_called_once()
+    assert [t.value for t in study.trials] == [t.value for t in expected.trials]
+
+
+class DummyNoisyActorLoader:
+    @staticmethod
+    def load(
+        name: str, synopsis: scenario.SynopsisType, params: act.ParamsType, seed: int
+    ) -> act.Actor:
+        return DummyNoisyActor(synopsis, params, seed)
+
+
+class DummyNoisyActor(DummyActor):
+    def __init__(
+        self, synopsis: scenario.SynopsisType, params: act.ParamsType, seed: int
+    ) -> None:
+        super().__init__(synopsis, params, seed)
+        self.x += 0.01 * (seed % 3)
+
+
+@pytest.mark.parametrize(
+    "values, incumbent, expected",
+    [
+        ([1.0, 1.1], [2.0, 2.1], True),
+        ([2.0, 2.1], [1.0, 1.1], False),
+        ([1.0], [2.0], False),  # Fewer than min_seeds
+        ([1.0, 3.0], [2.0, 2.0], False),  # Too noisy to tell
+        ([1.0, 1.0, 1.0], [2.0, 2.0], False),  # Incumbent has fewer seeds
+        ([1.0, 1.6], [2.0, 2.0], False),  # Two seeds bound the mean loosely
+    ],
+)
+def test_racing_is_worse(
+    values: List[float], incumbent: List[float], expected: bool
+) -> None:
+    assert optimizer.Racing(3).is_worse(values, incumbent) == expected
+
+
+def test_racing_rarely_prunes_equal_mean_trial_at_two_seeds() -> None:
+    racing = optimizer.Racing(3, confidence=0.95)
+    random = np.random.RandomState(0)
+
+    n_pruned = sum(
+        racing.is_worse(list(random.normal(size=2)), [0.0, 0.0]) for _ in range(4000)
+    )
+
+    assert n_pruned / 4000 < 0.06
+
+
+def test_racing_completes_trials_on_every_seed_and_eliminates_others() -> None:
+    n_seeds = 4
+    o = optimizer.Optimizer(
+        DummyScenarioLoader,
+        DummyNoisyActorLoader,
+        DummySuggestionLoader,
+        racing=optimizer.Racing(n_seeds),
+    )
+    study = o.optimize(20, -1.0, "", "", "maximize", "total", 1)
+
+    complete = study.get_trials(states=(optuna.trial.TrialState.COMPLETE,))
+    pruned = study.get_trials(states=(optuna.trial.TrialState.PRUNED,))
+    assert len(complete) + len(pruned) == 20
+    assert len(pruned) > 0
+    for trial in complete:
+        values = trial.user_attrs[optimizer.RACING_VALUES]
+        assert len(values) == n_seeds
+        assert trial.value == pytest.approx(sum(values) / n_seeds)
+    for trial in pruned:
+        assert 2 <= len(trial.user_attrs[optimizer.RACING_VALUES]) < n_seeds
+
+
+def test_racing_validates_seeds() -> None:
+    with pytest.raises(ValueError):
+        optimizer.Racing(1)
+    with pytest.raises(ValueError):
+        optimizer.Racing(3, confidence=1.0)
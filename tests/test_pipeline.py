@@ -0,0 +1,136 @@
+import json
+import os
+import tempfile
+from types import SimpleNamespace
+from typing import Any, Dict, List, cast
+from unittest.mock import patch
+
+from banditsflow import actor as act
+from banditsflow import pipeline, runner, scenario
+from banditsflow import simulator as sim
+from banditsflow import suggestion as suggest
+
+
+class TinyScenario:
+    def __init__(self) -> None:
+        self.i = -1
+
+    def synopsis(self) -> scenario.SynopsisType:
+        return {}
+
+    def scan(self) -> bool:
+        self.i += 1
+        return self.i < 3
+
+    def line(self) -> scenario.LineType:
+        return {"rewards": [0.0, 1.0]}
+
+
+class TinyScenarioLoader:
+    @staticmethod
+    def load(name: str, step: str, seed: int) -> scenario.Scenario:
+        return TinyScenario()
+
+
+class TinySuggestionLoader:
+    @staticmethod
+    def load(name: str) -> List[suggest.SuggestionType]:
+        return [{"name": "arm", "type": "categorical", "choices": [0, 1]}]
+
+
+class TinyActor:
+    def __init__(self, arm: int) -> None:
+        self.arm = arm
+        self.total = 0.0
+
+    def act(self, line: scenario.LineType) -> act.ActionType:
+        self.total += line["rewards"][self.arm]
+        return {"metric": {"total": self.total}, "result": {"arm": self.arm}}
+
+
+class TinyActorLoader:
+    @staticmethod
+    def load(
+        name: str, synopsis: scenario.SynopsisType, params: act.ParamsType, seed: int
+    ) -> act.Actor:
+        return TinyActor(cast(int, params["arm"]))
+
+
+class TinyReporter:
+    def __init__(self, outdir: str) -> None:
+        self.outdir = outdir
+
+    def report(
+        self,
+        results: Dict[str, sim.SimulationResultType],
+        best_params: Dict[str, act.ParamsType],
+    ) -> List[str]:
+        path = os.path.join(self.outdir, "totals.json")
+        with open(path, "w") as f:
+            json.dump(
+                {
+                    actor_name: [ite[-1]["metric"]["total"] for ite in result]
+                    for actor_name, result in results.items()
+                },
+                f,
+            )
+        return [path]
+
+
+class TinyReporterLoader:
+    @staticmethod
+    def load(name: str, outdir: str) -> TinyReporter:
+        return TinyReporter(outdir)
+
+
+def tiny_module(name: str) -> Any:
+    return SimpleNamespace(
+        Loader={
+            "scenario.loader": TinyScenarioLoader,
+            "suggestion.loader": TinySuggestionLoader,
+            "actor.loader": TinyActorLoader,
+            "reporter.loader": TinyReporterLoader,
+        }[name]
+    )
+
+
+def test_run_passes_results_of_each_actor_to_reporter() -> None:
+    p = pipeline.Pipeline(
+        "scenario", ["a", "b"], "reporter", "metric", n_ite=2, seed=10, mute=True
+    )
+
+    with patch.object(runner, "Runner") as mock_runner_class:
+        mock_runner = mock_runner_class.return_value
+        mock_runner.optimize.return_value = {"x": 1.0}
+        mock_runner.evaluate.return_value = [[]]
+        mock_runner.report.return_value = ["report.png"]
+
+        report_paths = p.run("outdir")
+
+        assert report_paths == ["report.png"]
+        assert mock_runner.evaluate.call_args[0][:2] == (2, {"x": 1.0})
+        assert mock_runner.evaluate.call_args[0][3] == 11
+        mock_runner.report.assert_called_once_with(
+            "outdir",
+            {"a": [[]], "b": [[]]},
+            {"a": {"x": 1.0}, "b": {"x": 1.0}},
+        )
+
+
+def test_run_optimizes_evaluates_and_reports_tiny_actors() -> None:
+    p = pipeline.Pipeline(
+        "tiny", ["a", "b"], "tiny", "total", n_ite=2, n_trials=8, seed=1, mute=True
+    )
+
+    with tempfile.TemporaryDirectory() as dirname, patch.object(
+        runner.Runner, "import_module", side_effect=tiny_module
+    ):
+        report_paths = p.run(dirname)
+
+        assert report_paths == [os.path.join(dirname, "totals.json")]
+        with open(report_paths[0]) as f:
+            assert json.load(f) == {"a": [3.0, 3.0], "b": [3.0, 3.0]}
+
+    assert p.best_params == {"a": {"arm": 1}, "b": {"arm": 1}}
+    assert [action["result"]["arm"] for action in p.results["a"][0]] == [1, 1, 1]
+    assert list(p.metric_summaries["a"]["total"]["mean"]) == [1.0, 2.0, 3.0]
@@ -0,0 +1,44 @@
+from unittest.mock import Mock
+
+from banditsflow import profiler as prof
+
+
+def test_timed_accumulates_seconds_and_counts() -> None:
+    profiler = prof.Profiler()
+    func = Mock(return_value=1)
+    timed = profiler.timed("act", func)
+
+    assert timed(2) == 1
+    assert timed(3) == 1
+    func.assert_called_with(3)
+    assert profiler.counts["act"] == 2
+    assert profiler.seconds["act"] >= 0.0
+
+
+def test_merge_adds_both_profilers() -> None:
+    profiler = prof.Profiler()
+    profiler.add("iteration", 1.0)
+    profiler.count("steps", 10)
+    other = prof.Profiler()
+    other.add("iteration", 3.0)
+    other.count("steps", 30)
+    other.add("act", 0.5, 30)
+
+    profiler.merge(other)
+    stats = profiler.stats()
+
+    assert stats["iteration.seconds"] == 4.0
+    assert stats["iteration.count"] == 2.0
+    assert stats["act.count"] == 30.0
+    assert "steps.seconds" not in stats
+    assert stats["steps_per_second"] == 10.0
+    assert "trials_per_second" not in stats
+
+
+def test_trials_per_second_is_computed_from_optimize_time() -> None:
+    profiler = prof.Profiler()
+    profiler.add("optimize", 2.0)
+    profiler.add("trial", 0.5)
+    profiler.add("trial", 0.5)
+
+    assert profiler.stats()["trials_per_second"] == 1.0
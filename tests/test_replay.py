@@ -0,0 +1,120 @@
+import tempfile
+from typing import Any, List
+
+import numpy as np
+import pytest
+from banditsflow import replay, scenario
+
+
+class CountingScenarioLoader:
+    n_loads = 0
+
+    @staticmethod
+    def load(name: str, step: str, seed: int) -> scenario.Scenario:
+        CountingScenarioLoader.n_loads += 1
+        return ListScenario(seed)
+
+
+class ListScenario:
+    def __init__(self, seed: int) -> None:
+        self.i = -1
+        self.seed = seed
+
+    def synopsis(self) -> scenario.SynopsisType:
+        return {"seed": self.seed}
+
+    def scan(self) -> bool:
+        self.i += 1
+        return self.i < 4
+
+    def line(self) -> scenario.LineType:
+        return {
+            "i": self.i,
+            "x": float(self.i) / 2,
+            "thetas": [0.1 * self.i, 0.2],
+            "row": np.arange(2) + self.i,
+            "name": f"line{self.i}",
+        }
+
+
+class BatchScenarioLoader:
+    @staticmethod
+    def load(name: str, step: str, seed: int) -> scenario.Scenario:
+        return BatchScenario(seed)
+
+
+class BatchScenario(ListScenario):
+    def lines(self, max_n: int) -> scenario.LinesType:
+        n = max(0, min(max_n, 3 - self.i))
+        start = self.i + 1
+        self.i += n
+        return {"i": np.arange(start, start + n)}
+
+
+def read_lines(s: scenario.Scenario) -> List[scenario.LineType]:
+    lines = []
+    while s.scan():
+        lines.append(s.line())
+    return lines
+
+
+def assert_same_types(a: List[Any], b: List[Any]) -> None:
+    for x, y in zip(a, b):
+        for key in x:
+            # Both ways, so that a subclass such as np.float64 of float fails.
+            assert isinstance(x[key], type(y[key]))
+            assert isinstance(y[key], type(x[key]))
+
+
+@pytest.mark.parametrize("directory", [False, True])
+def test_replay_returns_same_lines_without_loading(directory: bool) -> None:
+    with tempfile.TemporaryDirectory() as dirname:
+        recorder = replay.ScenarioRecorder(
+            CountingScenarioLoader, dirname if directory else None
+        )
+        CountingScenarioLoader.n_loads = 0
+
+        recorded = recorder.load("a", "optimize", 1)
+        synopsis = recorded.synopsis()
+        expected = read_lines(recorded)
+        replayed = recorder.load("a", "optimize", 1)
+
+        assert CountingScenarioLoader.n_loads == 1
+        assert replayed.synopsis() == synopsis
+        lines = read_lines(replayed)
+        assert [line["i"] for line in lines] == [0, 1, 2, 3]
+        for line, expected_line in zip(lines, expected):
+            assert line["thetas"] == expected_line["thetas"]
+            np.testing.assert_array_equal(line["row"], expected_line["row"])
+            assert line["name"] == expected_line["name"]
+        assert_same_types(lines, expected)
+
+        recorder.load("a", "optimize", 2)
+        assert CountingScenarioLoader.n_loads == 2
+
+
+def test_unfinished_scenario_is_not_recorded() -> None:
+    recorder = replay.ScenarioRecorder(CountingScenarioLoader)
+    s = recorder.load("a", "optimize", 1)
+    s.synopsis()
+    s.scan()
+    s.line()
+
+    assert len(recorder.recordings) == 0
+
+
+def test_batch_scenario_is_replayed_in_batches() -> None:
+    recorder = replay.ScenarioRecorder(BatchScenarioLoader)
+    for _ in range(2):
+        s = recorder.load("a", "optimize", 1)
+        s.synopsis()
+        assert hasattr(s, "lines")
+        counts = []
+        while True:
+            lines = s.lines(3)  # type: ignore
+            if scenario.count_lines(lines) == 0:
+                break
+            counts.append(list(lines["i"]))
+        assert counts == [[0, 1, 2], [3]]
+
+    assert isinstance(s, replay.BatchReplayScenario)
@@ -0,0 +1,101 @@
+import pickle
+
+import numpy as np
+from banditsflow import result as res
+
+
+def test_iteration_result_behaves_like_list_of_actions() -> None:
+    actions = [
+        {"metric": {"reward": 1.0}, "result": {"idx_arm": 2, "name": "a"}},
+        {"metric": {"reward": 0.5}, "result": {"idx_arm": 0, "name": "b"}},
+    ]
+    result = res.IterationResult()
+    for action in actions:
+        result.append(action)  # type: ignore
+
+    assert len(result) == 2
+    assert result[-1]["metric"]["reward"] == 0.5
+    assert result[0]["result"]["name"] == "a"
+    assert result == actions
+    assert result.to_actions() == actions
+    assert result[1:] == actions[1:]
+
+
+def test_iteration_result_stores_values_in_typed_columns() -> None:
+    result = res.IterationResult(np.float32)
+    result.append({"metric": {"reward": 1.0}, "result": {"idx_arm": 1}})
+    result.append({"metric": {"reward": 2.0}, "result": {"idx_arm": 3}})
+
+    assert result.column("metric", "reward").dtype == np.float32
+    assert result.column("result", "idx_arm").dtype == np.int64
+    np.testing.assert_array_equal(result.column("result", "idx_arm"), [1, 3])
+
+
+def test_iteration_result_promotes_column_dtype() -> None:
+    result = res.IterationResult()
+    result.append({"metric": {}, "result": {"value": 1}})
+    result.append({"metric": {}, "result": {"value": 0.5}})
+    result.append({"metric": {}, "result": {"value": "text"}})
+
+    assert [action["result"]["value"] for action in result] == [1, 0.5, "text"]
+
+
+def test_iteration_result_converts_buffered_values_of_any_kind() -> None:
+    values = [True, 2, 0.5, "text", None, [1, 2], [1], (3, 4)]
+    n = res.APPEND_CHUNK_SIZE + 3
+    result = res.IterationResult()
+    expected = []
+    for step in range(n):
+        # Steps of every kind straddle the boundary of buffered chunks.
+        value = values[step * len(values) // n]
+        result.append({"metric": {"step": step}, "result": {"value": value}})
+        expected.append(value)
+
+    assert [action["result"]["value"] for action in result] == expected
+    assert result.column("metric", "step").dtype == np.int64
+
+
+def test_iteration_result_keeps_missing_keys() -> None:
+    result = res.IterationResult()
+    result.append({"metric": {"a": 1.0}, "result": {}})
+    result.append({"metric": {"b": 2.0}, "result": {}})
+
+    assert "b" not in result[0]["metric"]
+    assert "a" not in result[1]["metric"]
+    assert dict(result[1]["metric"]) == {"b": 2.0}
+
+
+def test_iteration_result_is_picklable_without_spare_capacity() -> None:
+    result = res.IterationResult()
+    result.append({"metric": {"reward": 1.0}, "result": {}})
+
+    restored = pickle.loads(pickle.dumps(result))
+
+    assert restored == result
+    assert len(restored.column("metric", "reward")) == 1
+
+
+def test_as_iteration_result_converts_list_of_actions() -> None:
+    actions = [{"metric": {"reward": 1.0}, "result": {"idx_arm": 2}}]
+    result = res.as_iteration_result(actions)  # type: ignore
+
+    assert isinstance(result, res.IterationResult)
+    assert res.as_iteration_result(result) is result
+    assert result == actions
+
+
+def test_iteration_result_extend_matches_append() -> None:
+    appended = res.IterationResult()
+    for i in range(3):
+        appended.append({"metric": {"m": float(i)}, "result": {"r": i}})
+
+    extended = res.IterationResult()
+    extended.extend({"metric": {"m": np.array([0.0, 1.0])}, "result": {"r": [0, 1]}})
+    extended.extend({"metric": {"m": np.array([2.0])}, "result": {"r": [2]}})
+
+    assert extended == appended
+    assert extended.column("result", "r").dtype.kind == "i"
+    assert res.count_actions({"metric": {"m": [1, 2]}, "result": {}}) == 2
+    assert list(res.iterate_actions({"metric": {"m": [1]}, "result": {"r": [2]}})) == [
+        {"metric": {"m": 1}, "result": {"r": 2}}
+    ]
@@ -0,0 +1,69 @@
+from typing import List
+
+import numpy as np
+import pytest
+from banditsflow import actor as act
+from banditsflow import result as res
+from banditsflow import retention as ret
+
+
+def actions(n: int) -> List[act.ActionType]:
+    return [{"metric": {"m": float(i)}, "result": {"r": i}} for i in range(n)]
+
+
+def block(start: int, n: int) -> act.ActionBlockType:
+    steps = np.arange(start, start + n)
+    return {"metric": {"m": steps.astype(float)}, "result": {"r": steps}}
+
+
+@pytest.mark.parametrize(
+    "policy, expected",
+    [
+        ("full", actions(7)),
+        ("last", [{"metric": {"m": 6.0}, "result": {"r": 6, "_step": 6}}]),
+        (
+            "every_k",
+            [
+                {"metric": {"m": 2.0}, "result": {"r": 2, "_step": 2}},
+                {"metric": {"m": 5.0}, "result": {"r": 5, "_step": 5}},
+                {"metric": {"m": 6.0}, "result": {"r": 6, "_step": 6}},
+            ],
+        ),
+        (
+            "metrics_only",
+            [{"metric": {"m": float(i)}, "result": {}} for i in range(7)],
+        ),
+        ("summary", [{"metric": {"m": 6.0}, "result": {"_step": 6}}]),
+    ],
+)
+def test_append_and_extend_retain_same_actions(
+    policy: str, expected: List[act.ActionType]
+) -> None:
+    retention = ret.Retention(policy, k=3)
+
+    appended = retention.open(res.IterationResult())
+    for action in actions(7):
+        appended.append(action)
+    assert len(appended) == 7
+
+    extended = retention.open(res.IterationResult())
+    extended.extend(block(0, 2))
+    extended.extend(block(2, 4))
+    extended.append(actions(7)[6])
+    assert len(extended) == 7
+
+    assert list(appended.close()) == expected
+    assert list(extended.close()) == expected
+    assert list(retention.reduce(actions(7))) == expected
+
+
+def test_every_k_does_not_duplicate_last_kept_step() -> None:
+    writer = ret.Retention("every_k", k=3).open(res.IterationResult())
+    writer.extend(block(0, 6))
+
+    assert [action["result"]["_step"] for action in writer.close()] == [2, 5]
+
+
+def test_unknown_policy_raises_value_error() -> None:
+    with pytest.raises(ValueError):
+        ret.Retention("first")
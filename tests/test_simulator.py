@@ -1,8 +1,16 @@
+import tempfile
+from typing import Any, Dict, List, Optional, Sequence, cast
 from unittest.mock import Mock, call, patch
 
+import numpy as np
+import numpy.typing as npt
 from banditsflow import actor as act
+from banditsflow import dispatch as disp
+from banditsflow import profiler as prof
+from banditsflow import retention as ret
 from banditsflow import scenario
 from banditsflow import simulator as sim
+from banditsflow import spill
 
 
 class DummyScenarioLoader:
@@ -51,6 +59,19 @@ class DummyEchoActor:
         return {"metric": line, "result": line}
 
 
+class DummySeedActorLoader:
+    @staticmethod
+    def load(
+        name: str, synopsis: scenario.SynopsisType, params: act.ParamsType, seed: int
+    ) -> act.Actor:
+        return DummySeedActor(name, synopsis, params, seed)
+
+
+class DummySeedActor(DummyEchoActor):
+    def act(self, line: scenario.LineType) -> act.ActionType:
+        return {"metric": {"seed": float(self.seed)}, "result": line}
+
+
 def test_actor_receives_scenario_lines_in_run_scenario() -> None:
     simulator = sim.Simulator(DummyScenarioLoader, DummyEchoActorLoader)
     result = simulator._run_scenario(0, "", "", {}, [], "", 0)
@@ -107,3 +128,328 @@ def test_run_scenario_is_called_n_ite_times_with_parameters_in_run() -> None:
         assert args == call(
             expected_current_ite, scenario_name, actor_name, {}, [], "", expected_seed
         )
+
+
+def test_parallel_run_returns_same_results_in_iteration_order() -> None:
+    simulator = sim.Simulator(DummyScenarioLoader, DummySeedActorLoader)
+    n_ite = 4
+    seed = 10
+
+    serial_callback = Mock()
+    parallel_callback = Mock()
+    serial_results = simulator.run(n_ite, "", "", {}, [serial_callback], "", seed)
+    parallel_results = simulator.run(
+        n_ite, "", "", {}, [parallel_callback], "", seed, n_jobs=2
+    )
+
+    assert parallel_results == serial_results
+    assert parallel_callback.call_args_list == serial_callback.call_args_list
+
+
+class DummyStepActorLoader:
+    @staticmethod
+    def load(
+        name: str, synopsis: scenario.SynopsisType, params: act.ParamsType, seed: int
+    ) -> act.Actor:
+        return DummyStepActor(name, synopsis, params, seed)
+
+
+class DummyStepActor(DummyEchoActor):
+    def act(self, line: scenario.LineType) -> act.ActionType:
+        return {"metric": {"i": line["i"]}, "result": {"step": "own"}}
+
+
+def test_parallel_run_does_not_take_step_result_of_actor_as_step() -> None:
+    simulator = sim.Simulator(DummyScenarioLoader, DummyStepActorLoader)
+
+    serial_callback = Mock()
+    parallel_callback = Mock()
+    simulator.run(2, "", "", {}, [serial_callback], "", 10)
+    simulator.run(2, "", "", {}, [parallel_callback], "", 10, n_jobs=2)
+
+    assert [c[0][:2] for c in parallel_callback.call_args_list] == [
+        (0, 0),
+        (0, 1),
+        (1, 0),
+        (1, 1),
+    ]
+    assert parallel_callback.call_args_list == serial_callback.call_args_list
+
+
+def test_run_spills_results_to_sink_directory() -> None:
+    with tempfile.TemporaryDirectory() as dirname:
+        sink = spill.SpillSink(dirname, chunk_size=1)
+        simulator = sim.Simulator(DummyScenarioLoader, DummyEchoActorLoader, sink=sink)
+        results = simulator.run(2, "", "", {}, [], "", 0)
+
+        assert all(isinstance(r, spill.MappedIterationResult) for r in results)
+        assert results[1][1]["metric"]["i"] == 1
+
+
+class DummyBatchScenarioLoader:
+    @staticmethod
+    def load(name: str, step: str, seed: int) -> scenario.Scenario:
+        return DummyBatchScenario()
+
+
+class DummyBatchScenario(DummyScenario):
+    def __init__(self) -> None:
+        super().__init__()
+        self.n_ite = 5
+
+    def lines(self, max_n: int) -> scenario.LinesType:
+        n = max(0, min(max_n, self.n_ite - self.i - 1))
+        lines = {"i": np.arange(self.i + 1, self.i + 1 + n)}
+        self.i += n
+        return lines
+
+
+class DummyBatchEchoActorLoader:
+    @staticmethod
+    def load(
+        name: str, synopsis: scenario.SynopsisType, params: act.ParamsType, seed: int
+    ) -> act.Actor:
+        return DummyBatchEchoActor(name, synopsis, params, seed)
+
+
+class DummyBatchEchoActor(DummyEchoActor):
+    def act_batch(self, lines: scenario.LinesType) -> act.ActionBlockType:
+        return {"metric": lines, "result": lines}
+
+
+def test_batch_protocol_is_preferred_and_matches_per_line_path() -> None:
+    batch_simulator = sim.Simulator(
+        DummyBatchScenarioLoader, DummyBatchEchoActorLoader, batch_size=2
+    )
+    line_simulator = sim.Simulator(
+        DummyBatchScenarioLoader, DummyBatchEchoActorLoader, batch_size=0
+    )
+    batch_callback = Mock()
+    line_callback = Mock()
+
+    with patch.object(DummyBatchEchoActor, "act", side_effect=AssertionError):
+        batch_result = batch_simulator._run_scenario(
+            0, "", "", {}, [batch_callback], "", 0
+        )
+    line_result = line_simulator._run_scenario(0, "", "", {}, [line_callback], "", 0)
+
+    assert len(batch_result) == 5
+    assert batch_result == line_result
+    assert batch_callback.call_args_list == line_callback.call_args_list
+
+
+class DummyRaggedScenarioLoader:
+    @staticmethod
+    def load(name: str, step: str, seed: int) -> scenario.Scenario:
+        scenario = DummyScenario()
+        scenario.n_ite = seed % 3 + 1
+        return scenario
+
+
+class DummyVectorSeedActorLoader(DummySeedActorLoader):
+    @staticmethod
+    def load_vector(
+        name: str,
+        synopses: Sequence[scenario.SynopsisType],
+        params: act.ParamsType,
+        seeds: Sequence[int],
+    ) -> Optional[act.VectorActor]:
+        if name == "scalar":
+            return None
+        return DummyVectorSeedActor(seeds)
+
+
+class DummyVectorSeedActor:
+    def __init__(self, seeds: Sequence[int]) -> None:
+        self.seeds = np.array(seeds, dtype=np.float64)
+
+    def act_vector(
+        self, lines: Sequence[scenario.LineType], indices: npt.NDArray[Any]
+    ) -> act.ActionBlockType:
+        return {
+            "metric": {"seed": self.seeds[indices]},
+            "result": {"i": np.array([line["i"] for line in lines])},
+        }
+
+
+def test_vectorized_run_matches_serial_run() -> None:
+    serial_callback = Mock()
+    serial = sim.Simulator(DummyRaggedScenarioLoader, DummySeedActorLoader).run(
+        5, "", "", {}, [serial_callback], "", 0
+    )
+    vector_callback = Mock()
+    vectorized = sim.VectorizedSimulator(
+        DummyRaggedScenarioLoader, DummyVectorSeedActorLoader, batch_size=2
+    ).run(5, "", "", {}, [vector_callback], "", 0)
+
+    assert [len(result) for result in vectorized] == [1, 2, 3, 1, 2]
+    assert list(vectorized) == list(serial)
+    assert vector_callback.call_args_list == serial_callback.call_args_list
+
+
+def test_vectorized_run_falls_back_without_vector_actor() -> None:
+    simulator = sim.VectorizedSimulator(DummyScenarioLoader, DummyVectorSeedActorLoader)
+    with patch.object(sim.Simulator, "run", return_value=[]) as mock_run, patch.object(
+        DummyVectorSeedActor, "act_vector"
+    ) as mock_act:
+        simulator.run(2, "", "scalar", {}, [], "", 0)
+        mock_run.assert_called_once()
+        mock_act.assert_not_called()
+
+
+def test_profiler_times_phases_without_changing_results() -> None:
+    plain = sim.Simulator(DummyScenarioLoader, DummySeedActorLoader).run(
+        3, "", "", {}, [], "", 0
+    )
+
+    for n_jobs in [1, 2]:
+        profiler = prof.Profiler()
+        callback = Mock(__name__="callback")
+        simulator = sim.Simulator(
+            DummyScenarioLoader, DummySeedActorLoader, profiler=profiler
+        )
+        results = simulator.run(3, "", "", {}, [callback], "", 0, n_jobs=n_jobs)
+
+        assert results == plain
+        assert profiler.counts["scenario_load"] == 3
+        assert profiler.counts["actor_load"] == 3
+        assert profiler.counts["act"] == 6
+        assert profiler.counts["steps"] == 6
+        assert profiler.counts["callback.0.callback"] == 6
+        assert profiler.stats()["steps_per_second"] > 0.0
+
+
+def test_vectorized_profiler_counts_lockstep_steps() -> None:
+    profiler = prof.Profiler()
+    sim.VectorizedSimulator(
+        DummyRaggedScenarioLoader, DummyVectorSeedActorLoader, profiler=profiler
+    ).run(5, "", "", {}, [], "", 0)
+
+    assert profiler.counts["iteration"] == 5
+    assert profiler.counts["steps"] == 9
+    assert profiler.counts["act_vector"] == 3
+
+
+def test_retention_keeps_callback_steps_in_every_path() -> None:
+    retention = ret.Retention("last")
+    expected_callback = Mock()
+    full = sim.Simulator(DummyRaggedScenarioLoader, DummySeedActorLoader).run(
+        5, "", "", {}, [expected_callback], "", 0
+    )
+
+    for simulator, n_jobs in [
+        (sim.Simulator(DummyRaggedScenarioLoader, DummySeedActorLoader), 1),
+        (sim.Simulator(DummyRaggedScenarioLoader, DummySeedActorLoader), 2),
+        (
+            sim.VectorizedSimulator(
+                DummyRaggedScenarioLoader, DummyVectorSeedActorLoader
+            ),
+            1,
+        ),
+    ]:
+        simulator.retention = retention
+        callbacks_list: List[List[sim.ActionCallbackType]] = [[], [Mock()]]
+        for callbacks in callbacks_list:
+            results = simulator.run(5, "", "", {}, callbacks, "", 0, n_jobs=n_jobs)
+
+            assert [len(result) for result in results] == [1] * 5
+            assert [result[0]["metric"] for result in results] == [
+                result[-1]["metric"] for result in full
+            ]
+            assert [result[0]["result"]["_step"] for result in results] == [
+                len(result) - 1 for result in full
+            ]
+            if len(callbacks) > 0:
+                callback = cast(Mock, callbacks[0])
+                assert callback.call_args_list == expected_callback.call_args_list
+
+
+class DummyMixedActorLoader:
+    @staticmethod
+    def load(
+        name: str, synopsis: scenario.SynopsisType, params: act.ParamsType, seed: int
+    ) -> act.Actor:
+        if name == "seed":
+            return DummySeedActor(name, synopsis, params, seed)
+        return DummyEchoActor(name, synopsis, params, seed)
+
+
+def test_run_actors_matches_running_each_actor_alone() -> None:
+    simulator = sim.Simulator(DummyRaggedScenarioLoader, DummyMixedActorLoader)
+    actor_names = ["echo", "seed"]
+    params: Dict[str, act.ParamsType] = {"echo": {}, "seed": {}}
+    expected_callbacks = {name: Mock() for name in actor_names}
+    expected = {
+        name: simulator.run(5, "", name, {}, [expected_callbacks[name]], "", 10)
+        for name in actor_names
+    }
+
+    for n_jobs in [1, 2]:
+        callbacks = {name: Mock() for name in actor_names}
+        with patch.object(
+            DummyRaggedScenarioLoader,
+            "load",
+            wraps=DummyRaggedScenarioLoader.load,
+        ) as mock_load:
+            results = simulator.run_actors(
+                5,
+                "",
+                actor_names,
+                params,
+                {name: [callback] for name, callback in callbacks.items()},
+                "",
+                10,
+                n_jobs=n_jobs,
+            )
+
+        assert results == expected
+        if n_jobs == 1:
+            assert mock_load.call_count == 5  # One scenario per iteration
+        for name in actor_names:
+            assert (
+                callbacks[name].call_args_list
+                == expected_callbacks[name].call_args_list
+            )
+
+
+def test_run_actors_uses_batch_protocol_when_every_actor_supports_it() -> None:
+    simulator = sim.Simulator(
+        DummyBatchScenarioLoader, DummyBatchEchoActorLoader, batch_size=2
+    )
+    expected = simulator.run(2, "", "", {}, [], "", 0)
+
+    with patch.object(DummyBatchEchoActor, "act", side_effect=AssertionError):
+        results = simulator.run_actors(2, "", ["a", "b"], {"a": {}, "b": {}}, {}, "", 0)
+
+    assert results == {"a": expected, "b": expected}
+
+
+def test_dispatched_callbacks_are_flushed_by_the_end_of_run() -> None:
+    expected_callback = Mock()
+    expected = sim.Simulator(DummyRaggedScenarioLoader, DummySeedActorLoader).run(
+        5, "", "", {}, [expected_callback], "", 0
+    )
+
+    for simulator, n_jobs in [
+        (sim.Simulator(DummyRaggedScenarioLoader, DummySeedActorLoader), 1),
+        (sim.Simulator(DummyRaggedScenarioLoader, DummySeedActorLoader), 2),
+        (
+            sim.VectorizedSimulator(
+                DummyRaggedScenarioLoader, DummyVectorSeedActorLoader
+            ),
+            1,
+        ),
+    ]:
+        simulator.dispatch = disp.Dispatch(max_queue_size=2)
+        callback = Mock()
+        results = simulator.run(5, "", "", {}, [callback], "", 0, n_jobs=n_jobs)
+
+        assert results == expected
+        assert callback.call_args_list == expected_callback.call_args_list
+
+
+def test_shard_iterations_splits_into_contiguous_ranges() -> None:
+    assert sim.shard_iterations(10, 3) == [(0, 4), (4, 7), (7, 10)]
+    assert sim.shard_iterations(2, 4) == [(0, 1), (1, 2)]
+    assert sim.shard_iterations(5, 1) == [(0, 5)]
+    assert sim.shard_iterations(0, 2) == [(0, 0)]
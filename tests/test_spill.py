@@ -0,0 +1,65 @@
+import os
+import pickle
+import tempfile
+from typing import Any, Dict, List
+
+import numpy as np
+from banditsflow import spill
+
+
+def test_spilled_result_equals_appended_actions() -> None:
+    actions: List[Dict[str, Dict[str, Any]]] = [
+        {"metric": {"reward": float(i)}, "result": {"idx_arm": i % 3}} for i in range(5)
+    ]
+    actions[2]["result"]["name"] = "text"
+    del actions[3]["metric"]["reward"]
+
+    with tempfile.TemporaryDirectory() as dirname:
+        writer = spill.SpillSink(dirname, chunk_size=2).open(0)
+        for action in actions:
+            writer.append(action)  # type: ignore
+        result = writer.close()
+
+        assert len(result) == 5
+        assert result == actions
+        assert isinstance(result.column("result", "idx_arm"), np.memmap)
+
+
+def test_spilled_result_is_pickled_as_path() -> None:
+    with tempfile.TemporaryDirectory() as dirname:
+        writer = spill.SpillSink(dirname).open(3)
+        for i in range(100):
+            writer.append({"metric": {"reward": float(i)}, "result": {}})
+        result = writer.close()
+
+        data = pickle.dumps(result)
+        restored = pickle.loads(data)
+
+        assert len(data) < 200
+        assert restored == result
+        assert spill.load(dirname) == [result]
+
+
+def test_spilled_object_column_is_read_by_chunk() -> None:
+    actions: List[Dict[str, Dict[str, Any]]] = [
+        {"metric": {}, "result": {"name": f"arm{i}" if i % 4 else i}} for i in range(7)
+    ]
+    del actions[5]["result"]["name"]
+
+    with tempfile.TemporaryDirectory() as dirname:
+        writer = spill.SpillSink(dirname, chunk_size=2).open(0)
+        for action in actions:
+            writer.append(action)  # type: ignore
+        result = writer.close()
+
+        column = result._columns["result"]["name"]
+        assert isinstance(column, spill.ChunkedObjectColumn)
+        assert not os.path.exists(os.path.join(writer.path, "result_0.values.npy"))
+        assert column[3] == "arm3"
+        assert column._loaded_chunk == 1
+        assert result == actions
+        assert list(result[2:6]) == actions[2:6]
+        restored = pickle.loads(pickle.dumps(column))
+        assert [restored[i] for i in range(7) if not restored.is_missing(i)] == [
+            a["result"]["name"] for a in actions if "name" in a["result"]
+        ]
@@ -0,0 +1,98 @@
+import os
+import tempfile
+import threading
+from typing import Any, Dict, Iterator, List
+
+import numpy as np
+import pytest
+from banditsflow import scenario, streaming
+
+
+def write_npy(dirname: str, n: int) -> Dict[str, Any]:
+    columns = {
+        "i": np.arange(n),
+        "thetas": np.arange(n * 3, dtype=np.float64).reshape(n, 3),
+    }
+    for key, values in columns.items():
+        np.save(os.path.join(dirname, f"{key}.npy"), values)
+    return columns
+
+
+def scan_all(s: streaming.ColumnarScenario) -> List[scenario.LineType]:
+    lines = []
+    while s.scan():
+        lines.append(s.line())
+    return lines
+
+
+def test_scan_streams_every_line_across_chunks() -> None:
+    with tempfile.TemporaryDirectory() as dirname:
+        columns = write_npy(dirname, 10)
+        s = streaming.ColumnarScenario(
+            dirname, {"num_arms": 3}, chunk_size=4, prefetch=1
+        )
+
+        lines = scan_all(s)
+
+        assert s.synopsis() == {"num_arms": 3}
+        assert [line["i"] for line in lines] == list(range(10))
+        np.testing.assert_array_equal(
+            np.stack([line["thetas"] for line in lines]), columns["thetas"]
+        )
+        assert not s.scan()
+
+
+def test_lines_are_views_within_chunk_and_follow_scan() -> None:
+    with tempfile.TemporaryDirectory() as dirname:
+        write_npy(dirname, 10)
+        s = streaming.ColumnarScenario(dirname, chunk_size=4)
+
+        assert s.scan()
+        assert s.line()["i"] == 0
+        counts = []
+        while True:
+            lines = s.lines(2)
+            n = scenario.count_lines(lines)
+            if n == 0:
+                break
+            assert lines["thetas"].base is not None
+            counts.append(list(lines["i"]))
+
+        assert counts == [[1, 2], [3], [4, 5], [6, 7], [8, 9]]
+
+
+def test_csv_columns_can_be_selected() -> None:
+    pd = pytest.importorskip("pandas")
+    with tempfile.TemporaryDirectory() as dirname:
+        path = os.path.join(dirname, "lines.csv")
+        pd.DataFrame({"a": range(5), "b": range(5, 10)}).to_csv(path, index=False)
+
+        s = streaming.ColumnarScenario(path, columns=["b"], chunk_size=2)
+
+        assert [line for line in scan_all(s)] == [{"b": b} for b in range(5, 10)]
+
+
+def test_prefetcher_raises_error_of_reader() -> None:
+    def chunks() -> Iterator[streaming.ChunkType]:
+        yield {"i": np.arange(2)}
+        raise OSError("broken")
+
+    prefetcher = streaming.Prefetcher(chunks(), 1)
+
+    assert prefetcher.get() is not None
+    with pytest.raises(OSError):
+        prefetcher.get()
+    assert prefetcher.get() is None
+
+
+def test_close_stops_prefetch_thread() -> None:
+    def chunks() -> Iterator[streaming.ChunkType]:
+        while True:
+            yield {"i": np.arange(2)}
+
+    prefetcher = streaming.Prefetcher(chunks(), 1)
+    n_threads = threading.active_count()
+    prefetcher.close()
+
+    assert threading.active_count() == n_threads - 1
+    assert prefetcher.get() is None
@@ -0,0 +1,29 @@
+from unittest.mock import Mock
+
+import pytest
+from banditsflow import tracking
+
+
+def test_metrics_are_logged_in_size_bounded_batches() -> None:
+    client = Mock()
+    with tracking.BatchMetricLogger("run", client=client, batch_size=2) as logger:
+        for step in range(5):
+            logger.log_metric("reward", float(step), step)
+
+    batches = [args.kwargs["metrics"] for args in client.log_batch.call_args_list]
+    assert all(len(batch) <= 2 for batch in batches)
+
+    metrics = [metric for batch in batches for metric in batch]
+    assert [(m.key, m.value, m.step) for m in metrics] == [
+        ("reward", float(step), step) for step in range(5)
+    ]
+
+
+def test_close_raises_error_of_background_logging() -> None:
+    client = Mock()
+    client.log_batch.side_effect = RuntimeError("unavailable")
+    logger = tracking.BatchMetricLogger("run", client=client)
+    logger.log_metric("reward", 1.0, 0)
+
+    with pytest.raises(RuntimeError):
+        logger.close()